@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+테스트 공용 준비물
+- FakeClock: time 모듈 대체 (time/monotonic/perf_counter/sleep 모두 가짜 시각)
+- ClockedUpbit: upbit_benchmark.FakeUpbit에 시계를 붙인 합성 시세 (시계가 가면 새 봉이 생기고 진행 중인 봉이 자람)
+"""
+
+import os
+import sys
+import zlib
+from collections import Counter
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from upbit_api import INTERVALS
+from upbit_benchmark import FakeUpbit
+
+# 가짜 시계 시작 시각: 2025-01-15 00:00 UTC (일봉 경계)
+CLOCK_START = 1736899200.0
+
+class FakeClock:
+    """time 모듈 대체 (초 단위, 직접 advance)"""
+
+    def __init__(self, now=CLOCK_START):
+        self.now = float(now)
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+    def perf_counter(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+    def advance(self, seconds):
+        self.now += seconds
+
+class ClockedUpbit(FakeUpbit):
+    """
+    시계 기준 합성 시세 (마켓/간격별 시드 고정)
+    - 간격별 bars개 봉 중 시계 시작 시각까지가 앞쪽 절반
+    - 현재 진행 중인 봉은 경과 비율만큼만 자란 값 (거래량 비례, 종가는 시가→종가 보간)
+    """
+
+    def __init__(self, markets, clock, bars=1000):
+        super().__init__(markets)
+        self.clock = clock
+        self.total = bars
+        self.requests = Counter()  # 봉 간격 → 캔들 요청 수
+
+    def full_series(self, market, interval):
+        key = (market, interval)
+        if key not in self.series:
+            _, interval_ms = INTERVALS[interval]
+            rng = np.random.default_rng(zlib.crc32(f"{market}/{interval}".encode()))
+            start = int(CLOCK_START * 1000) // interval_ms * interval_ms - (self.total // 2 - 1) * interval_ms
+            ts = start + np.arange(self.total, dtype=np.int64) * interval_ms
+            close = 1000 * np.exp(np.cumsum(rng.normal(0, 0.01, self.total)))
+            open_ = np.r_[close[0], close[:-1]]
+            high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.01, self.total))
+            low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.01, self.total))
+            volume = rng.lognormal(8, 0.8, self.total)
+            self.series[key] = (ts, np.stack([open_, high, low, close, volume, volume * close], axis=1))
+        return self.series[key]
+
+    def bars(self, market, interval):
+        ts, ohlcv = self.full_series(market, interval)
+        _, interval_ms = INTERVALS[interval]
+        now_ms = int(self.clock.now * 1000)
+        n = int(np.searchsorted(ts, now_ms, side='right'))
+        ts, ohlcv = ts[:n], ohlcv[:n].copy()
+        if n:
+            fraction = max((now_ms - ts[-1]) / interval_ms, 0.01)
+            if fraction < 1:
+                open_, high, low, close = ohlcv[-1, :4]
+                partial = open_ + (close - open_) * fraction
+                ohlcv[-1] = [open_, min(high, max(open_, partial)), max(low, min(open_, partial)), partial,
+                             ohlcv[-1, 4] * fraction, ohlcv[-1, 5] * fraction]
+        return ts, ohlcv
+
+    def candles(self, market, interval, count, to=None):
+        self.requests[interval] += 1
+        return super().candles(market, interval, count, to)
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+@pytest.fixture
+def exchange(clock):
+    return ClockedUpbit([f"KRW-T{i:02d}" for i in range(8)], clock)
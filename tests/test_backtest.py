@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+백테스트 = 실시간 채점 (합성 5분봉을 봉마다 실시간 함수로 재생해 알림 봉/점수/레벨 비교)
+- 실시간 함수는 캔들 캐시/일봉 저장소 자리에 "봉 t까지의 데이터"만 돌려주는 재생기를 끼워 호출
+- 호가/체결은 과거 데이터가 없으므로 양쪽 모두 없음
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import upbit_fast_detector as fast
+import upbit_monitor_enhanced as enhanced
+from upbit_backtest import (DAY_MS, FAST_ALERT_SCORE, ENHANCED_ALERT_SCORE, SHORT_TERM_WINDOW,
+                            backtest_fast, backtest_enhanced)
+from upbit_indicators import IndicatorEngine
+from upbit_tiers import MarketTiers
+
+MARKET = 'KRW-BT'
+BAR_MS = 5 * 60 * 1000
+HISTORY_DAYS = 120
+
+def synthetic_market(rng, days=3):
+    """00:00 UTC부터 days일치 5분봉 (급등 구간 포함) + 이전 HISTORY_DAYS일 일봉과 5분봉 구간의 마감 일봉"""
+    n = days * DAY_MS // BAR_MS
+    start = 1_700_000_000_000 // DAY_MS * DAY_MS
+    ts = start + np.arange(n, dtype=np.int64) * BAR_MS
+    drift = np.where(rng.random(n) < 0.03, rng.uniform(0.01, 0.04, n), 0)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.006, n) + drift))
+    open_ = np.r_[close[0], close[:-1]] * np.exp(rng.normal(0, 0.002, n))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.004, n))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.004, n))
+    volume = rng.lognormal(3, 0.8, n) * np.where(drift > 0, rng.uniform(2, 8, n), 1)
+    ohlcv = np.column_stack([open_, high, low, close, volume, volume * close])
+
+    # 이전 일봉 + 5분봉을 날짜별로 묶은 마감 일봉 (마지막 날은 진행 중이라 제외)
+    history_close = close[0] * np.exp(np.cumsum(rng.normal(0, 0.03, HISTORY_DAYS)))[::-1]
+    history_volume = rng.lognormal(3, 0.5, HISTORY_DAYS) * (DAY_MS // BAR_MS)
+    history = np.column_stack([history_close, history_close * 1.03, history_close * 0.97, history_close,
+                               history_volume, history_volume * history_close])
+    starts = np.arange(0, n, DAY_MS // BAR_MS)[:-1]
+    ends = starts + DAY_MS // BAR_MS - 1
+    days_5m = np.column_stack([open_[starts], np.maximum.reduceat(high, starts)[:len(starts)],
+                               np.minimum.reduceat(low, starts)[:len(starts)], close[ends],
+                               np.add.reduceat(volume, starts)[:len(starts)],
+                               np.add.reduceat(ohlcv[:, 5], starts)[:len(starts)]])
+    daily_ts = np.r_[start - np.arange(HISTORY_DAYS, 0, -1) * DAY_MS, ts[starts]]
+    return ts, ohlcv, daily_ts, np.vstack([history, days_5m])
+
+class Replay:
+    """CANDLE_CACHE / DAILY_STORE 대체: 봉 t 마감 시점까지의 캔들만 돌려줌"""
+
+    def __init__(self, ts, ohlcv, daily_ts, daily_ohlcv):
+        self.ts, self.ohlcv = ts, ohlcv
+        self.daily_ts, self.daily_ohlcv = daily_ts, daily_ohlcv
+        self.t = 0
+
+    def get_arrays(self, market, interval_or_count, count=None):
+        if count is None:
+            return self.daily(interval_or_count)
+        assert interval_or_count == 'minute5'
+        first = max(0, self.t + 1 - count)
+        return self.ts[first:self.t + 1], self.ohlcv[first:self.t + 1]
+
+    def daily(self, count):
+        """마감 일봉 + 오늘 00:00 UTC부터 봉 t까지 묶은 진행 중인 일봉"""
+        day = self.ts[self.t] // DAY_MS * DAY_MS
+        closed = np.searchsorted(self.daily_ts, day)
+        today = self.ohlcv[np.searchsorted(self.ts, day):self.t + 1]
+        forming = [today[0, 0], today[:, 1].max(), today[:, 2].min(), today[-1, 3], today[:, 4].sum(), today[:, 5].sum()]
+        ts = np.r_[self.daily_ts[:closed], day][-count:]
+        return ts, np.vstack([self.daily_ohlcv[:closed], forming])[-count:]
+
+@pytest.fixture(scope='module')
+def market():
+    return synthetic_market(np.random.default_rng(12))
+
+def alerts(frame):
+    return list(zip(frame['time'], frame['score'], frame['level']))
+
+def bar_time(ts):
+    return pd.Timestamp(int(ts), unit='ms', tz='UTC')
+
+def test_fast_backtest_matches_live(market):
+    ts, ohlcv, _, _ = market
+    live = []
+    for t in range(fast.SURGE_WINDOW - 1, len(ts)):
+        block = ohlcv[t + 1 - fast.SURGE_WINDOW:t + 1]
+        for _, surge_data in fast.screen_surge_candidates([MARKET], [block]):
+            score, _, level = fast.evaluate_fast_signal(surge_data, None)
+            if score >= FAST_ALERT_SCORE:
+                live.append((bar_time(ts[t]), score, level))
+
+    expected = alerts(backtest_fast(MARKET, ts, ohlcv))
+    assert len(expected) >= 10
+    assert expected == live
+
+def test_enhanced_backtest_matches_live(monkeypatch, market):
+    ts, ohlcv, daily_ts, daily_ohlcv = market
+    replay = Replay(*market)
+    monkeypatch.setattr(enhanced, 'CANDLE_CACHE', replay)
+    monkeypatch.setattr(enhanced, 'DAILY_STORE', replay)
+    monkeypatch.setattr(enhanced, 'INDICATOR_ENGINE', IndicatorEngine())
+    monkeypatch.setattr(enhanced, 'TIERS', MarketTiers(enhanced.SCAN_INTERVAL, 1))
+    monkeypatch.setattr(enhanced, 'print', lambda *args, **kwargs: None, raising=False)
+
+    live = []
+    for t in range(SHORT_TERM_WINDOW - 1, len(ts)):
+        replay.t = t
+        # 실시간 1~2단계 필터 → 3단계 지표 → 4단계 채점 (알림 4점 이상)
+        for coin, short_term_data, volume_data in enhanced.screen_markets([MARKET]):
+            indicators = enhanced.calculate_indicators(coin)
+            score, _, signal_type = enhanced.calculate_signal_strength(volume_data, indicators, None, short_term_data)
+            if score >= ENHANCED_ALERT_SCORE:
+                live.append((bar_time(ts[t]), score, signal_type))
+
+    expected = alerts(backtest_enhanced(MARKET, ts, ohlcv, daily_ts, daily_ohlcv))
+    assert len(expected) >= 10
+    assert expected == live
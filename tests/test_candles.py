@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""캔들 캐시 증분 갱신 = 매번 전체 조회 (새 봉 + 진행 중인 봉 갱신, 빈 구간 재조회, max_age)"""
+
+import numpy as np
+
+import upbit_candles
+from upbit_candles import CandleCache, candles_to_arrays
+from conftest import ClockedUpbit
+
+COUNT = 100
+
+def assert_full_fetch(exchange, cache, market, interval='minute5', count=COUNT):
+    ts, ohlcv = cache.get_arrays(market, interval, count)
+    expected_ts, expected = candles_to_arrays(exchange.candles(market, interval, count))
+    np.testing.assert_array_equal(ts, expected_ts)
+    np.testing.assert_array_equal(ohlcv, expected)
+
+def test_delta_refresh_matches_full_fetch(monkeypatch, clock, exchange):
+    monkeypatch.setattr(upbit_candles, 'time', clock)
+    cache = CandleCache(fetch=exchange.candles)
+    market = exchange.markets[0]
+
+    assert_full_fetch(exchange, cache, market)
+    # 진행 중인 봉만 자람 / 봉 1개 / 여러 개 / 경계 직전 / 경계 정각
+    for step in (100, 200, 60, 900, 299, 1, 3000):
+        before = cache.stats['candles']
+        clock.advance(step)
+        assert_full_fetch(exchange, cache, market)
+        assert cache.stats['candles'] - before <= step // 300 + 3
+
+def test_gap_longer_than_count_refetches_everything(monkeypatch, clock, exchange):
+    monkeypatch.setattr(upbit_candles, 'time', clock)
+    cache = CandleCache(fetch=exchange.candles)
+    market = exchange.markets[1]
+
+    assert_full_fetch(exchange, cache, market)
+    clock.advance(300 * (COUNT + 50))
+    before = cache.stats['candles']
+    assert_full_fetch(exchange, cache, market)
+    assert cache.stats['candles'] - before == COUNT
+
+def test_max_age_skips_refetch_until_expired(monkeypatch, clock, exchange):
+    monkeypatch.setattr(upbit_candles, 'time', clock)
+    cache = CandleCache(fetch=exchange.candles)
+    cache.max_age = 60
+    market = exchange.markets[2]
+
+    ts, ohlcv = cache.get_arrays(market, 'minute5', COUNT)
+    requests = exchange.requests['minute5']
+    clock.advance(30)
+    cached_ts, cached = cache.get_arrays(market, 'minute5', COUNT)
+    assert exchange.requests['minute5'] == requests
+    np.testing.assert_array_equal(cached_ts, ts)
+    np.testing.assert_array_equal(cached, ohlcv)
+
+    clock.advance(31)
+    assert_full_fetch(exchange, cache, market)
+
+def test_short_history_stays_incremental(monkeypatch, clock):
+    monkeypatch.setattr(upbit_candles, 'time', clock)
+    exchange = ClockedUpbit(['KRW-NEW'], clock, bars=80)  # 상장 직후: 40개뿐
+    cache = CandleCache(fetch=exchange.candles)
+
+    assert_full_fetch(exchange, cache, 'KRW-NEW')
+    assert cache.ring('KRW-NEW', 'minute5').exhausted
+    before = cache.stats['candles']
+    clock.advance(300)
+    assert_full_fetch(exchange, cache, 'KRW-NEW')
+    assert cache.stats['candles'] - before <= 3
@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+"""통합 스캔: 공용 캔들 캐시/체결 집계 설정은 스캔하는 동안만 바뀜"""
+
+import pytest
+
+import upbit_combined
+from upbit_candles import CANDLE_CACHE
+from upbit_trades import TRADE_TAPE
+
+def test_import_keeps_shared_settings():
+    assert CANDLE_CACHE.max_age == 0 and TRADE_TAPE.max_age == 0
+
+def test_reuse_fetched_restores_after_scan():
+    with upbit_combined.reuse_fetched(60):
+        assert CANDLE_CACHE.max_age == TRADE_TAPE.max_age == 60
+    assert CANDLE_CACHE.max_age == TRADE_TAPE.max_age == 0
+
+    with pytest.raises(RuntimeError):
+        with upbit_combined.reuse_fetched(60):
+            raise RuntimeError("스캔 실패")
+    assert CANDLE_CACHE.max_age == TRADE_TAPE.max_age == 0
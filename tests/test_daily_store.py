@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""일봉 저장소 = 매번 일봉 직접 조회 (UTC 날짜 변경, 현재가 일괄 갱신 / 단건 재조회)"""
+
+import numpy as np
+import pytest
+
+import upbit_candles
+from upbit_candles import DailyCandleStore, candles_to_arrays, FORMING_MAX_AGE
+
+HOUR = 3600
+
+@pytest.fixture
+def store(monkeypatch, clock, exchange):
+    monkeypatch.setattr(upbit_candles, 'time', clock)
+    return DailyCandleStore(fetch=exchange.candles, fetch_ticker=exchange.tickers)
+
+def assert_direct_fetch(exchange, store, market, count, now_ms):
+    ts, ohlcv = store.get_arrays(market, count, now_ms)
+    expected_ts, expected = candles_to_arrays(exchange.candles(market, 'day', count))
+    np.testing.assert_array_equal(ts, expected_ts)
+    np.testing.assert_array_equal(ohlcv, expected)
+
+def test_store_matches_direct_fetch_across_days(clock, exchange, store):
+    # 스캔처럼 매 회차 현재가 일괄 갱신 후 조회 (자정 직후 / 낮 / 다음날 / 며칠 뒤)
+    for step in (0, HOUR, 23 * HOUR - 60, 60, 30 * 60, 2 * 24 * HOUR + 5):
+        clock.advance(step)
+        now_ms = int(clock.now * 1000)
+        store.refresh_forming(exchange.markets, now_ms)
+        for market in exchange.markets:
+            assert_direct_fetch(exchange, store, market, 30, now_ms)
+            assert_direct_fetch(exchange, store, market, 100, now_ms)
+
+def test_closed_bars_load_once_per_day(clock, exchange, store):
+    market = exchange.markets[0]
+    for step in (0, HOUR, HOUR, HOUR):
+        clock.advance(step)
+        now_ms = int(clock.now * 1000)
+        store.refresh_forming([market], now_ms)
+        store.get_arrays(market, 100, now_ms)
+    assert exchange.requests['day'] == 1
+
+    clock.advance(24 * HOUR)
+    now_ms = int(clock.now * 1000)
+    store.refresh_forming([market], now_ms)
+    assert_direct_fetch(exchange, store, market, 100, now_ms)
+    assert exchange.requests['day'] == 3  # 새 날짜 마감 봉 1회 + 비교용 직접 조회 1회
+
+def test_stale_forming_bar_falls_back_to_single_request(clock, exchange, store):
+    market = exchange.markets[1]
+    now_ms = int(clock.now * 1000)
+    store.get_arrays(market, 30, now_ms)
+    clock.advance(FORMING_MAX_AGE + 300)  # 현재가 일괄 갱신 없이 진행 중인 봉이 오래됨
+    now_ms = int(clock.now * 1000)
+    requests = exchange.requests['day']
+    ts, ohlcv = store.get_arrays(market, 30, now_ms)
+    assert exchange.requests['day'] == requests + 1
+    expected_ts, expected = candles_to_arrays(exchange.candles(market, 'day', 30))
+    np.testing.assert_array_equal(ts, expected_ts)
+    np.testing.assert_array_equal(ohlcv, expected)
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""스트리밍 지표 엔진 = ta 라이브러리 전체 재계산 (일봉 50~100개, 횡보, 진행 중인 봉 변경)"""
+
+import numpy as np
+import pytest
+import ta
+
+from upbit_candles import arrays_to_frame
+from upbit_indicators import IndicatorEngine, IndicatorState
+from upbit_monitor_enhanced import calculate_indicators_ta
+
+DAY_MS = 24 * 60 * 60 * 1000
+LABELS = ('rsi_signal', 'macd_signal', 'bb_signal', 'ma_signal', 'volume_signal')
+
+def synthetic_daily(rng, n, flat=False):
+    """합성 일봉 (ts, ohlcv N×6)"""
+    ts = 1_700_000_000_000 // DAY_MS * DAY_MS + np.arange(n, dtype=np.int64) * DAY_MS
+    close = np.full(n, 1234.0) if flat else 100 * np.exp(np.cumsum(rng.normal(0, 0.04, n)))
+    open_ = np.r_[close[0], close[:-1]]
+    volume = rng.lognormal(10, 0.7, n)
+    return ts, np.stack([open_, np.maximum(open_, close), np.minimum(open_, close), close, volume, volume * close], axis=1)
+
+def assert_same_indicators(engine, market, ts, ohlcv):
+    actual = engine.indicators(market, ts, ohlcv)
+    expected = calculate_indicators_ta(arrays_to_frame(ts, ohlcv))
+    for name in LABELS:
+        assert actual[name] == expected[name], name
+    assert actual['rsi'] == pytest.approx(expected['rsi'], rel=1e-12, nan_ok=True)
+    assert actual['volume_percent'] == pytest.approx(expected['volume_percent'], rel=1e-12)
+    assert actual['current_price'] == expected['current_price']
+
+def test_engine_matches_ta():
+    rng = np.random.default_rng(7)
+    engine = IndicatorEngine()
+    for i in range(300):
+        ts, ohlcv = synthetic_daily(rng, int(rng.integers(50, 101)), flat=i % 50 == 0)
+        assert_same_indicators(engine, f"KRW-I{i}", ts, ohlcv)
+
+def test_forming_bar_updates_reuse_state():
+    """같은 마감 봉 구간에서 진행 중인 봉만 바뀌면 상태를 재사용해도 ta와 같음"""
+    rng = np.random.default_rng(8)
+    engine = IndicatorEngine()
+    ts, ohlcv = synthetic_daily(rng, 100)
+    for _ in range(20):
+        forming = ohlcv.copy()
+        forming[-1, 3] *= np.exp(rng.normal(0, 0.08))
+        forming[-1, 4] *= rng.uniform(0.1, 3)
+        assert_same_indicators(engine, 'KRW-F', ts, forming)
+    assert len(engine.states) == 1
+
+def test_state_values_match_ta_series():
+    rng = np.random.default_rng(9)
+    _, ohlcv = synthetic_daily(rng, 100)
+    close = arrays_to_frame(np.arange(100, dtype=np.int64) * DAY_MS, ohlcv)['close']
+    macd = ta.trend.MACD(close)
+    bollinger = ta.volatility.BollingerBands(close)
+    expected = {
+        'rsi': ta.momentum.RSIIndicator(close, window=14).rsi().to_numpy(),
+        'macd': macd.macd().to_numpy(),
+        'macd_signal_line': macd.macd_signal().to_numpy(),
+        'bb_high': bollinger.bollinger_hband().to_numpy(),
+        'bb_low': bollinger.bollinger_lband().to_numpy(),
+        'ma5': close.rolling(5).mean().to_numpy(),
+        'ma20': close.rolling(20).mean().to_numpy(),
+    }
+    state = IndicatorState()
+    for row, (price, volume) in enumerate(zip(ohlcv[:, 3], ohlcv[:, 4])):
+        values = state.push(float(price), float(volume))
+        for name, series in expected.items():
+            if np.isnan(series[row]):
+                continue  # ta가 아직 정의하지 않은 앞부분
+            assert values[name] == pytest.approx(series[row], rel=1e-12, abs=1e-9), (name, row)
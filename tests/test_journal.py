@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""신호 저널 보관 기간 (flush 때 오래된 행 삭제, 0이면 전부 보관)"""
+
+import sqlite3
+from contextlib import closing
+
+import upbit_journal
+from upbit_journal import SignalJournal
+
+DAY = 24 * 3600
+
+def times(journal):
+    with closing(journal.connect()) as conn:
+        return [row[0] for row in conn.execute(f"SELECT time FROM {journal.table} ORDER BY id")]
+
+def test_flush_prunes_rows_older_than_keep_days(monkeypatch, clock, tmp_path):
+    monkeypatch.setattr(upbit_journal, 'time', clock)
+    journal = SignalJournal(str(tmp_path / 'signals.db'), 'signals', keep_days=2)
+    for _ in range(4):
+        journal.append('KRW-A', {'코인': 'A'})
+        assert journal.flush() == 1
+        clock.advance(DAY)
+    journal.append('KRW-A', {'코인': 'A'})
+    journal.flush()
+    assert times(journal) == [clock.now - 2 * DAY, clock.now - DAY, clock.now]
+
+def test_keep_days_zero_keeps_everything(monkeypatch, clock, tmp_path):
+    monkeypatch.setattr(upbit_journal, 'time', clock)
+    journal = SignalJournal(str(tmp_path / 'signals.db'), 'signals', keep_days=0)
+    for _ in range(5):
+        journal.append('KRW-A', {'코인': 'A'})
+        journal.flush()
+        clock.advance(100 * DAY)
+    assert len(times(journal)) == 5
+
+def test_failed_flush_keeps_old_rows(monkeypatch, clock, tmp_path):
+    """INSERT가 실패하면 삭제도 롤백되고 행은 다음 flush로 넘어감"""
+    monkeypatch.setattr(upbit_journal, 'time', clock)
+    journal = SignalJournal(str(tmp_path / 'signals.db'), 'signals', keep_days=1)
+    journal.append('KRW-A', {'코인': 'A'})
+    journal.flush()
+    clock.advance(10 * DAY)
+    journal.append('KRW-A', {'코인': 'A'})
+    journal.pending.append((clock.now,))  # 열 개수가 맞지 않는 행
+    try:
+        journal.flush()
+    except sqlite3.Error:
+        pass
+    assert len(times(journal)) == 1 and len(journal.pending) == 2
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""알림 지연 = 알림 시각 - 신호를 낸 5분봉 시작 시각 (봉 경계 나머지가 아님)"""
+
+import pytest
+
+import upbit_metrics
+import upbit_fast_detector as fast
+from upbit_alerts import AlertHistory
+from upbit_candles import CandleCache
+from upbit_journal import SHEETS, SignalJournal
+from upbit_metrics import Metrics
+
+def latency(metrics, strategy):
+    return metrics.histograms.get(Metrics.key('alert_latency_seconds', {'strategy': strategy}))
+
+def test_alert_latency_from_bar_time(monkeypatch, clock):
+    metrics = Metrics()
+    monkeypatch.setattr(upbit_metrics, 'time', clock)
+    # 체결이 없어 직전 봉이 비면 마지막 봉은 두 칸 전 → 400초 (now % 300이면 100초)
+    metrics.alert('fast', (clock.now - 400) * 1000)
+    metrics.alert('enhanced')
+    assert latency(metrics, 'fast').sum == pytest.approx(400)
+    assert latency(metrics, 'enhanced') is None
+    assert metrics.counters[Metrics.key('alerts_total', {'strategy': 'enhanced'})] == 1
+
+def test_scan_alert_uses_cached_bar(monkeypatch, tmp_path, clock, exchange):
+    market = exchange.markets[0]
+    cache = CandleCache(fetch=exchange.candles)
+    metrics = Metrics()
+    monkeypatch.setattr(upbit_metrics, 'time', clock)
+    monkeypatch.setattr(fast, 'CANDLE_CACHE', cache)
+    monkeypatch.setattr(fast, 'METRICS', metrics)
+    monkeypatch.setattr(fast, 'ALERTS', AlertHistory(300))
+    monkeypatch.setattr(fast, 'SIGNAL_JOURNAL', SignalJournal(str(tmp_path / 'fast.db'), SHEETS['fast']['table']))
+    monkeypatch.setattr(fast, 'queue_telegram', lambda message: None)
+
+    clock.advance(7 * 60 + 10)
+    ts, ohlcv = cache.get_arrays(market, 'minute5', fast.SURGE_WINDOW)
+    assert cache.last_time(market, 'minute5') == ts[-1]
+    clock.advance(3)
+    surge_data = fast.compute_surge_features(ohlcv)
+    assert fast.handle_fast_signal(market, surge_data, None, result=(7, [], 'CRITICAL')) == 'CRITICAL'
+    assert latency(metrics, 'fast').sum == pytest.approx(clock.now - ts[-1] / 1000)
+    assert cache.last_time('KRW-NONE', 'minute5') is None
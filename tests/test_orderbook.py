@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+호가 링버퍼: 일괄 계산한 변화 지표 = 마켓별 스냅샷 목록으로 직접 계산한 값
+- 링 위치 계산 (저장 수 < window, window > 보관 수, 한 바퀴 넘게 돈 경우), max_age 제외
+- 매수벽 증가 / 매도벽 철수 (체결로 뚫린 벽 제외) / 불균형 변화, depth_pressure 판정
+- 저장 간격 제한, 가득 찼을 때 가장 오래 갱신 안 된 마켓 교체, 스냅샷 저장/복원
+"""
+
+import numpy as np
+import pytest
+
+from upbit_orderbook import (ASK_PRICE, ASK_SIZE, BID_PRICE, BID_SIZE, ORDERBOOK_IMBALANCE_RISE,
+                             OrderbookHistory, depth_pressure)
+
+DEPTH = 5
+
+def make_book(bid_sizes, ask_sizes, bid=100.0, ask=101.0, tick=1.0):
+    """매수가는 bid부터 내려가고 매도가는 ask부터 올라가는 (depth × 4) 호가"""
+    book = np.zeros((len(bid_sizes), 4))
+    book[:, BID_PRICE] = bid - tick * np.arange(len(bid_sizes))
+    book[:, BID_SIZE] = bid_sizes
+    book[:, ASK_PRICE] = ask + tick * np.arange(len(ask_sizes))
+    book[:, ASK_SIZE] = ask_sizes
+    return book
+
+def reference_features(snapshots, window, history, max_age):
+    """마켓 스냅샷 [(시각, 호가)] (오래된 순) → 최근 window개(보관 수 이내) 중 max_age 안 가장 오래된 것 대비 변화"""
+    recent = snapshots[-min(window, history):]
+    latest_time, latest = recent[-1]
+    recent = [(t, book) for t, book in recent if t >= latest_time - max_age]
+    if len(recent) < 2:
+        return None
+    start_time, start = recent[0]
+    start = start.astype(np.float32).astype(np.float64)
+    latest = latest.astype(np.float32).astype(np.float64)
+
+    def imbalance(book):
+        bid, ask = book[:, BID_SIZE].sum(), book[:, ASK_SIZE].sum()
+        return (bid - ask) / (bid + ask) if bid + ask > 0 else 0.0
+
+    start_wall = start[:, BID_SIZE].max()
+    level = start[:, ASK_SIZE].argmax()
+    wall_price, wall_size = start[level, ASK_PRICE], start[level, ASK_SIZE]
+    remaining = latest[latest[:, ASK_PRICE] == wall_price, ASK_SIZE].sum()
+    in_range = latest[0, ASK_PRICE] <= wall_price <= latest[:, ASK_PRICE].max()
+    return {
+        'bid_wall_growth': latest[:, BID_SIZE].max() / start_wall if start_wall > 0 else 0.0,
+        'ask_wall_pull': min(max(1 - remaining / wall_size, 0.0), 1.0) if in_range and wall_size > 0 else 0.0,
+        'imbalance_change': imbalance(latest) - imbalance(start),
+        'depth_snapshots': len(recent),
+        'depth_seconds': latest_time - start_time,
+    }
+
+def assert_features(actual, expected):
+    assert actual.keys() == expected.keys()
+    for name, value in expected.items():
+        assert actual[name] == pytest.approx(value, rel=1e-12, abs=1e-12), name
+
+def test_ring_positions_match_reference():
+    """저장 수가 window보다 적을 때 / window > 보관 수 / 링을 여러 바퀴 돈 뒤 / max_age로 잘린 경우"""
+    rng = np.random.default_rng(23)
+    history = OrderbookHistory(markets=4, history=6, depth=DEPTH, interval=0)
+    markets = ['KRW-A', 'KRW-B', 'KRW-C']
+    snapshots = {market: [] for market in markets}
+    now = 1_000.0
+    for _ in range(300):
+        market = markets[rng.integers(len(markets))]
+        now += float(rng.choice([1, 5, 30, 200]))
+        book = make_book(rng.lognormal(3, 1, DEPTH), rng.lognormal(3, 1, DEPTH),
+                         ask=101.0 + float(rng.integers(-2, 3)))
+        assert history.record(market, book, now * 1000)
+        snapshots[market].append((now, book))
+        for window in (3, 6, 9):
+            for max_age in (50, 600):
+                actual = history.delta_features(markets, window=window, max_age=max_age)
+                for name in markets:
+                    expected = reference_features(snapshots[name], window, 6, max_age) if snapshots[name] else None
+                    if expected is None:
+                        assert name not in actual
+                    else:
+                        assert_features(actual[name], expected)
+
+def test_bid_wall_growth():
+    history = OrderbookHistory(markets=2, history=8, depth=DEPTH, interval=0)
+    history.record('KRW-A', make_book([10, 20, 10, 10, 10], [10] * 5), 1_000)
+    history.record('KRW-A', make_book([10, 50, 10, 10, 10], [10] * 5), 2_000)
+    features = history.delta_features(['KRW-A'])['KRW-A']
+    assert features['bid_wall_growth'] == pytest.approx(2.5)
+    assert features['ask_wall_pull'] == 0
+    assert features['imbalance_change'] == pytest.approx((90 - 50) / 140 - (60 - 50) / 110)
+    assert depth_pressure({'bid_ask_ratio': 1.0, **features}) == "📥 매수벽 증가"
+
+def test_ask_wall_pull_excludes_traded_through_walls():
+    history = OrderbookHistory(markets=2, history=8, depth=DEPTH, interval=0)
+    start = make_book([10] * 5, [10, 10, 80, 10, 10])  # 103원에 매도벽 80
+    history.record('KRW-PULL', start, 1_000)
+    history.record('KRW-TRADED', start, 1_000)
+
+    # 가격대는 그대로인데 벽이 80 → 20으로 빠짐
+    history.record('KRW-PULL', make_book([10] * 5, [10, 10, 20, 10, 10]), 2_000)
+    # 체결로 103원까지 뚫려 최우선 매도가가 104원 → 벽이 빠진 것이 아님
+    history.record('KRW-TRADED', make_book([10] * 5, [10] * 5, bid=103.0, ask=104.0), 2_000)
+
+    features = history.delta_features(['KRW-PULL', 'KRW-TRADED'])
+    assert features['KRW-PULL']['ask_wall_pull'] == pytest.approx(0.75)
+    assert features['KRW-PULL']['imbalance_change'] == pytest.approx((50 - 60) / 110 - (50 - 120) / 170)
+    assert depth_pressure({'bid_ask_ratio': 1.0, **features['KRW-PULL']}) == "🧱 매도벽 철수"
+    assert features['KRW-TRADED']['ask_wall_pull'] == 0
+    assert depth_pressure({'bid_ask_ratio': 1.0, **features['KRW-TRADED']}) is None
+
+def test_depth_pressure_needs_imbalance_rise():
+    base = {'bid_ask_ratio': 1.0, 'bid_wall_growth': 3.0, 'ask_wall_pull': 0.9}
+    assert depth_pressure({**base, 'imbalance_change': ORDERBOOK_IMBALANCE_RISE}) == "📥 매수벽 증가"
+    assert depth_pressure({**base, 'imbalance_change': ORDERBOOK_IMBALANCE_RISE - 0.01}) is None
+    assert depth_pressure({**base, 'imbalance_change': 0.5, 'bid_wall_growth': 1.0}) == "🧱 매도벽 철수"
+    assert depth_pressure({'bid_ask_ratio': 2.0}) is None  # 스냅샷 1개 (변화 지표 없음)
+    assert depth_pressure(None) is None
+
+def test_max_age_cutoff():
+    history = OrderbookHistory(markets=2, history=8, depth=DEPTH, interval=0)
+    history.record('KRW-A', make_book([10] * 5, [10] * 5), 1_000)
+    history.record('KRW-A', make_book([30] * 5, [10] * 5), 700_000)
+    history.record('KRW-A', make_book([60] * 5, [10] * 5), 800_000)
+    # 1초 스냅샷은 max_age(600초) 밖 → 700초 스냅샷과 비교
+    features = history.delta_features(['KRW-A'], max_age=600)['KRW-A']
+    assert features['depth_snapshots'] == 2
+    assert features['depth_seconds'] == 100
+    assert features['bid_wall_growth'] == pytest.approx(2.0)
+    # 최신 스냅샷만 남으면 지표 없음
+    assert history.delta_features(['KRW-A'], max_age=50) == {}
+
+def test_record_interval_throttle():
+    history = OrderbookHistory(markets=2, history=8, depth=DEPTH, interval=1.0)
+    book = make_book([10] * 5, [10] * 5)
+    assert history.record('KRW-A', book, 10_000)
+    assert not history.record('KRW-A', book, 10_500)
+    assert history.record('KRW-A', book, 11_000)
+    assert history.record('KRW-B', book, 11_000)  # 간격은 마켓별
+    assert not history.record('KRW-A', {'market': 'KRW-A'}, 20_000)  # 호가 없는 원본은 저장 안 함
+    assert history.count[history.index['KRW-A']] == 2
+
+def test_full_buffer_evicts_least_recently_updated():
+    history = OrderbookHistory(markets=2, history=8, depth=DEPTH, interval=0)
+    book = make_book([10] * 5, [10] * 5)
+    history.record('KRW-A', book, 1_000)
+    history.record('KRW-B', book, 2_000)
+    history.record('KRW-A', book, 3_000)
+    history.record('KRW-C', book, 4_000)
+    # B가 가장 오래 갱신 안 됨 → B 행을 비워 C에 줌 (B의 스냅샷은 섞이지 않음)
+    assert set(history.index) == {'KRW-A', 'KRW-C'}
+    assert history.count[history.index['KRW-C']] == 1
+    assert history.delta_features(['KRW-B', 'KRW-C']) == {}
+    assert history.delta_features(['KRW-A'])['KRW-A']['depth_snapshots'] == 2
+
+def test_state_round_trip_trims_to_config():
+    rng = np.random.default_rng(230)
+    records = [(market, make_book(rng.lognormal(3, 1, DEPTH), rng.lognormal(3, 1, DEPTH)), (i + 1) * 10_000)
+               for i, market in enumerate(['KRW-A', 'KRW-B'] * 10)]
+    source = OrderbookHistory(markets=4, history=8, depth=DEPTH, interval=0)
+    for record in records:
+        source.record(*record)
+
+    # 같은 설정 / 보관 수·깊이가 작은 설정: 같은 기록을 직접 쌓은 것과 같음
+    for history, depth in ((8, DEPTH), (3, 3)):
+        restored = OrderbookHistory(markets=4, history=history, depth=depth, interval=0)
+        restored.import_state(*source.export_state())
+        direct = OrderbookHistory(markets=4, history=history, depth=depth, interval=0)
+        for record in records:
+            direct.record(*record)
+        actual = restored.delta_features(['KRW-A', 'KRW-B'], window=8)
+        expected = direct.delta_features(['KRW-A', 'KRW-B'], window=8)
+        assert actual.keys() == expected.keys() == {'KRW-A', 'KRW-B'}
+        for market in expected:
+            assert_features(actual[market], expected[market])
+
+    # 이미 기록한 마켓은 스냅샷으로 덮어쓰지 않음
+    live = OrderbookHistory(markets=4, history=8, depth=DEPTH, interval=0)
+    live.record('KRW-A', make_book([1] * 5, [1] * 5), 500_000)
+    live.import_state(*source.export_state())
+    assert live.count[live.index['KRW-A']] == 1
+    assert live.count[live.index['KRW-B']] == 8
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""토큰 버킷 (가짜 시계): 429 감속/지수 대기, Remaining-Req 보정, 성공 응답마다 복구 + 제한 응답 집계"""
+
+import pytest
+
+import upbit_api
+import upbit_ratelimit
+from upbit_metrics import Metrics
+from upbit_ratelimit import API_RATE_MIN, API_RATE_RECOVERY, RateLimiter, TokenBucket
+
+@pytest.fixture
+def bucket(monkeypatch, clock):
+    monkeypatch.setattr(upbit_ratelimit, 'time', clock)
+    return TokenBucket(rate=8, burst=1)
+
+def test_steady_rate(clock, bucket):
+    assert bucket.acquire() == 0
+    assert [bucket.acquire() for _ in range(3)] == pytest.approx([1 / 8] * 3)
+    clock.advance(10)  # 쉬는 동안 burst개까지만 충전
+    assert bucket.acquire() == 0
+    assert bucket.reserve() == pytest.approx(1 / 8)
+
+def test_penalize_halves_rate_and_backs_off(clock, bucket):
+    bucket.acquire()
+    assert bucket.penalize(0) == 0.5
+    assert bucket.rate == 4
+    # 대기 0.5초 + 빚 1개를 줄어든 속도로 갚는 시간
+    assert bucket.acquire() == pytest.approx(0.5 + 1 / 4)
+    assert [bucket.penalize(attempt) for attempt in (1, 2, 3, 10)] == [1.0, 2.0, 4.0, upbit_ratelimit.API_BACKOFF_MAX]
+    assert bucket.rate == API_RATE_MIN
+
+def test_observe_remaining(clock, bucket):
+    clock.advance(5)
+    bucket.observe(0)  # 이번 1초 남은 요청 0 → 1초 대기
+    assert bucket.reserve() == pytest.approx(1 + 1 / 8)
+    clock.advance(5)
+    bucket.observe(None)  # 헤더 없음 → 보정 없음
+    assert bucket.reserve() == 0
+
+def test_recovers_after_throttle(clock, bucket):
+    bucket.penalize(0)
+    bucket.penalize(1)
+    assert bucket.rate == 2
+    for _ in range(30):
+        clock.advance(1)
+        bucket.observe(5)
+    assert bucket.rate == pytest.approx(2 + 30 * API_RATE_RECOVERY)
+    for _ in range(100):
+        bucket.observe(5)
+    assert bucket.rate == 8  # 원래 속도 이상으로는 올라가지 않음
+
+class Response:
+    def __init__(self, status_code, body=None):
+        self.status_code = status_code
+        self.body = body
+        self.headers = {'Remaining-Req': 'group=candles; min=1799; sec=8'}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise upbit_api.requests.HTTPError(str(self.status_code))
+
+    def json(self):
+        return self.body
+
+class Session:
+    """정해진 순서대로 응답하는 가짜 세션"""
+
+    def __init__(self, statuses):
+        self.statuses = list(statuses)
+
+    def get(self, url, params=None, timeout=None):
+        status = self.statuses.pop(0)
+        return Response(status, [] if status == 200 else None)
+
+def api_counts(metrics):
+    key = lambda name, **labels: Metrics.key(name, {'endpoint': 'candles', **labels})
+    return (metrics.counters.get(key('api_requests_total'), 0), metrics.counters.get(key('api_errors_total'), 0),
+            metrics.counters.get(key('api_throttled_total', status=429), 0))
+
+@pytest.fixture
+def api(monkeypatch, clock):
+    monkeypatch.setattr(upbit_ratelimit, 'time', clock)
+    metrics = Metrics()
+    monkeypatch.setattr(upbit_api, 'METRICS', metrics)
+    monkeypatch.setattr(upbit_api, 'RATE_LIMITER', RateLimiter(8))
+    return metrics
+
+def test_throttled_then_ok_is_not_an_error(monkeypatch, clock, api):
+    monkeypatch.setattr(upbit_api, 'SESSION', Session([429, 429, 200]))
+    started = clock.now
+    assert upbit_api.get_json('candles/minutes/5', {}) == []
+    assert api_counts(api) == (3, 0, 2)
+    # 재시도마다 지수 대기 + 쌓인 빚을 줄어든 속도로 갚는 시간
+    assert clock.now - started == pytest.approx((0.5 + 1 / 4) + (1.0 + 2 / 2))
+
+def test_throttled_past_retries_is_an_error(monkeypatch, clock, api):
+    monkeypatch.setattr(upbit_api, 'SESSION', Session([429] * (upbit_api.API_THROTTLE_RETRIES + 1)))
+    with pytest.raises(upbit_api.requests.HTTPError):
+        upbit_api.get_json('candles/minutes/5', {})
+    assert api_counts(api) == (upbit_api.API_THROTTLE_RETRIES + 1, 1, upbit_api.API_THROTTLE_RETRIES)
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+5분봉 롤업 = 같은 구간의 15분봉/1시간봉 (fixtures/candles_KRW-BTC.json)
+픽스처: 실제 녹화가 아닌 합성 시세를 업비트 캔들 API 응답 형식(최신순)으로 만든 것
+- 15분봉/1시간봉도 같은 합성 체결에서 만들었으므로 업비트의 실제 집계 방식까지 검증하지는 않음
+  (형식, 구간 경계, 잘린 첫 구간, 빠진 봉 처리만 확인)
+- 5분봉은 00:10부터라 첫 15분/1시간 구간이 잘려 있고, 체결이 없는 봉(02:25, 02:30, 03:55)이 빠져 있음
+실제 녹화로 교체: python tests/test_rollup.py KRW-BTC 2025-03-03T06:00:00 (API 접근 필요)
+"""
+
+import json
+import os
+import sys
+
+import numpy as np
+import pytest
+
+from upbit_candles import candles_to_arrays
+from upbit_rollup import rollup
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'candles_KRW-BTC.json')
+
+@pytest.fixture(scope='module')
+def recorded():
+    with open(FIXTURE, encoding='utf-8') as f:
+        return {interval: candles_to_arrays(candles) for interval, candles in json.load(f).items()}
+
+@pytest.mark.parametrize('interval', ['minute15', 'minute60'])
+def test_rollup_matches_fixture_bars(recorded, interval):
+    ts_5m, ohlcv_5m = recorded['minute5']
+    upbit_ts, upbit = recorded[interval]
+
+    ts, ohlcv = rollup(ts_5m, ohlcv_5m, interval)
+    # 앞부분이 잘린 첫 구간은 버리고 그다음 구간부터 픽스처 봉과 같음
+    assert ts[0] > ts_5m[0]
+    expected = upbit_ts >= ts[0]
+    np.testing.assert_array_equal(ts, upbit_ts[expected])
+    np.testing.assert_array_equal(ohlcv[:, :4], upbit[expected, :4])
+    np.testing.assert_allclose(ohlcv[:, 4:], upbit[expected, 4:], rtol=1e-12)
+
+@pytest.mark.parametrize('interval', ['minute15', 'minute60'])
+def test_partial_leading_bucket(recorded, interval):
+    ts_5m, ohlcv_5m = recorded['minute5']
+    upbit_ts, upbit = recorded[interval]
+
+    ts, ohlcv = rollup(ts_5m, ohlcv_5m, interval, drop_partial=False)
+    kept, _ = rollup(ts_5m, ohlcv_5m, interval)
+    assert len(ts) == len(kept) + 1
+    # 잘린 첫 구간은 픽스처 봉과 시각만 같고 거래량은 모자람
+    assert ts[0] == upbit_ts[0] < ts_5m[0]
+    assert ohlcv[0, 4] < upbit[0, 4]
+
+def test_aligned_start_keeps_first_bucket(recorded):
+    ts_5m, ohlcv_5m = recorded['minute5']
+    aligned = np.flatnonzero(ts_5m % (15 * 60 * 1000) == 0)[0]
+    ts, _ = rollup(ts_5m[aligned:], ohlcv_5m[aligned:], 'minute15')
+    assert ts[0] == ts_5m[aligned]
+
+def test_empty_input():
+    ts, ohlcv = rollup(np.zeros(0, dtype=np.int64), np.zeros((0, 6)), 'minute15')
+    assert len(ts) == 0 and ohlcv.shape == (0, 6)
+
+def record(market, to):
+    """업비트에서 to 직전 6시간의 15분봉/1시간봉과 첫 10분을 뺀 5분봉을 받아 픽스처로 저장"""
+    from datetime import datetime, timedelta
+    from upbit_api import fetch_candles
+    minute60 = fetch_candles(market, 'minute60', 6, to)
+    start = datetime.fromisoformat(minute60[-1]['candle_date_time_utc']) + timedelta(minutes=10)
+    fixture = {'minute5': [c for c in fetch_candles(market, 'minute5', 72, to)
+                           if datetime.fromisoformat(c['candle_date_time_utc']) >= start],
+               'minute15': fetch_candles(market, 'minute15', 24, to),
+               'minute60': minute60}
+    with open(FIXTURE, 'w', encoding='utf-8') as f:
+        json.dump(fixture, f, indent=1)
+
+if __name__ == '__main__':
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    record(sys.argv[1], sys.argv[2])
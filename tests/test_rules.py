@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+"""
+선언형 규칙 평가기 = 기존 if/elif 점수 함수 (점수, 신호 문구/순서, 레벨)
+- 기준값 경계(같음/바로 위아래), NaN, 체결강도 유무, 호가 없음/호가 변화 없음, None 행을 섞은 무작위 지표
+- 여러 코인을 score_rows 한 번에 넣어 코인 축 벡터 평가까지 비교, 코인 1개용 score_row도 같은 결과
+- 문구에 조건에 없는 지표를 쓰는 규칙은 컴파일할 때 거부
+"""
+
+import numpy as np
+import pytest
+
+from upbit_fast_detector import FAST_SCORER, fast_features
+from upbit_monitor_enhanced import ENHANCED_SCORER, signal_features
+from upbit_orderbook import (ORDERBOOK_IMBALANCE_RISE, ORDERBOOK_WALL_GROWTH, ORDERBOOK_WALL_PULL,
+                             depth_pressure)
+from upbit_rules import RuleSet
+from upbit_trades import TRADE_INTENSITY_THRESHOLD
+
+def reference_fast_signal(surge_data, orderbook_data):
+    """기존 evaluate_fast_signal (if/elif) - 비교용으로 고정"""
+    score = 0
+    signals = []
+    alert_level = "NORMAL"
+    if not surge_data:
+        return 0, [], "NONE"
+    if surge_data['volume_ratio'] >= 3.0:
+        score += 3
+        signals.append("🔥🔥 거래량 3배 폭발")
+        alert_level = "CRITICAL"
+    elif surge_data['volume_ratio'] >= 2.0:
+        score += 2
+        signals.append("🔥 거래량 2배 급증")
+        alert_level = "HIGH"
+    elif surge_data['volume_ratio'] >= 1.5:
+        score += 1
+        signals.append("⚡ 거래량 1.5배 증가")
+    if surge_data['price_change_5m'] >= 5:
+        score += 3
+        signals.append("🚀🚀 5분 5% 급등")
+        alert_level = "CRITICAL"
+    elif surge_data['price_change_5m'] >= 3:
+        score += 2
+        signals.append("🚀 5분 3% 상승")
+        if alert_level == "NORMAL":
+            alert_level = "HIGH"
+    elif surge_data['price_change_5m'] >= 2:
+        score += 1
+        signals.append("📈 5분 2% 상승")
+    if surge_data['consecutive_green'] >= 4:
+        score += 2
+        signals.append("✅ 4연속 양봉")
+    elif surge_data['consecutive_green'] >= 3:
+        score += 1
+        signals.append("✅ 3연속 양봉")
+    if surge_data['volume_acceleration'] >= 2.0:
+        score += 1
+        signals.append("⚡ 거래량 가속")
+    if surge_data['buying_pressure'] >= 0.8:
+        score += 1
+        signals.append("💪 강한 매수세")
+    elif surge_data.get('trade_intensity', 0) >= TRADE_INTENSITY_THRESHOLD:
+        score += 1
+        signals.append(f"💪 체결강도 {surge_data['trade_intensity']:.0f}%")
+    if surge_data['breaking_high']:
+        score += 1
+        signals.append("🎯 20봉 고점 돌파")
+    if orderbook_data:
+        depth_signal = depth_pressure(orderbook_data)
+        if orderbook_data['bid_ask_ratio'] >= 1.8:
+            score += 1
+            signals.append("💰 호가창 매수벽")
+        elif depth_signal:
+            score += 1
+            signals.append(depth_signal)
+    return score, signals, alert_level
+
+def reference_signal_strength(volume_data, indicators, orderbook_data, short_term_data):
+    """기존 calculate_signal_strength (if/elif) - 비교용으로 고정"""
+    score = 0
+    signals = []
+    signal_type = "NORMAL"
+    if short_term_data:
+        if short_term_data['volume_5m_ratio'] >= 2.0:
+            score += 2
+            signals.append("🔥 5분봉 거래량 폭발")
+            signal_type = "EARLY"
+        elif short_term_data['volume_5m_ratio'] >= 1.5:
+            score += 1
+            signals.append("⚡ 5분봉 거래량 증가")
+        if short_term_data['consecutive_increase'] >= 3:
+            score += 2
+            signals.append("🔥 연속 거래량 증가")
+            signal_type = "EARLY"
+        if short_term_data['price_change_5m'] > 5:
+            score += 2
+            signals.append("🚀 5분봉 급등 중")
+            signal_type = "EARLY"
+        elif short_term_data['price_change_5m'] > 3:
+            score += 1
+            signals.append("📈 5분봉 상승 중")
+        if short_term_data['volume_15m_ratio'] >= 2.0:
+            score += 1
+            signals.append("✅ 15분봉 거래량 돌파")
+        if short_term_data['bullish_ratio'] >= 0.7:
+            score += 1
+            signals.append("✅ 매수세 강함")
+        elif short_term_data.get('trade_intensity', 0) >= TRADE_INTENSITY_THRESHOLD:
+            score += 1
+            signals.append(f"✅ 체결강도 {short_term_data['trade_intensity']:.0f}%")
+    if volume_data:
+        if volume_data['volume_ratio'] >= 2.0:
+            score += 1
+            signals.append("✅ 일봉 거래량 MA 돌파")
+        if volume_data['accumulation_index'] > 20 and volume_data['price_change_7d'] < 5:
+            score += 1
+            signals.append("✅ 축적 패턴")
+        if volume_data['divergence'] > 10:
+            score += 1
+            signals.append("✅ 고괴리")
+    if orderbook_data:
+        depth_signal = depth_pressure(orderbook_data)
+        if orderbook_data['bid_ask_ratio'] > 1.5:
+            score += 1
+            signals.append("✅ 매수벽 우세")
+        elif depth_signal:
+            score += 1
+            signals.append(f"✅ {depth_signal}")
+    if indicators:
+        if indicators['rsi'] < 30:
+            score += 1
+            signals.append("✅ RSI 과매도")
+        if indicators['macd_signal'] == "골든크로스":
+            score += 1
+            signals.append("✅ MACD 골든크로스")
+        if indicators['bb_signal'] == "하단터치":
+            score += 1
+            signals.append("✅ 볼린저 하단")
+        if indicators['ma_signal'] == "상향돌파":
+            score += 1
+            signals.append("✅ MA 상향돌파")
+    return score, signals, signal_type
+
+def near(rng, *thresholds, low=0.0, high=None):
+    """기준값 경계(같음/바로 위아래) 또는 구간 안 무작위 값"""
+    threshold = float(rng.choice(thresholds))
+    pick = rng.integers(5)
+    if pick == 0:
+        return threshold
+    if pick in (1, 2):
+        return float(np.nextafter(threshold, np.inf if pick == 1 else -np.inf))
+    return float(rng.uniform(low, high if high is not None else 2 * max(thresholds)))
+
+def maybe(rng, data, none_rate=0.15):
+    """일부는 None / 빈 dict (지표 없음)"""
+    roll = rng.random()
+    if roll < none_rate:
+        return None
+    if roll < none_rate + 0.03:
+        return {}
+    return data
+
+def random_orderbook(rng):
+    """호가 분석 결과 (일부는 호가 변화 없음)"""
+    if rng.random() < 0.3:
+        return None
+    data = {'bid_ask_ratio': near(rng, 1.5, 1.8), 'imbalance': float(rng.uniform(-1, 1))}
+    if rng.random() < 0.7:
+        data.update({
+            'imbalance_change': near(rng, ORDERBOOK_IMBALANCE_RISE, low=-0.3),
+            'bid_wall_growth': near(rng, ORDERBOOK_WALL_GROWTH),
+            'ask_wall_pull': near(rng, ORDERBOOK_WALL_PULL),
+        })
+    return data
+
+def with_intensity(rng, data):
+    if data and rng.random() < 0.5:
+        data['trade_intensity'] = near(rng, TRADE_INTENSITY_THRESHOLD, low=50)
+    return data
+
+def random_surge(rng):
+    return with_intensity(rng, maybe(rng, {
+        'volume_ratio': near(rng, 1.5, 2.0, 3.0),
+        'price_change_5m': near(rng, 2, 3, 5, low=-5),
+        'consecutive_green': int(rng.integers(0, 6)),
+        'volume_acceleration': near(rng, 2.0),
+        'buying_pressure': float(rng.choice([0.0, 0.2, 0.4, 0.6, 0.8, 1.0])),
+        'breaking_high': rng.choice([True, False, np.True_, np.False_]),
+        'current_price': float(rng.uniform(1, 1000)),
+    }))
+
+def random_enhanced(rng):
+    short_term = with_intensity(rng, maybe(rng, {
+        'volume_5m_ratio': near(rng, 1.5, 2.0),
+        'volume_15m_ratio': near(rng, 2.0),
+        'price_change_5m': near(rng, 3, 5, low=-5),
+        'consecutive_increase': int(rng.integers(0, 5)),
+        'bullish_ratio': near(rng, 0.7, high=1.0),
+        'current_price': float(rng.uniform(1, 1000)),
+    }))
+    volume = maybe(rng, {
+        'volume_ratio': near(rng, 2.0),
+        'accumulation_index': near(rng, 20, low=-20),
+        'price_change_7d': near(rng, 5, low=-10),
+        'divergence': near(rng, 10, low=-20),
+        'current_price': float(rng.uniform(1, 1000)),
+    })
+    indicators = maybe(rng, {
+        'rsi': float('nan') if rng.random() < 0.05 else near(rng, 30, high=100),
+        'macd_signal': str(rng.choice(["골든크로스", "데드크로스", "중립"])),
+        'bb_signal': str(rng.choice(["하단터치", "상단터치", "중립"])),
+        'ma_signal': str(rng.choice(["상향돌파", "하향돌파", "중립"])),
+        'current_price': float(rng.uniform(1, 1000)),
+    })
+    return volume, indicators, random_orderbook(rng), short_term
+
+def test_fast_rules_match_if_elif():
+    rng = np.random.default_rng(25)
+    cases = [(random_surge(rng), random_orderbook(rng)) for _ in range(10000)]
+    rows = [fast_features(*case) for case in cases]
+    for case, row, result in zip(cases, rows, FAST_SCORER.score_rows(rows)):
+        expected = reference_fast_signal(*case)
+        assert result == expected, case
+        assert FAST_SCORER.score_row(row) == expected, case
+
+def test_enhanced_rules_match_if_elif():
+    rng = np.random.default_rng(26)
+    cases = [random_enhanced(rng) for _ in range(10000)]
+    rows = [signal_features(*case) for case in cases]
+    for case, row, result in zip(cases, rows, ENHANCED_SCORER.score_rows(rows)):
+        expected = reference_signal_strength(*case)
+        assert result == expected, case
+        assert ENHANCED_SCORER.score_row(row) == expected, case
+    assert sum(case == (None, None, None, None) for case in cases) > 0
+
+def test_label_fields_must_be_condition_features():
+    with pytest.raises(ValueError, match="trade_intensity"):
+        RuleSet([[{'when': [('volume_ratio', '>=', 2.0)], 'label': "체결강도 {trade_intensity:.0f}%"}]])
+    scorer = RuleSet([[{'when': [('trade_intensity', '>=', 150)], 'label': "체결강도 {trade_intensity:.0f}%"}]])
+    assert scorer.score_row({'trade_intensity': 180}) == scorer.score_rows([{'trade_intensity': 180}])[0] \
+        == (1, ["체결강도 180%"], "NORMAL")
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""데몬 스케줄러: 벽시계 배수 시각 실행, 경계에서 끝난 스캔, 놓친 회차 건너뛰기"""
+
+import pytest
+
+import upbit_scheduler
+from upbit_scheduler import next_run_time, run_forever
+from conftest import FakeClock
+
+INTERVAL = 60
+OFFSET = 5
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock(1_000_000 * INTERVAL + 17.0)  # 배수 시각 + 17초에 시작
+    monkeypatch.setattr(upbit_scheduler, 'time', clock)
+    return clock
+
+def run_cycles(clock, durations):
+    """회차별 스캔 소요 시간대로 실행 → 회차별 시작 시각"""
+    starts = []
+    pending = list(durations)
+
+    def scan():
+        starts.append(clock.now)
+        clock.advance(pending.pop(0))
+
+    run_forever(scan, INTERVAL, OFFSET, max_cycles=len(durations))
+    return starts
+
+def test_runs_on_wall_clock_slots(clock):
+    first = clock.now
+    starts = run_cycles(clock, [3, 10, 0.5])
+    base = next_run_time(first, INTERVAL, OFFSET)
+    assert starts == [first, base, base + INTERVAL]
+
+def test_scan_ending_exactly_on_boundary_does_not_skip(clock, capsys):
+    first = clock.now
+    slot = next_run_time(first, INTERVAL, OFFSET)
+    # 첫 스캔이 다음 회차 시각에 정확히 끝나고, 그다음도 한 주기를 꽉 채움
+    starts = run_cycles(clock, [slot - first, INTERVAL, 1])
+    assert starts == [first, slot, slot + INTERVAL]
+    assert '건너뜀' not in capsys.readouterr().out
+
+def test_long_scan_skips_missed_slots(clock, capsys):
+    first = clock.now
+    slot = next_run_time(first, INTERVAL, OFFSET)
+    # 두 번째 회차가 2.5주기 걸림 → 2회차 건너뛰고 그다음 시각
+    starts = run_cycles(clock, [1, 2.5 * INTERVAL, 1])
+    assert starts == [first, slot, slot + 3 * INTERVAL]
+    assert '2회차 건너뜀' in capsys.readouterr().out
+
+def test_scan_error_keeps_schedule(clock):
+    first = clock.now
+    starts = []
+
+    def scan():
+        starts.append(clock.now)
+        clock.advance(2)
+        raise RuntimeError("boom")
+
+    run_forever(scan, INTERVAL, OFFSET, max_cycles=3)
+    slot = next_run_time(first, INTERVAL, OFFSET)
+    assert starts == [first, slot, slot + INTERVAL]
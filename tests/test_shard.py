@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""샤드 배정 (rendezvous 해시) + 샤드 저널 증분 병합 (새 행만 읽기, 샤드 간 중복 제거, 샤드 저널 재생성)"""
+
+import json
+from contextlib import closing
+
+import pytest
+
+import upbit_journal
+import upbit_shard
+from upbit_journal import SignalJournal
+from upbit_shard import merge_journals, shard_markets, shard_of
+
+MARKETS = [f"KRW-C{i:03d}" for i in range(400)]
+TABLE = 'signals'
+
+@pytest.mark.parametrize('count', [2, 3, 4, 8])
+def test_shards_balanced_and_stable_when_growing(count):
+    sizes = [len(shard_markets(MARKETS, index, count)) for index in range(count)]
+    assert sum(sizes) == len(MARKETS)
+    assert max(sizes) < 1.35 * len(MARKETS) / count
+
+    # 샤드를 하나 늘리면 옮겨 가는 마켓은 전부 새 샤드로, 약 1/(count+1)만
+    moved = [market for market in MARKETS if shard_of(market, count) != shard_of(market, count + 1)]
+    assert all(shard_of(market, count + 1) == count for market in moved)
+    assert len(moved) < 1.5 * len(MARKETS) / (count + 1)
+
+def test_single_shard_keeps_everything():
+    assert shard_markets(MARKETS, 0, 1) == MARKETS
+    assert {shard_of(market, 1) for market in MARKETS} == {0}
+
+def write(journal, rows):
+    """(시각, 마켓) 목록을 저널에 기록"""
+    with closing(journal.connect()) as conn, conn:
+        conn.executemany(f"INSERT INTO {TABLE} (time, market, row) VALUES (?, ?, ?)",
+                         [(time_, market, json.dumps({'코인': market})) for time_, market in rows])
+
+def merged_rows(journal):
+    with closing(journal.connect()) as conn:
+        return conn.execute(f"SELECT time, market FROM {TABLE} ORDER BY time, market").fetchall()
+
+@pytest.fixture
+def shards(tmp_path, monkeypatch, clock):
+    monkeypatch.setattr(upbit_journal, 'time', clock)
+    paths = [str(tmp_path / f"signals.shard{index}.db") for index in range(2)]
+    journal = SignalJournal(str(tmp_path / 'signals.db'), TABLE)
+    return paths, [SignalJournal(path, TABLE) for path in paths], journal
+
+def test_merge_reads_only_new_rows(monkeypatch, clock, shards):
+    paths, (shard0, shard1), journal = shards
+    now = clock.now
+    write(shard0, [(now, 'KRW-A'), (now + 120, 'KRW-B')])
+    write(shard1, [(now + 10, 'KRW-C'), (now + 30, 'KRW-A')])  # KRW-A: 다른 샤드가 60초 안에 또 기록 → 중복
+    assert merge_journals(paths, journal) == 3
+
+    read = []
+    original = upbit_shard.read_journal
+
+    def counting_read(*args):
+        rows = original(*args)
+        read.extend(rows)
+        return rows
+    monkeypatch.setattr(upbit_shard, 'read_journal', counting_read)
+    assert merge_journals(paths, journal) == 0
+    assert read == []
+
+    write(shard0, [(now + 240, 'KRW-C')])
+    write(shard1, [(now + 250, 'KRW-C'), (now + 400, 'KRW-D')])  # KRW-C: 이전 병합분과도 중복 비교
+    assert merge_journals(paths, journal) == 2
+    assert len(read) == 3
+    assert merged_rows(journal) == [(now, 'KRW-A'), (now + 10, 'KRW-C'), (now + 120, 'KRW-B'),
+                                    (now + 240, 'KRW-C'), (now + 400, 'KRW-D')]
+    assert journal.unexported == 5
+
+def test_incremental_merge_matches_full_merge(tmp_path, clock, shards):
+    paths, shard_journals, journal = shards
+    full = SignalJournal(str(tmp_path / 'full.db'), TABLE)
+    for step in range(6):
+        for index, shard in enumerate(shard_journals):
+            write(shard, [(clock.now + step * 120 + index * 20 + k * 45, f"KRW-{(step + k) % 4}") for k in range(3)])
+        merge_journals(paths, journal)
+    merge_journals(paths, full)
+    assert merged_rows(journal) == merged_rows(full)
+
+def test_recreated_shard_journal_is_merged(tmp_path, clock, shards):
+    paths, (shard0, _), journal = shards
+    write(shard0, [(clock.now + i, f"KRW-{i}") for i in range(5)])
+    assert merge_journals(paths[:1], journal) == 5
+
+    # 캐시 유실로 샤드 저널이 새로 만들어지면 행 번호가 다시 1부터
+    (tmp_path / 'signals.shard0.db').unlink()
+    clock.advance(600)
+    write(SignalJournal(paths[0], TABLE), [(clock.now, 'KRW-NEW')])
+    assert merge_journals(paths[:1], journal) == 1
+    assert merged_rows(journal)[-1] == (clock.now, 'KRW-NEW')
+
+def test_merged_journal_keeps_retention(clock, shards):
+    paths, (shard0, _), journal = shards
+    journal.keep_days = 1
+    write(shard0, [(clock.now, 'KRW-OLD')])
+    merge_journals(paths[:1], journal)
+    clock.advance(2 * 86400)
+    write(shard0, [(clock.now, 'KRW-NEW')])
+    merge_journals(paths[:1], journal)
+    assert merged_rows(journal) == [(clock.now, 'KRW-NEW')]
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+상태 스냅샷: 저장 → 새 프로세스에서 복원하면 계속 돈 프로세스(데몬)와 같은 결과 + 같은 (적은) 요청 수
+- 비교 대상: 데몬(같은 객체로 이어서 스캔), 복원(새 객체 + 스냅샷), 빈 상태(새 객체만)
+- 호가 변화는 스캔마다 호가를 한 번만 받으므로 스냅샷으로 이전 실행의 호가를 넘겨야 계산됨
+"""
+
+from collections import Counter
+
+import numpy as np
+
+import upbit_benchmark
+import upbit_candles
+import upbit_orderbook
+import upbit_prescreen
+import upbit_snapshot
+import upbit_trades
+from upbit_alerts import AlertHistory
+from upbit_candles import CandleCache, DailyCandleStore
+from upbit_orderbook import OrderbookHistory
+from upbit_prescreen import TickerScreen
+from upbit_snapshot import load_snapshot, save_snapshot
+from upbit_tiers import MarketTiers
+from upbit_trades import TradeTape
+
+class Process:
+    """스크립트 1회 실행분 공용 캐시/상태 객체 (요청 수 집계 포함)"""
+
+    def __init__(self, exchange):
+        self.exchange = exchange
+        self.trade_requests = Counter()
+        self.cache = CandleCache(fetch=exchange.candles)
+        self.daily = DailyCandleStore(fetch=exchange.candles, fetch_ticker=exchange.tickers)
+        self.screen = TickerScreen(fetch=exchange.tickers)
+        self.tape = TradeTape(fetch=self.fetch_trades)
+        self.books = OrderbookHistory(markets=16, history=8, depth=5)
+        self.states = {'tiers': MarketTiers(120, 3), 'alerts': AlertHistory(900)}
+
+    def fetch_trades(self, market, count, cursor=None):
+        self.trade_requests[market] += 1
+        return self.exchange.trades(market, count, cursor)
+
+    def install(self, monkeypatch):
+        """스냅샷 모듈이 읽고 쓰는 공용 객체를 이 실행분으로 교체"""
+        monkeypatch.setattr(upbit_snapshot, 'CANDLE_CACHE', self.cache)
+        monkeypatch.setattr(upbit_snapshot, 'DAILY_STORE', self.daily)
+        monkeypatch.setattr(upbit_snapshot, 'TICKER_SCREEN', self.screen)
+        monkeypatch.setattr(upbit_snapshot, 'TRADE_TAPE', self.tape)
+        monkeypatch.setattr(upbit_snapshot, 'ORDERBOOK_HISTORY', self.books)
+
+    def scan(self):
+        """스캔 1회: 현재가 사전 선별 + 진행 중 일봉, 5분봉, 일봉, 체결강도, 호가 변화 → (결과, 간격별 요청 수 + 받은 5분봉 수)"""
+        before = Counter(self.exchange.requests)
+        before['candles'] = self.cache.stats['candles']
+        markets = self.exchange.markets
+        rows = self.screen.fetch_all(markets)
+        self.daily.apply_tickers(rows)
+        result = {'passed': self.screen.screen(rows)}
+        for book in self.exchange.orderbook(markets):
+            self.books.record(book['market'], book)
+        result['depth'] = self.books.delta_features(markets)
+        for market in markets:
+            self.tape.refresh(market)
+            result[market] = (self.cache.get_arrays(market, 'minute5', 50), self.daily.get_arrays(market, 100),
+                              self.tape.pressure(market))
+        requests = Counter(self.exchange.requests)
+        requests['candles'] = self.cache.stats['candles']
+        requests.subtract(before)
+        return result, requests
+
+def assert_same_scan(actual, expected):
+    assert actual.keys() == expected.keys()
+    assert actual['passed'] == expected['passed']
+    assert actual['depth'] == expected['depth']
+    for market in expected:
+        if market in ('passed', 'depth'):
+            continue
+        (candle, daily, pressure), (expected_candle, expected_daily, expected_pressure) = actual[market], expected[market]
+        for got, want in ((candle, expected_candle), (daily, expected_daily)):
+            np.testing.assert_array_equal(got[0], want[0])
+            np.testing.assert_array_equal(got[1], want[1])
+        assert pressure is not None and pressure == expected_pressure
+
+def test_restored_run_matches_daemon(monkeypatch, tmp_path, clock, exchange):
+    for module in (upbit_benchmark, upbit_candles, upbit_orderbook, upbit_prescreen, upbit_trades):
+        monkeypatch.setattr(module, 'time', clock)
+    path = str(tmp_path / 'state.bin')
+
+    # 1회차 실행 후 저장
+    daemon = Process(exchange)
+    daemon.scan()
+    daemon.states['tiers'].update(exchange.markets, exchange.markets[:2])
+    daemon.states['alerts'].allow(exchange.markets[0], 2)
+    daemon.install(monkeypatch)
+    save_snapshot(path, daemon.states)
+
+    clock.advance(180)
+    daemon_result, daemon_requests = daemon.scan()
+
+    restored = Process(exchange)
+    restored.install(monkeypatch)
+    assert load_snapshot(path, restored.states)
+    restored_result, restored_requests = restored.scan()
+
+    cold = Process(exchange)
+    cold_result, cold_requests = cold.scan()
+
+    # 복원한 실행 = 데몬 (결과, 요청 수, 작은 상태)
+    assert_same_scan(restored_result, daemon_result)
+    assert restored_requests == daemon_requests
+    assert restored.trade_requests == Counter({market: 1 for market in exchange.markets})
+    for name, obj in daemon.states.items():
+        assert restored.states[name].state == obj.state
+
+    # 빈 상태보다 적게: 마감 일봉 재조회 없음, 5분봉은 새 봉만, 사전 선별은 직전 스냅샷과 비교
+    assert restored_requests['day'] == 0 < cold_requests['day']
+    assert restored_requests['candles'] < cold_requests['candles']
+    assert cold_result['passed'] == set(exchange.markets)
+    # 호가 변화: 복원한 실행은 이전 실행 호가와 비교, 빈 상태는 호가 1개뿐이라 없음
+    assert daemon_result['depth'].keys() == set(exchange.markets)
+    assert all(row['depth_snapshots'] == 2 and row['depth_seconds'] == 180 for row in restored_result['depth'].values())
+    assert cold_result['depth'] == {}
+
+def test_corrupt_snapshot_starts_empty(monkeypatch, tmp_path, exchange):
+    path = tmp_path / 'state.bin'
+    process = Process(exchange)
+    process.install(monkeypatch)
+    process.states['alerts'].allow(exchange.markets[0], 1)
+    save_snapshot(str(path), process.states)
+
+    data = bytearray(path.read_bytes())
+    data[-1] ^= 0xFF
+    path.write_bytes(bytes(data))
+    fresh = Process(exchange)
+    fresh.install(monkeypatch)
+    assert not load_snapshot(str(path), fresh.states)
+    assert fresh.states['alerts'].state == {} and not fresh.cache.rings
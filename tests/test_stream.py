@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""재생 서버(upbit_stream.serve_replay) → 실시간 감지: 서버 정상 종료/접속 거부 후 재접속 + 재접속 시 5분봉 다시 채움 + 급등 알림"""
+
+import asyncio
+import json
+import socket
+import time
+
+import numpy as np
+import pytest
+import websockets
+
+import upbit_api
+import upbit_candles
+import upbit_stream
+import upbit_fast_detector as fast
+from upbit_alerts import AlertHistory
+from upbit_candles import CandleCache
+from upbit_journal import SHEETS, SignalJournal
+from upbit_metrics import Metrics
+from upbit_trades import TradeTape
+from upbit_stream import serve_replay, stream_messages
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('localhost', 0))
+        return sock.getsockname()[1]
+
+def surge_recording(exchange, market):
+    """진행 중인 5분봉에 가격 +6%, 거래량 폭증 체결이 들어오는 녹화 (호가 1개 + 체결 20개)"""
+    ts, ohlcv = exchange.bars(market, 'minute5')
+    start = int(ts[-1])
+    price = ohlcv[-1, 3]
+    volume = ohlcv[-11:-1, 4].mean()
+    book = exchange.orderbook([market])[0]
+    messages = [{**book, 'type': 'orderbook', 'code': market, 'timestamp': start + 1000}]
+    for i in range(20):
+        messages.append({'type': 'trade', 'code': market, 'trade_timestamp': start + 60_000 + i * 1000,
+                         'timestamp': start + 60_000 + i * 1000, 'sequential_id': start + i,
+                         'trade_price': price * (1 + 0.003 * (i + 1)), 'trade_volume': volume, 'ask_bid': 'BID'})
+    return messages
+
+async def with_replay_server(path, run):
+    """재생 서버를 띄우고 run(url) 실행"""
+    port = free_port()
+    server = asyncio.create_task(serve_replay(path, port=port))
+    try:
+        for _ in range(100):
+            try:
+                _, writer = await asyncio.open_connection('localhost', port)
+                writer.close()
+                break
+            except OSError:
+                await asyncio.sleep(0.02)
+        return await asyncio.wait_for(run(f"ws://localhost:{port}"), timeout=30)
+    finally:
+        server.cancel()
+
+@pytest.fixture
+def recording(tmp_path, exchange):
+    messages = surge_recording(exchange, exchange.markets[0])
+    path = tmp_path / 'recorded.jsonl'
+    path.write_text(''.join(json.dumps(m) + '\n' for m in messages), encoding='utf-8')
+    return str(path), messages
+
+def test_reconnects_after_server_closes(monkeypatch, exchange, recording):
+    path, messages = recording
+    monkeypatch.setattr(upbit_stream, 'WS_RECONNECT_DELAY', 0.01)
+
+    reconnects = []
+
+    async def on_reconnect():
+        reconnects.append(len(received))
+
+    async def receive_twice(url):
+        async for message in stream_messages(exchange.markets, url=url, once=False, on_reconnect=on_reconnect):
+            received.append(message)
+            if len(received) == 2 * len(messages):
+                return received
+
+    received = []
+    asyncio.run(with_replay_server(path, receive_twice))
+    # 재생 서버는 다 보내면 연결을 닫음 → 재접속해서 같은 메시지를 한 번 더 받음 (구독 전에 콜백 1회)
+    assert received[:len(messages)] == messages
+    assert received[len(messages):] == messages
+    assert reconnects == [len(messages)]
+
+def test_rejected_handshake_retries(monkeypatch, recording):
+    """접속 거부(HTTP 429)는 스트림을 끝내지 않고 대기 후 재시도"""
+    _, messages = recording
+    monkeypatch.setattr(upbit_stream, 'WS_RECONNECT_DELAY', 0.01)
+    attempts = []
+
+    def process_request(connection, request):
+        attempts.append(request.path)
+        if len(attempts) <= 2:
+            return connection.respond(429, "Too Many Requests\n")
+
+    async def handler(ws):
+        await ws.recv()
+        for message in messages:
+            await ws.send(json.dumps(message))
+
+    async def run():
+        async with websockets.serve(handler, 'localhost', 0, process_request=process_request) as server:
+            port = server.sockets[0].getsockname()[1]
+            return [message async for message in stream_messages(['KRW-T00'], url=f"ws://localhost:{port}", once=True)]
+
+    assert asyncio.run(asyncio.wait_for(run(), timeout=30)) == messages
+    assert len(attempts) == 3
+
+def test_once_stops_when_server_closes(exchange, recording):
+    path, messages = recording
+
+    async def receive(url):
+        return [message async for message in stream_messages(exchange.markets, url=url, once=True)]
+
+    assert asyncio.run(with_replay_server(path, receive)) == messages
+
+def test_reconnect_reseeds_bars(monkeypatch, clock, exchange):
+    """끊긴 동안의 체결은 스트림으로 못 받음 → 재접속하면 5분봉을 REST로 다시 채워 진행 중인 봉 거래량을 맞춤"""
+    monkeypatch.setattr(upbit_candles, 'time', clock)
+    monkeypatch.setattr(upbit_api, 'fetch_markets', exchange.market_list)
+    monkeypatch.setitem(upbit_api._market_list, 'markets', None)
+    monkeypatch.setattr(fast, 'CANDLE_CACHE', CandleCache(fetch=exchange.candles))
+    builders = []
+
+    class RecordingBuilder(upbit_stream.LiveBarBuilder):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            builders.append(self)
+
+    async def outage(markets, on_reconnect=None, **kwargs):
+        clock.advance(400)  # 끊긴 동안 새 봉이 생기고 진행 중인 봉이 자람
+        await on_reconnect()
+        return
+        yield
+
+    monkeypatch.setattr(fast, 'LiveBarBuilder', RecordingBuilder)
+    monkeypatch.setattr(fast, 'stream_messages', outage)
+    asyncio.run(fast.stream_fast_signals())
+
+    for market in exchange.markets:
+        ts, ohlcv = builders[0].tail(market)
+        expected_ts, expected = exchange.bars(market, 'minute5')
+        np.testing.assert_array_equal(ts, expected_ts[-fast.SURGE_WINDOW:])
+        np.testing.assert_allclose(ohlcv, expected[-fast.SURGE_WINDOW:], rtol=1e-12)
+
+def test_replay_emits_surge_alert(monkeypatch, tmp_path, exchange, recording):
+    path, _ = recording
+    market = exchange.markets[0]
+    alerts = []
+    monkeypatch.setattr(upbit_api, 'fetch_markets', exchange.market_list)
+    monkeypatch.setitem(upbit_api._market_list, 'markets', None)
+    monkeypatch.setattr(fast, 'CANDLE_CACHE', CandleCache(fetch=exchange.candles))
+    monkeypatch.setattr(fast, 'TRADE_TAPE', TradeTape(fetch=exchange.trades))
+    monkeypatch.setattr(fast, 'ALERTS', AlertHistory(300))
+    monkeypatch.setattr(fast, 'SIGNAL_JOURNAL', SignalJournal(str(tmp_path / 'fast.db'), SHEETS['fast']['table']))
+    monkeypatch.setattr(fast, 'queue_telegram', alerts.append)
+    monkeypatch.setattr(fast, 'METRICS', Metrics())
+    monkeypatch.setattr(upbit_stream, 'STREAM_ONCE', True)
+
+    async def run(url):
+        monkeypatch.setattr(upbit_stream, 'UPBIT_WS_URL', url)
+        await fast.stream_fast_signals()
+
+    asyncio.run(with_replay_server(path, run))
+    # 거래량 폭증 + 5분 상승 + 고점 돌파 → 긴급 알림 1건 (같은 봉 재알림은 쿨다운으로 제한)
+    assert len(alerts) == 1
+    assert f"[{market.split('-')[1]}] 긴급 급등 알림" in alerts[0]
+    assert fast.SIGNAL_JOURNAL.tail(10)
+    # 알림 지연은 체결로 만든 5분봉의 시작 시각부터
+    start = recording[1][1]['trade_timestamp'] // 300_000 * 300_000
+    histogram = fast.METRICS.histograms[Metrics.key('alert_latency_seconds', {'strategy': 'fast'})]
+    assert histogram.count == 1
+    assert histogram.sum == pytest.approx(time.time() - start / 1000, abs=60)
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""급등 지표 일괄 계산 = 기존 코인별 pandas 계산 (짧은 봉, 거래량 0, 도지 포함)"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from upbit_fast_detector import SURGE_WINDOW, compute_surge_features_batch
+
+def reference_surge_features(df):
+    """기존 compute_surge_features (코인 1개, pandas) - 비교용으로 고정"""
+    if df is None or len(df) < 20:
+        return None
+    current_candle = df.iloc[-1]
+    current_volume = current_candle['volume']
+    current_price = current_candle['close']
+    avg_volume = df['volume'].iloc[-11:-1].mean()
+    volume_ratio = current_volume / avg_volume if avg_volume > 0 else 0
+    recent_3_volume = df['volume'].iloc[-3:].sum()
+    prev_10_volume = df['volume'].iloc[-13:-3].sum()
+    volume_acceleration = recent_3_volume / prev_10_volume if prev_10_volume > 0 else 0
+    candle_change = ((current_candle['close'] - current_candle['open']) / current_candle['open']) * 100
+    price_5m_ago = df['close'].iloc[-2]
+    price_change_5m = ((current_price - price_5m_ago) / price_5m_ago) * 100
+    if len(df) >= 4:
+        price_15m_ago = df['close'].iloc[-4]
+        price_change_15m = ((current_price - price_15m_ago) / price_15m_ago) * 100
+    else:
+        price_change_15m = 0
+    consecutive_green = 0
+    for i in range(1, min(6, len(df))):
+        if df['close'].iloc[-i] > df['open'].iloc[-i]:
+            consecutive_green += 1
+        else:
+            break
+    consecutive_volume = 0
+    for i in range(1, min(5, len(df))):
+        if df['volume'].iloc[-i] > df['volume'].iloc[-i-1]:
+            consecutive_volume += 1
+        else:
+            break
+    recent_5 = df.iloc[-5:]
+    green_count = sum(recent_5['close'] > recent_5['open'])
+    buying_pressure = green_count / 5
+    high_20 = df['high'].iloc[-21:-1].max()
+    breaking_high = current_price > high_20
+    return {
+        'volume_ratio': volume_ratio,
+        'volume_acceleration': volume_acceleration,
+        'candle_change': candle_change,
+        'price_change_5m': price_change_5m,
+        'price_change_15m': price_change_15m,
+        'consecutive_green': consecutive_green,
+        'consecutive_volume': consecutive_volume,
+        'buying_pressure': buying_pressure,
+        'breaking_high': breaking_high,
+        'current_price': current_price,
+        'current_volume': current_volume
+    }
+
+def synthetic_block(rng):
+    """합성 5분봉 (N×5) - 길이/거래량 0/도지/급등 봉을 섞음"""
+    n = int(rng.choice([0, 5, 19, 20, 21, 35, SURGE_WINDOW, SURGE_WINDOW + 30]))
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    open_ = close * np.exp(rng.normal(0, 0.01, n))
+    doji = rng.random(n) < 0.15
+    open_[doji] = close[doji]
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.01, n))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.01, n))
+    volume = rng.lognormal(5, 1, n) * (1 + 4 * (rng.random(n) < 0.1))
+    volume[rng.random(n) < 0.1] = 0
+    if rng.random() < 0.05:
+        volume[:] = 0
+    return np.stack([open_, high, low, close, volume], axis=1)
+
+def test_batch_matches_per_coin_pandas():
+    rng = np.random.default_rng(6)
+    blocks = [synthetic_block(rng) for _ in range(3000)]
+    batch = compute_surge_features_batch(blocks)
+
+    for block, features in zip(blocks, batch):
+        # 실시간 스캔은 최근 SURGE_WINDOW개 봉만 받음
+        df = pd.DataFrame(block[-SURGE_WINDOW:], columns=['open', 'high', 'low', 'close', 'volume'])
+        expected = reference_surge_features(df)
+        if expected is None:
+            assert features is None
+            continue
+        assert features.keys() == expected.keys()
+        for name, value in expected.items():
+            assert features[name] == pytest.approx(value, rel=1e-12, abs=1e-12, nan_ok=True), name
+
+def test_missing_blocks_are_none():
+    assert compute_surge_features_batch([None, np.zeros((0, 5))]) == [None, None]
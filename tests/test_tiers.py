@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""등급 순번 + 현재가 사전 선별: 차례가 된 cold 코인은 사전 선별을 통과하지 못해도 스캔"""
+
+import pytest
+
+import upbit_candles
+import upbit_prescreen
+import upbit_tiers
+import upbit_fast_detector as fast
+import upbit_monitor_enhanced as enhanced
+from upbit_candles import DailyCandleStore
+from upbit_prescreen import TickerScreen
+from upbit_tiers import MarketTiers
+
+INTERVAL = 120
+COLD_EVERY = 3
+
+def quiet_tickers(exchange, mover):
+    """거래대금/가격이 그대로인 현재가 (mover만 매 조회 +5%)"""
+    calls = []
+
+    def fetch(markets):
+        calls.append(1)
+        rows = exchange.tickers(markets)
+        for row in rows:
+            row['acc_trade_price'] = 1e9
+            row['trade_price'] = 100.0 * (1.05 ** len(calls) if row['market'] == mover else 1)
+        return rows
+    return fetch
+
+@pytest.mark.parametrize('module', [fast, enhanced], ids=['fast', 'enhanced'])
+def test_cold_rotation_survives_prescreen(monkeypatch, clock, exchange, module):
+    markets = exchange.markets
+    mover = markets[-1]
+    tiers = MarketTiers(INTERVAL, COLD_EVERY)
+    for target in (upbit_tiers, upbit_prescreen, upbit_candles):
+        monkeypatch.setattr(target, 'time', clock)
+    monkeypatch.setattr(module, 'TIERS', tiers)
+    monkeypatch.setattr(module, 'PRESCREEN', True)
+    monkeypatch.setattr(module, 'TICKER_SCREEN', TickerScreen(fetch=quiet_tickers(exchange, mover)))
+    if module is enhanced:
+        monkeypatch.setattr(enhanced, 'DAILY_STORE', DailyCandleStore(fetch=exchange.candles, fetch_ticker=exchange.tickers))
+
+    # 첫 회차: 비교할 스냅샷이 없어 전부 통과 → 전부 관문 미통과로 cold
+    assert module.select_scan_markets(markets) == markets
+    tiers.update(markets, [])
+
+    scanned = set()
+    for _ in range(COLD_EVERY):
+        clock.advance(INTERVAL)
+        rotation = tiers.select(markets)
+        due = module.select_scan_markets(markets)
+        assert set(due) == set(rotation) | {mover}
+        tiers.update(due, [])
+        scanned.update(due)
+    # COLD_EVERY 회차 안에 모든 cold 코인이 한 번씩은 다시 판정됨
+    assert scanned == set(markets)
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+체결 집계: 체결 번호는 유일하지만 순서가 없음 → 봉 합계 = 중복 없이 더한 원본 체결 합계
+- 번호를 시각과 무관하게 섞고, 겹치는 구간을 여러 번 넣거나 REST로 여러 페이지에 걸쳐 받아도 같아야 함
+"""
+
+from collections import defaultdict
+
+import numpy as np
+import pytest
+
+import upbit_trades
+from upbit_trades import TRADE_TICK_COUNT, TradeTape
+
+START_MS = 1_736_899_200_000
+MARKET = 'KRW-TR'
+
+def synthetic_trades(rng, n, start_ms=START_MS):
+    """체결 [(번호, 시각(ms), 수량, 매수 여부)] (오래된 순, 번호는 시각과 무관하게 섞음)"""
+    ts = start_ms + np.cumsum(rng.integers(0, 400, n))
+    ids = rng.permutation(10 * n)[:n] + 1
+    volume = rng.lognormal(0, 1, n).round(4)
+    is_buy = rng.random(n) < 0.55
+    return [(int(seq), int(t), float(v), bool(b)) for seq, t, v, b in zip(ids, ts, volume, is_buy)]
+
+def expected_bars(trades, bar_ms=upbit_trades.TRADE_BAR_SECONDS * 1000):
+    """원본 체결을 봉별로 직접 더한 합계 {봉 시작: [매수량, 매도량, 체결 수]}"""
+    bars = defaultdict(lambda: [0.0, 0.0, 0])
+    for _, ts, volume, is_buy in trades:
+        bar = bars[ts - ts % bar_ms]
+        bar[0 if is_buy else 1] += volume
+        bar[2] += 1
+    return bars
+
+def assert_bars(tape, trades):
+    bars = tape.state[MARKET]['bars']
+    expected = expected_bars(trades)
+    kept = {start: totals for start, totals in expected.items() if start >= bars[0][0]}
+    assert [bar[0] for bar in bars] == sorted(kept)
+    for start, buy, sell, count in bars:
+        assert [buy, sell] == pytest.approx(kept[start][:2], rel=1e-12)
+        assert count == kept[start][2]
+
+def test_out_of_order_ids_and_duplicates():
+    rng = np.random.default_rng(24)
+    trades = synthetic_trades(rng, 3000)
+    tape = TradeTape(bars=1000)
+    # 겹치는 묶음으로 나눠 넣음 (이전 묶음 끝 일부를 다시 보냄)
+    step, overlap = 100, 15
+    added = sum(tape.add(MARKET, trades[max(0, i - overlap):i + step]) for i in range(0, len(trades), step))
+    assert added == len(trades)
+    assert_bars(tape, trades)
+
+    # 기억 구간 밖은 번호를 잊음, 그보다 오래된 체결은 다시 와도 무시
+    entry = tape.state[MARKET]
+    assert entry['time'] == trades[-1][1]
+    assert all(ts >= entry['time'] - tape.dedupe_ms for ts in entry['seen'].values())
+    assert tape.add(MARKET, trades[:100]) == 0
+
+def test_late_ticks_within_window_are_counted_once():
+    """같은 구간 안에서 늦게 도착한 체결 (WebSocket 순서 뒤바뀜)"""
+    rng = np.random.default_rng(25)
+    trades = synthetic_trades(rng, 500)
+    shuffled = list(trades)
+    for i in range(0, len(shuffled) - 5, 5):
+        block = shuffled[i:i + 5]
+        shuffled[i:i + 5] = [block[j] for j in rng.permutation(5)]  # 400ms×5 < 구간
+    tape = TradeTape(bars=1000)
+    for tick in shuffled + shuffled[-20:]:
+        tape.add(MARKET, [tick])
+    assert_bars(tape, trades)
+
+class Exchange:
+    """체결 API 대역 (최신순, 페이지 커서 = 직전 페이지 마지막 체결 번호)"""
+
+    def __init__(self):
+        self.trades = []
+        self.requests = 0
+
+    def fetch(self, market, count, cursor=None):
+        self.requests += 1
+        newest_first = self.trades[::-1]
+        start = 0
+        if cursor is not None:
+            start = next(i for i, t in enumerate(newest_first) if t[0] == cursor) + 1
+        return [{'sequential_id': seq, 'timestamp': ts, 'trade_volume': volume, 'ask_bid': 'BID' if is_buy else 'ASK'}
+                for seq, ts, volume, is_buy in newest_first[start:start + count]]
+
+def test_refresh_pages_back_by_timestamp():
+    rng = np.random.default_rng(26)
+    trades = synthetic_trades(rng, 6 * TRADE_TICK_COUNT)
+    exchange = Exchange()
+    tape = TradeTape(fetch=exchange.fetch, bars=1000)
+
+    # 처음 보는 마켓은 최근 1회분만
+    exchange.trades = trades[:2 * TRADE_TICK_COUNT]
+    assert tape.refresh(MARKET) == TRADE_TICK_COUNT
+    assert exchange.requests == 1
+    first = TRADE_TICK_COUNT
+
+    # 새 체결 2.5페이지 → 이미 본 구간 시작 시각보다 오래된 체결까지 3회 요청
+    exchange.trades = trades[:int(4.5 * TRADE_TICK_COUNT)]
+    assert tape.refresh(MARKET) == len(exchange.trades) - 2 * TRADE_TICK_COUNT
+    assert exchange.requests == 4
+    assert_bars(tape, trades[first:len(exchange.trades)])
+
+    # 새 체결 없음 → 1회 요청, 더한 체결 없음
+    assert tape.refresh(MARKET) == 0
+    assert exchange.requests == 5
+
+def test_refresh_resets_when_window_not_reached(monkeypatch):
+    rng = np.random.default_rng(27)
+    trades = synthetic_trades(rng, 5 * TRADE_TICK_COUNT)
+    exchange = Exchange()
+    tape = TradeTape(fetch=exchange.fetch, bars=1000)
+    exchange.trades = trades[:TRADE_TICK_COUNT // 2]
+    tape.refresh(MARKET)
+
+    monkeypatch.setattr(upbit_trades, 'TRADE_MAX_PAGES', 2)
+    exchange.trades = trades
+    assert tape.refresh(MARKET) == 2 * TRADE_TICK_COUNT
+    assert_bars(tape, trades[-2 * TRADE_TICK_COUNT:])
+
+def test_state_round_trip():
+    rng = np.random.default_rng(28)
+    trades = synthetic_trades(rng, 400)
+    tape = TradeTape(bars=1000)
+    tape.add(MARKET, trades[:300])
+
+    restored = TradeTape(bars=1000)
+    restored.import_state(tape.export_state())
+    # 복원 후 겹치는 체결을 다시 받아도 한 번만 더함
+    for target in (tape, restored):
+        target.add(MARKET, trades[280:])
+    assert restored.state == tape.state
+
+    # 이전 형식 (체결 번호 커서) 상태는 버리고 새로 시작
+    old = TradeTape()
+    old.import_state({MARKET: {'cursor': 5, 'bars': [[START_MS, 1.0, 1.0, 2]]}})
+    assert old.state == {}
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+업비트 코인별 알림 기록 (재알림 제한)
+같은 코인은 ALERT_COOLDOWN초 안에 다시 알리지 않고, 등급(점수/레벨)이 올라갈 때만 알림
+- 기록은 벽시계 기준이라 스냅샷(upbit_snapshot)으로 실행 간에 이어서 사용
+"""
+
+import os
+import threading
+import time
+
+ALERT_COOLDOWN = int(os.environ.get('ALERT_COOLDOWN', '900'))  # 같은 코인 재알림 간격 (초, 0이면 제한 없음)
+
+class AlertHistory:
+    """코인 → [마지막 알림 시각(epoch 초), 등급]"""
+
+    def __init__(self, cooldown=ALERT_COOLDOWN):
+        self.cooldown = cooldown
+        self.state = {}
+        self.lock = threading.Lock()
+
+    def allow(self, coin, rank, now=None):
+        """알림 가능 여부 (가능하면 기록까지)"""
+        now = now if now is not None else time.time()
+        with self.lock:
+            for key in [k for k, (sent, _) in self.state.items() if now - sent >= self.cooldown]:
+                del self.state[key]
+            previous = self.state.get(coin)
+            if previous and rank <= previous[1]:
+                return False
+            self.state[coin] = [now, rank]
+            return True
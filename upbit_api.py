@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+업비트 시세 REST API 공통 모듈
+모든 시세 요청을 하나의 keep-alive 세션으로 처리 (데몬 모드에서 연결 재사용)
+- 요청마다 엔드포인트 그룹별 토큰 버킷을 거침 (upbit_ratelimit)
+"""
+
+import requests
+import threading
+import time
+import os
+
+from upbit_metrics import METRICS
+from upbit_ratelimit import RATE_LIMITER, parse_remaining
+from upbit_shard import shard_markets
+
+UPBIT_API_URL = "https://api.upbit.com/v1"
+MAX_CANDLE_COUNT = 200  # 캔들 요청 1회 최대 개수
+MAX_TRADE_COUNT = 500  # 체결 요청 1회 최대 개수
+MARKET_LIST_TTL = int(os.environ.get('MARKET_LIST_TTL', '3600'))  # 마켓 목록 재조회 주기 (초)
+API_THROTTLE_RETRIES = int(os.environ.get('API_THROTTLE_RETRIES', '3'))  # 429/418 응답 재시도 횟수
+THROTTLE_STATUS = (418, 429)  # 요청 제한 초과 (418: 반복 초과로 일시 차단)
+
+SESSION = requests.Session()
+
+# 봉 간격 → (API 경로, 봉 길이 ms)
+INTERVALS = {
+    'minute1': ('candles/minutes/1', 60 * 1000),
+    'minute3': ('candles/minutes/3', 3 * 60 * 1000),
+    'minute5': ('candles/minutes/5', 5 * 60 * 1000),
+    'minute10': ('candles/minutes/10', 10 * 60 * 1000),
+    'minute15': ('candles/minutes/15', 15 * 60 * 1000),
+    'minute30': ('candles/minutes/30', 30 * 60 * 1000),
+    'minute60': ('candles/minutes/60', 60 * 60 * 1000),
+    'minute240': ('candles/minutes/240', 240 * 60 * 1000),
+    'day': ('candles/days', 24 * 60 * 60 * 1000),
+}
+
+def get_json(path, params):
+    """시세 API GET → JSON (그룹별 요청 제한 + 429 재시도, 엔드포인트별 호출 수/오류 수/응답 시간 계측)"""
+    endpoint = path.split('/')[0]
+    bucket = RATE_LIMITER.bucket(endpoint)
+    for attempt in range(API_THROTTLE_RETRIES + 1):
+        waited = bucket.acquire()
+        if waited > 0:
+            METRICS.observe('ratelimit_wait_seconds', waited, endpoint=endpoint)
+        started = time.perf_counter()
+        ok = throttled = False
+        try:
+            response = SESSION.get(f"{UPBIT_API_URL}/{path}", params=params, timeout=10)
+            if response.status_code in THROTTLE_STATUS and attempt < API_THROTTLE_RETRIES:
+                throttled = True
+                METRICS.inc('api_throttled_total', endpoint=endpoint, status=response.status_code)
+                bucket.penalize(attempt)
+                continue
+            response.raise_for_status()
+            bucket.observe(parse_remaining(response.headers.get('Remaining-Req')))
+            result = response.json()
+            ok = True
+            return result
+        finally:
+            # 재시도할 429/418은 오류가 아님 (api_throttled_total로 따로 집계)
+            METRICS.api_call(endpoint, time.perf_counter() - started, ok or throttled)
+
+# ============================================
+# 엔드포인트별 조회
+# ============================================
+
+def fetch_candles(market, interval, count, to=None):
+    """캔들 원본 조회 (최신 봉부터 최대 200개, to: 이 시각(UTC) 이전 봉만)"""
+    path, _ = INTERVALS[interval]
+    params = {'market': market, 'count': min(count, MAX_CANDLE_COUNT)}
+    if to:
+        params['to'] = to
+    return get_json(path, params)
+
+def fetch_tickers(markets):
+    """현재가(ticker) 원본 조회 - 여러 마켓을 한 번에"""
+    return get_json("ticker", {'markets': ','.join(markets)})
+
+def fetch_orderbook(markets):
+    """호가 원본 조회 - 여러 마켓을 한 번에"""
+    return get_json("orderbook", {'markets': ','.join(markets)})
+
+def fetch_trades(market, count, cursor=None):
+    """최근 체결 원본 조회 (최신 체결부터 최대 500개, cursor: 이 체결 번호(sequential_id)보다 이전 체결만)"""
+    params = {'market': market, 'count': min(count, MAX_TRADE_COUNT)}
+    if cursor:
+        params['cursor'] = cursor
+    return get_json("trades/ticks", params)
+
+def fetch_markets():
+    """전체 마켓 목록 원본 조회"""
+    return get_json("market/all", {'isDetails': 'false'})
+
+_market_list = {'time': 0.0, 'markets': None}
+_market_lock = threading.Lock()
+
+def get_krw_markets(ttl=None, sharded=True):
+    """KRW 마켓 목록 (ttl초 동안 재사용, sharded: SHARD_COUNT > 1이면 이 샤드 몫만)"""
+    ttl = MARKET_LIST_TTL if ttl is None else ttl
+    with _market_lock:
+        now = time.monotonic()
+        if _market_list['markets'] is None or now - _market_list['time'] >= ttl:
+            _market_list['markets'] = [m['market'] for m in fetch_markets() if m['market'].startswith('KRW-')]
+            _market_list['time'] = now
+        markets = list(_market_list['markets'])
+    return shard_markets(markets) if sharded else markets
@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+업비트 신호 백테스트
+저장해 둔 과거 5분봉/일봉을 봉 단위로 재생하며 두 점수 체계를 평가
+- 초단타: evaluate_fast_signal (0-10점, 6점 이상 알림)
+- Enhanced: calculate_signal_strength (0-14점, 4점 이상 알림)
+
+각 5분봉 마감 시점에 그 봉까지의 데이터만으로 지표를 계산 (미래 데이터 없음)
+- 지표는 시간축 전체를 벡터 연산으로 한 번에, 점수는 실시간과 같은 점수 규칙(upbit_rules)으로 한 번에 계산
+- 마켓별로 CPU 코어에 나눠 병렬 실행
+- 과거 호가는 없으므로 호가 점수(각 1점)는 항상 0
+
+사용법:
+    python upbit_backtest.py download data 90              # 전 KRW 마켓 90일치 저장
+    python upbit_backtest.py download data 90 KRW-BTC      # 일부 마켓만
+    python upbit_backtest.py run data backtest_alerts.csv  # 백테스트 → 알림별 수익률 CSV + 요약
+"""
+
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from multiprocessing import Pool
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from upbit_api import INTERVALS, MAX_CANDLE_COUNT, fetch_candles, get_krw_markets
+from upbit_candles import candles_to_arrays
+from upbit_indicators import IndicatorEngine
+from upbit_fast_detector import SURGE_WINDOW, FAST_SCORER, compute_surge_arrays
+from upbit_monitor_enhanced import VOLUME_THRESHOLD_WATCH, ENHANCED_SCORER, signal_features
+
+BACKTEST_HORIZONS = [int(m) for m in os.environ.get('BACKTEST_HORIZONS', '5,15,60,240').split(',')]  # 수익률 측정 구간 (분)
+BACKTEST_FEE = float(os.environ.get('BACKTEST_FEE', '0.001'))  # 왕복 수수료 - 이보다 높은 수익률이면 적중
+BACKTEST_WORKERS = int(os.environ.get('BACKTEST_WORKERS', '0')) or os.cpu_count()
+BACKTEST_CHUNK = 20000  # 초단타 지표를 한 번에 계산할 봉 수 (메모리 제한)
+
+FAST_ALERT_SCORE = 6  # handle_fast_signal 알림 기준
+ENHANCED_ALERT_SCORE = 4  # scan_upbit_market 알림 기준
+SHORT_TERM_WINDOW = 100  # analyze_short_term_volume 5분봉 개수
+DAILY_VOLUME_WINDOW = 30  # analyze_volume 일봉 개수
+DAILY_INDICATOR_WINDOW = 100  # calculate_indicators 일봉 개수
+
+MINUTE_MS = 60 * 1000
+DAY_MS = INTERVALS['day'][1]
+M15_MS = INTERVALS['minute15'][1]
+
+# ============================================
+# 과거 캔들 저장
+# ============================================
+
+def format_to(ts):
+    """epoch ms → 캔들 API to 파라미터 (UTC)"""
+    return datetime.fromtimestamp(ts / 1000, tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+def download_candles(market, interval, since_ms):
+    """since_ms 이후 캔들을 과거 방향으로 페이지 조회 → 시간순 (ts, ohlcv)"""
+    ts_parts, ohlcv_parts = [], []
+    to = None
+    while True:
+        candles = fetch_candles(market, interval, MAX_CANDLE_COUNT, to)  # 요청 간격은 upbit_api가 조절
+        if not candles:
+            break
+        ts, ohlcv = candles_to_arrays(candles)
+        ts_parts.append(ts)
+        ohlcv_parts.append(ohlcv)
+        if len(candles) < MAX_CANDLE_COUNT or ts[0] <= since_ms:
+            break
+        to = format_to(ts[0])
+
+    if not ts_parts:
+        return np.zeros(0, dtype=np.int64), np.zeros((0, 6))
+    ts = np.concatenate(ts_parts[::-1])
+    ohlcv = np.concatenate(ohlcv_parts[::-1])
+    keep = ts >= since_ms
+    return ts[keep], ohlcv[keep]
+
+def download_market(data_dir, market, days):
+    """마켓 1개 5분봉 days일 + 일봉 (지표용 100일 추가) 저장"""
+    now = int(time.time() * 1000)
+    ts5, ohlcv5 = download_candles(market, "minute5", now - days * DAY_MS)
+    tsd, ohlcvd = download_candles(market, "day", now - (days + DAILY_INDICATOR_WINDOW) * DAY_MS)
+    np.savez_compressed(os.path.join(data_dir, f"{market}.npz"), ts5=ts5, ohlcv5=ohlcv5, tsd=tsd, ohlcvd=ohlcvd)
+    return len(ts5)
+
+# ============================================
+# 미래 수익률
+# ============================================
+
+def forward_returns(ts, close, rows):
+    """알림 봉 종가 대비 구간별 수익률 (구간 끝 시각 직전 마지막 종가, 데이터 끝을 넘으면 NaN)"""
+    returns = {}
+    for minutes in BACKTEST_HORIZONS:
+        target = ts[rows] + minutes * MINUTE_MS
+        ends = np.searchsorted(ts, target, side='right') - 1
+        ret = close[ends] / close[rows] - 1
+        ret[target > ts[-1]] = np.nan
+        returns[f"ret_{minutes}m"] = ret
+    return returns
+
+def alert_frame(market, strategy, ts, close, rows, scores, levels):
+    """알림 목록 → DataFrame (봉 시각, 점수, 레벨, 가격, 구간별 수익률)"""
+    rows = np.asarray(rows, dtype=np.int64)
+    frame = pd.DataFrame({
+        'market': market,
+        'strategy': strategy,
+        'time': pd.to_datetime(ts[rows], unit='ms', utc=True),
+        'score': np.asarray(scores, dtype=np.int64),
+        'level': levels,
+        'price': close[rows],
+    })
+    for name, values in forward_returns(ts, close, rows).items():
+        frame[name] = values
+    return frame
+
+# ============================================
+# 초단타 (evaluate_fast_signal)
+# ============================================
+
+def backtest_fast(market, ts, ohlcv):
+    """5분봉마다 최근 50개 봉으로 급등 지표 → 지표 배열 그대로 채점 (거래량 1.5배 이상만 알림)"""
+    if len(ts) < SURGE_WINDOW:
+        return None
+
+    # 봉 t의 창 = 봉 t-49 ~ t (창 번호 + 49 = 봉 번호)
+    windows = sliding_window_view(ohlcv[:, :5], SURGE_WINDOW, axis=0)
+    rows, scores, levels = [], [], []
+    for start in range(0, len(windows), BACKTEST_CHUNK):
+        chunk = windows[start:start + BACKTEST_CHUNK].transpose(1, 0, 2)
+        features = compute_surge_arrays(*chunk)
+        chunk_scores, _, chunk_levels = FAST_SCORER.evaluate(features, len(chunk[0]))
+        for row in np.flatnonzero((features['volume_ratio'] >= 1.5) & (chunk_scores >= FAST_ALERT_SCORE)):
+            rows.append(start + row + SURGE_WINDOW - 1)
+            scores.append(chunk_scores[row])
+            levels.append(chunk_levels[row])
+    return alert_frame(market, 'fast', ts, ohlcv[:, 3], rows, scores, levels)
+
+# ============================================
+# Enhanced (calculate_signal_strength)
+# ============================================
+
+def window_sum(cumsum, end, length):
+    """누적합(앞에 0) → 봉 end까지 length개 합"""
+    return cumsum[end + 1] - cumsum[end + 1 - length]
+
+def segment_starts(keys):
+    """정렬된 구간 키 → 봉별 구간 번호, 구간 시작 봉 번호"""
+    new = np.r_[True, keys[1:] != keys[:-1]]
+    return np.cumsum(new) - 1, np.flatnonzero(new)
+
+def short_term_arrays(ts, ohlcv):
+    """
+    analyze_short_term_volume의 시간축 벡터 버전 (봉 t = 최근 100개 5분봉의 마지막 봉)
+    15분봉은 같은 100개 봉을 롤업한 것과 동일 (앞부분이 잘린 첫 15분봉 제외)
+    """
+    o, c, v = ohlcv[:, 0], ohlcv[:, 3], ohlcv[:, 4]
+    t = np.arange(SHORT_TERM_WINDOW - 1, len(ts))
+    cv = np.r_[0.0, np.cumsum(v)]
+
+    # 15분봉: 봉별 15분 구간 번호, 완성 구간 거래량/종가, 진행 중인 구간 누적 거래량
+    buckets = ts // M15_MS * M15_MS
+    bucket_id, starts = segment_starts(buckets)
+    ends = np.r_[starts[1:], len(ts)] - 1
+    bucket_cv = np.r_[0.0, np.cumsum(np.add.reduceat(v, starts))]
+    k = bucket_id[t]
+    first = t - SHORT_TERM_WINDOW + 1
+    count_15m = k - bucket_id[first] + 1 - (ts[first] != buckets[first])
+
+    valid = count_15m >= 20
+    kk = np.maximum(k, 9)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        volume_5m_ma_10 = window_sum(cv, t, 10) / 10
+        volume_5m_ratio = np.where(volume_5m_ma_10 > 0, v[t] / volume_5m_ma_10, 0)
+
+        recent_3_volume = window_sum(cv, t, 3) / 3
+        prev_10_volume = window_sum(cv, t - 3, 10) / 10
+        volume_surge_ratio = np.where(prev_10_volume > 0, recent_3_volume / prev_10_volume, 0)
+
+        price_change_5m = ((c[t] - c[t - 3]) / c[t - 3]) * 100
+
+        current_15m_volume = cv[t + 1] - cv[starts[k]]
+        volume_15m_ma_10 = (bucket_cv[kk] - bucket_cv[kk - 9] + current_15m_volume) / 10
+        volume_15m_ratio = np.where(volume_15m_ma_10 > 0, current_15m_volume / volume_15m_ma_10, 0)
+
+        close_15m_3ago = c[ends[kk - 3]]
+        price_change_15m = ((c[t] - close_15m_3ago) / close_15m_3ago) * 100
+
+    increase = np.r_[False, v[1:] > v[:-1]]
+    consecutive_increase = np.cumprod(np.stack([increase[t - i] for i in range(4)], axis=1), axis=1).sum(axis=1)
+
+    bullish = np.r_[0, np.cumsum(c > o)]
+    bullish_ratio = (bullish[t + 1] - bullish[t - 9]) / 10
+
+    return t, valid, {
+        'volume_5m_ratio': volume_5m_ratio,
+        'volume_15m_ratio': volume_15m_ratio,
+        'volume_surge_ratio': volume_surge_ratio,
+        'price_change_5m': price_change_5m,
+        'price_change_15m': price_change_15m,
+        'consecutive_increase': consecutive_increase,
+        'bullish_ratio': bullish_ratio,
+        'current_price': c[t]
+    }
+
+def daily_volume_arrays(ts, ohlcv, t, daily_ts, daily_ohlcv):
+    """
+    analyze_volume의 시간축 벡터 버전
+    일봉 = 봉 t 이전 마감 일봉 최대 29개 + 오늘 00:00 UTC부터 봉 t까지 누적한 진행 중인 일봉
+    """
+    c, v = ohlcv[:, 3], ohlcv[:, 4]
+    cv = np.r_[0.0, np.cumsum(v)]
+    days = ts // DAY_MS * DAY_MS
+    _, day_starts = segment_starts(days)
+    day_first = day_starts[np.searchsorted(day_starts, t, side='right') - 1]
+    current_volume = cv[t + 1] - cv[day_first]
+
+    # 봉 t 이전 마감 일봉 개수 (오늘 일봉은 마감 전이므로 제외)
+    closed = np.searchsorted(daily_ts, days[t], side='left')
+    valid = np.minimum(closed, DAILY_VOLUME_WINDOW - 1) + 1 >= 20
+    j = np.maximum(closed, 19)
+    daily_close, daily_volume = daily_ohlcv[:, 3], daily_ohlcv[:, 4]
+    dcv = np.r_[0.0, np.cumsum(daily_volume)]
+    current_price = c[t]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        volume_ma_20 = (dcv[j] - dcv[j - 19] + current_volume) / 20
+        volume_ratio = current_volume / volume_ma_20
+
+        volume_ma_7 = (dcv[j] - dcv[j - 6] + current_volume) / 7
+        volume_ma_14 = (dcv[j] - dcv[j - 13] + current_volume) / 14
+        accumulation_index = ((volume_ma_7 - volume_ma_14) / volume_ma_14) * 100
+
+        price_7d_ago = daily_close[j - 7]
+        price_change_7d = np.abs((current_price - price_7d_ago) / price_7d_ago) * 100
+
+        price_change_1d = np.abs((current_price - daily_close[j - 1]) / daily_close[j - 1]) * 100
+        volume_change_1d = ((current_volume - daily_volume[j - 1]) / daily_volume[j - 1]) * 100
+        divergence = np.where(price_change_1d > 0, volume_change_1d / price_change_1d, 0)
+
+    return valid, closed, current_volume, {
+        'volume_ratio': volume_ratio,
+        'accumulation_index': accumulation_index,
+        'price_change_7d': price_change_7d,
+        'divergence': divergence,
+        'current_volume': current_volume,
+        'current_price': current_price
+    }
+
+def row_dict(arrays, row):
+    return {name: values[row] for name, values in arrays.items()}
+
+def backtest_enhanced(market, ts, ohlcv, daily_ts, daily_ohlcv):
+    """5분봉마다 단기/일봉 필터 → 후보 봉만 일봉 지표 + 점수 계산"""
+    if len(ts) < SHORT_TERM_WINDOW or len(daily_ts) == 0:
+        return None
+
+    t, short_valid, short_term = short_term_arrays(ts, ohlcv)
+    daily_valid, closed, current_volume, volume = daily_volume_arrays(ts, ohlcv, t, daily_ts, daily_ohlcv)
+
+    # scan_upbit_market 1~2단계 필터: 조기 감지 OR 일봉 거래량 기준 이상
+    early = short_valid & ((short_term['volume_5m_ratio'] >= 1.5) |
+                           (short_term['price_change_5m'] > 3) |
+                           (short_term['consecutive_increase'] >= 3))
+    candidate = early | (daily_valid & ~(volume['volume_ratio'] < VOLUME_THRESHOLD_WATCH))
+
+    engine = IndicatorEngine()
+    day_ts = ts[t] // DAY_MS * DAY_MS
+    candidate_rows, features = [], []
+    for row in np.flatnonzero(candidate):
+        short_term_data = None
+        if short_valid[row]:
+            short_term_data = row_dict(short_term, row)
+            short_term_data['consecutive_increase'] = int(short_term_data['consecutive_increase'])
+        volume_data = row_dict(volume, row) if daily_valid[row] else None
+
+        # calculate_indicators: 마감 일봉 최대 99개 + 진행 중인 일봉 (50개 이상)
+        indicators = None
+        count = min(closed[row], DAILY_INDICATOR_WINDOW - 1)
+        if count + 1 >= 50:
+            first = closed[row] - count
+            window_ts = np.r_[daily_ts[first:closed[row]], day_ts[row]]
+            close = short_term['current_price'][row]
+            window = np.vstack([daily_ohlcv[first:closed[row]], [close, close, close, close, current_volume[row], 0.0]])
+            try:
+                indicators = engine.indicators(market, window_ts, window)
+            except Exception:
+                indicators = None
+
+        candidate_rows.append(row)
+        features.append(signal_features(volume_data, indicators, None, short_term_data))
+
+    # 후보 봉 전체 일괄 채점
+    rows, scores, levels = [], [], []
+    for row, (score, _, signal_type) in zip(candidate_rows, ENHANCED_SCORER.score_rows(features)):
+        if score >= ENHANCED_ALERT_SCORE:
+            rows.append(t[row])
+            scores.append(score)
+            levels.append(signal_type)
+    return alert_frame(market, 'enhanced', ts, ohlcv[:, 3], rows, scores, levels)
+
+# ============================================
+# 실행
+# ============================================
+
+def backtest_market(path):
+    """마켓 파일 1개 백테스트 → 알림 DataFrame"""
+    market = os.path.basename(path)[:-len('.npz')]
+    data = np.load(path)
+    ts, ohlcv = data['ts5'], data['ohlcv5']
+    frames = [backtest_fast(market, ts, ohlcv),
+              backtest_enhanced(market, ts, ohlcv, data['tsd'], data['ohlcvd'])]
+    frames = [frame for frame in frames if frame is not None and len(frame)]
+    return (pd.concat(frames, ignore_index=True) if frames else None), len(ts)
+
+def run_backtest(paths, workers=None):
+    """마켓 파일들을 프로세스 풀로 병렬 백테스트 → (알림 DataFrame, 재생한 봉 수)"""
+    frames, bars = [], 0
+    with Pool(workers or BACKTEST_WORKERS) as pool:
+        for frame, count in pool.imap_unordered(backtest_market, paths):
+            bars += count
+            if frame is not None:
+                frames.append(frame)
+    alerts = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    return alerts, bars
+
+def summarize(alerts):
+    """전략/점수별 알림 수, 평균 수익률(%), 적중률(%) (수익률 > 왕복 수수료)"""
+    summary = alerts.groupby(['strategy', 'score']).size().rename('alerts').to_frame()
+    for minutes in BACKTEST_HORIZONS:
+        column = f"ret_{minutes}m"
+        grouped = alerts.groupby(['strategy', 'score'])[column]
+        summary[f"avg_{minutes}m%"] = grouped.mean() * 100
+        summary[f"hit_{minutes}m%"] = grouped.apply(lambda r: (r.dropna() > BACKTEST_FEE).mean() * 100)
+    return summary.round(2)
+
+def main():
+    """download / run"""
+    if len(sys.argv) < 3 or sys.argv[1] not in ('download', 'run'):
+        print(__doc__)
+        sys.exit(1)
+
+    data_dir = sys.argv[2]
+    if sys.argv[1] == 'download':
+        os.makedirs(data_dir, exist_ok=True)
+        days = int(sys.argv[3]) if len(sys.argv) > 3 else 90
+        markets = sys.argv[4:] or get_krw_markets(sharded=False)
+        for idx, market in enumerate(markets, 1):
+            try:
+                count = download_market(data_dir, market, days)
+                print(f"💾 [{idx}/{len(markets)}] {market}: 5분봉 {count}개")
+            except Exception as e:
+                print(f"❌ {market} 저장 오류: {e}")
+        return
+
+    output = sys.argv[3] if len(sys.argv) > 3 else 'backtest_alerts.csv'
+    paths = sorted(os.path.join(data_dir, name) for name in os.listdir(data_dir) if name.endswith('.npz'))
+    started = time.monotonic()
+    alerts, bars = run_backtest(paths)
+    print(f"⏱️ {len(paths)}개 마켓, 5분봉 {bars:,}개 {time.monotonic() - started:.1f}초")
+    if alerts.empty:
+        print("알림 없음")
+        return
+
+    alerts.sort_values(['time', 'market']).to_csv(output, index=False)
+    print(f"📄 알림 {len(alerts):,}개 → {output}\n")
+    print(summarize(alerts).to_string())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+업비트 모니터 마이크로벤치마크
+가짜 업비트 시세 API(합성 캔들/현재가/호가)로 지표/점수/메시지/저장 함수 시간을 측정해 JSON으로 저장
+- 네트워크 없음: upbit_api 조회 함수를 합성 데이터로 교체
+- 캐시는 미리 채워 두고 데몬 모드처럼 새 봉만 받는 상태에서 측정
+
+사용법:
+    python upbit_benchmark.py benchmark.json               # 마켓 50/200/1000개
+    python upbit_benchmark.py benchmark.json 50,200 3      # 마켓 수, 반복 횟수 지정
+    python upbit_benchmark.py compare old.json new.json    # 두 결과 비교 (new/old 배율)
+"""
+
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from datetime import datetime, timezone
+
+import numpy as np
+
+import upbit_api
+import upbit_orderbook
+from upbit_api import INTERVALS
+from upbit_candles import CANDLE_CACHE, DAILY_STORE
+from upbit_prescreen import TICKER_SCREEN
+from upbit_trades import TRADE_TAPE
+from upbit_journal import SHEETS, SignalJournal
+from upbit_orderbook import summarize_orderbook
+import upbit_fast_detector as fast
+import upbit_monitor_enhanced as enhanced
+
+BENCH_MARKETS = [50, 200, 1000]
+BENCH_REPEAT = 5
+FIXTURE_CANDLES = 200  # 마켓별 합성 캔들 개수 (캔들 API 1회 최대)
+ORDERBOOK_DEPTH = 15
+
+# ============================================
+# 합성 시세 API
+# ============================================
+
+def format_candle_time(ms):
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%S')
+
+class FakeUpbit:
+    """업비트 시세 API 응답 형식의 합성 데이터 (마켓별 난수 시드 고정)"""
+
+    def __init__(self, markets):
+        self.markets = list(markets)
+        self.series = {}
+
+    def bars(self, market, interval):
+        """마켓/간격별 합성 봉 (ts, ohlcv) - 마지막 봉이 현재 진행 중인 봉"""
+        key = (market, interval)
+        if key not in self.series:
+            _, interval_ms = INTERVALS[interval]
+            rng = np.random.default_rng(zlib.crc32(f"{market}/{interval}".encode()))
+            last = int(time.time() * 1000) // interval_ms * interval_ms
+            ts = last - np.arange(FIXTURE_CANDLES)[::-1] * interval_ms
+            close = 1000 * np.exp(np.cumsum(rng.normal(0, 0.01, FIXTURE_CANDLES)))
+            open_ = np.r_[close[0], close[:-1]]
+            high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.01, FIXTURE_CANDLES))
+            low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.01, FIXTURE_CANDLES))
+            volume = rng.lognormal(8, 0.8, FIXTURE_CANDLES)
+            self.series[key] = (ts, np.stack([open_, high, low, close, volume, volume * close], axis=1))
+        return self.series[key]
+
+    def candles(self, market, interval, count, to=None):
+        """캔들 API 원본 (최신순)"""
+        ts, ohlcv = self.bars(market, interval)
+        return [{
+            'market': market,
+            'candle_date_time_utc': format_candle_time(ts[i]),
+            'opening_price': ohlcv[i, 0], 'high_price': ohlcv[i, 1], 'low_price': ohlcv[i, 2],
+            'trade_price': ohlcv[i, 3], 'candle_acc_trade_volume': ohlcv[i, 4],
+            'candle_acc_trade_price': ohlcv[i, 5],
+        } for i in range(len(ts) - 1, max(len(ts) - count, 0) - 1, -1)]
+
+    def tickers(self, markets):
+        """현재가 API 원본 (오늘 진행 중인 일봉)"""
+        result = []
+        for market in markets:
+            ts, ohlcv = self.bars(market, 'day')
+            result.append({
+                'market': market,
+                'trade_date': datetime.fromtimestamp(ts[-1] / 1000, tz=timezone.utc).strftime('%Y%m%d'),
+                'opening_price': ohlcv[-1, 0], 'high_price': ohlcv[-1, 1], 'low_price': ohlcv[-1, 2],
+                'trade_price': ohlcv[-1, 3], 'acc_trade_volume': ohlcv[-1, 4], 'acc_trade_price': ohlcv[-1, 5],
+                'acc_trade_price_24h': ohlcv[-2:, 5].mean(),
+            })
+        return result
+
+    def orderbook(self, markets):
+        """호가 API 원본"""
+        result = []
+        for market in markets:
+            rng = np.random.default_rng(zlib.crc32(market.encode()))
+            price = self.bars(market, 'minute5')[1][-1, 3]
+            result.append({'market': market, 'orderbook_units': [{
+                'ask_price': price * (1 + 0.001 * (i + 1)), 'bid_price': price * (1 - 0.001 * (i + 1)),
+                'ask_size': float(size_ask), 'bid_size': float(size_bid),
+            } for i, (size_ask, size_bid) in enumerate(rng.lognormal(3, 1, (ORDERBOOK_DEPTH, 2)))]})
+        return result
+
+    def trades(self, market, count, cursor=None):
+        """체결 API 원본 (최신순, 마켓별 초당 1건, 체결 번호 = 초)"""
+        newest = (cursor - 1) if cursor else int(time.time())
+        result = []
+        for second in range(newest, newest - count, -1):
+            seed = zlib.crc32(f"{market}/{second}".encode())
+            result.append({
+                'market': market, 'timestamp': second * 1000, 'sequential_id': second,
+                'trade_price': self.bars(market, 'minute5')[1][-1, 3], 'trade_volume': (seed % 1000) / 100,
+                'ask_bid': 'BID' if seed % 5 < 3 else 'ASK',
+            })
+        return result
+
+    def market_list(self):
+        """전체 마켓 API 원본"""
+        return [{'market': market} for market in self.markets]
+
+    def install(self):
+        """시세 조회 함수를 합성 데이터로 교체"""
+        CANDLE_CACHE.fetch = self.candles
+        DAILY_STORE.fetch = self.candles
+        DAILY_STORE.fetch_ticker = self.tickers
+        TICKER_SCREEN.fetch = self.tickers
+        upbit_orderbook.fetch_orderbook = self.orderbook
+        TRADE_TAPE.fetch = self.trades
+        upbit_api.fetch_markets = self.market_list
+
+# ============================================
+# 측정
+# ============================================
+
+def measure(name, markets, func, calls, repeat):
+    """func()를 repeat회 실행한 시간 → 결과 dict (calls: func 1회당 처리 건수)"""
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - started)
+    best = min(times)
+    return {
+        'name': name,
+        'markets': markets,
+        'calls': calls,
+        'repeat': repeat,
+        'min_s': best,
+        'median_s': statistics.median(times),
+        'per_call_us': best / calls * 1e6 if calls else None,
+    }
+
+def bench_markets(count, repeat, workdir):
+    """마켓 count개 기준 전 항목 측정"""
+    markets = [f"KRW-B{i:04d}" for i in range(count)]
+    FakeUpbit(markets).install()
+
+    # 캐시/일봉/지표 상태 미리 채우기 (데몬 모드의 두 번째 스캔부터와 같은 상태)
+    DAILY_STORE.refresh_forming(markets)
+    for market in markets:
+        CANDLE_CACHE.get_arrays(market, "minute5", 100)
+        enhanced.calculate_indicators(market)
+
+    blocks = [fast.fetch_surge_candles(market) for market in markets]
+    surge = fast.compute_surge_features_batch(blocks)
+    orderbooks = upbit_orderbook.fetch_orderbooks(markets)
+    ob_data = [summarize_orderbook(orderbooks.get(market)) for market in markets]
+    short_term = [enhanced.analyze_short_term_volume(market) for market in markets]
+    volume = [enhanced.analyze_volume(market) for market in markets]
+    indicators = [enhanced.calculate_indicators(market) for market in markets]
+    fast_scores = [fast.evaluate_fast_signal(s, o) for s, o in zip(surge, ob_data)]
+    enhanced_scores = [enhanced.calculate_signal_strength(v, i, o, s)
+                       for v, i, o, s in zip(volume, indicators, ob_data, short_term)]
+    rows = list(zip(markets, surge, ob_data, short_term, volume, indicators, fast_scores, enhanced_scores))
+
+    # 저널/엑셀은 임시 폴더에 (알림 점수와 무관하게 모든 마켓을 1건씩 저장)
+    fast.SIGNAL_JOURNAL = SignalJournal(os.path.join(workdir, f"fast_{count}.db"), SHEETS['fast']['table'])
+    fast.EXCEL_FILE = os.path.join(workdir, f"fast_{count}.xlsx")
+    enhanced.SIGNAL_JOURNAL = SignalJournal(os.path.join(workdir, f"enhanced_{count}.db"), SHEETS['enhanced']['table'])
+    enhanced.EXCEL_FILE = os.path.join(workdir, f"enhanced_{count}.xlsx")
+
+    def save_fast():
+        for market, s, _, _, _, _, (score, _, level), _ in rows:
+            fast.save_fast_signal(market, score, s, level)
+
+    def save_enhanced():
+        for market, _, o, st, v, ind, _, (score, _, signal_type) in rows:
+            enhanced.save_to_excel(market, score, v, ind, o, st, signal_type)
+
+    def export(module):
+        module.SIGNAL_JOURNAL.unexported = 1
+        module.export_signals()
+
+    # 메시지 함수는 알림 기준 점수 이상일 때만 메시지를 만들므로 점수를 기준 이상으로 고정
+    benches = [
+        ('detect_price_surge', lambda: [fast.detect_price_surge(m) for m in markets], count),
+        ('compute_surge_features_batch', lambda: fast.compute_surge_features_batch(blocks), count),
+        ('analyze_short_term_volume', lambda: [enhanced.analyze_short_term_volume(m) for m in markets], count),
+        ('calculate_indicators', lambda: [enhanced.calculate_indicators(m) for m in markets], count),
+        ('evaluate_fast_signal', lambda: [fast.evaluate_fast_signal(r[1], r[2]) for r in rows], count),
+        ('calculate_signal_strength', lambda: [enhanced.calculate_signal_strength(r[4], r[5], r[2], r[3]) for r in rows], count),
+        ('score_rows_fast', lambda: fast.FAST_SCORER.score_rows([fast.fast_features(r[1], r[2]) for r in rows]), count),
+        ('score_rows_enhanced', lambda: enhanced.ENHANCED_SCORER.score_rows([enhanced.signal_features(r[4], r[5], r[2], r[3]) for r in rows]), count),
+        ('format_fast_alert', lambda: [fast.format_fast_alert(r[0], 8, r[6][1], r[1], r[2], r[6][2]) for r in rows], count),
+        ('format_telegram_message', lambda: [enhanced.format_telegram_message(r[0], 8, r[7][1], r[4], r[5], r[2], r[3], r[7][2]) for r in rows], count),
+        ('save_fast_signal', save_fast, count),
+        ('flush_signals_fast', lambda: (save_fast(), fast.flush_signals()), count),
+        ('export_signals_fast', lambda: export(fast), 1),
+        ('save_to_excel', save_enhanced, count),
+        ('flush_signals_enhanced', lambda: (save_enhanced(), enhanced.flush_signals()), count),
+        ('export_signals_enhanced', lambda: export(enhanced), 1),
+    ]
+    results = []
+    for name, func, calls in benches:
+        results.append(measure(name, count, func, calls, repeat))
+        print(f"  {name:30s} {results[-1]['min_s'] * 1000:10.2f} ms")
+    # 저장 함수 측정 중 쌓인 미커밋 행 정리
+    fast.SIGNAL_JOURNAL.pending.clear()
+    enhanced.SIGNAL_JOURNAL.pending.clear()
+    return results
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+def run_benchmarks(counts=None, repeat=BENCH_REPEAT):
+    """마켓 수별 측정 → JSON으로 저장할 dict"""
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for count in counts or BENCH_MARKETS:
+            print(f"📊 마켓 {count}개")
+            results.extend(bench_markets(count, repeat, workdir))
+    return {
+        'commit': git_commit(),
+        'time': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'results': results,
+    }
+
+def compare(old_path, new_path):
+    """두 결과 파일의 항목별 min_s 배율 (new / old, 1보다 크면 느려짐)"""
+    with open(old_path) as f:
+        old = {(r['name'], r['markets']): r for r in json.load(f)['results']}
+    with open(new_path) as f:
+        new = json.load(f)['results']
+    for r in new:
+        base = old.get((r['name'], r['markets']))
+        if base and base['min_s'] > 0:
+            ratio = r['min_s'] / base['min_s']
+            flag = " ⚠️" if ratio > 1.2 else ""
+            print(f"{r['name']:30s} {r['markets']:5d} {base['min_s'] * 1000:10.2f} → {r['min_s'] * 1000:10.2f} ms  x{ratio:.2f}{flag}")
+
+def main():
+    """측정 / 비교"""
+    if len(sys.argv) > 1 and sys.argv[1] == 'compare':
+        if len(sys.argv) < 4:
+            print(__doc__)
+            sys.exit(1)
+        compare(sys.argv[2], sys.argv[3])
+        return
+
+    output = sys.argv[1] if len(sys.argv) > 1 else 'benchmark.json'
+    counts = [int(c) for c in sys.argv[2].split(',')] if len(sys.argv) > 2 else BENCH_MARKETS
+    repeat = int(sys.argv[3]) if len(sys.argv) > 3 else BENCH_REPEAT
+    report = run_benchmarks(counts, repeat)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"📄 {len(report['results'])}개 결과 → {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+업비트 캔들 캐시 모듈
+(마켓, 봉 간격)별 링버퍼에 캔들을 보관하고, 스캔마다 새로 생긴 봉만 추가 조회
+"""
+
+import numpy as np
+import threading
+import time
+from datetime import datetime, timezone
+import os
+
+from upbit_api import INTERVALS, MAX_CANDLE_COUNT, fetch_candles, fetch_tickers
+
+# 링버퍼 크기 (업비트 캔들 API 1회 최대 200개)
+CANDLE_CACHE_SIZE = int(os.environ.get('CANDLE_CACHE_SIZE', '200'))
+
+# OHLCV 컬럼 순서 (pyupbit.get_ohlcv와 동일)
+COLUMNS = ['open', 'high', 'low', 'close', 'volume', 'value']
+RAW_FIELDS = ['opening_price', 'high_price', 'low_price', 'trade_price',
+              'candle_acc_trade_volume', 'candle_acc_trade_price']
+
+KST_OFFSET_MS = 9 * 60 * 60 * 1000
+
+# ============================================
+# 캔들 변환
+# ============================================
+
+def parse_trade_date(text):
+    """'20251122' (UTC 날짜) → 그날 00:00 UTC epoch ms"""
+    dt = datetime.strptime(text, "%Y%m%d").replace(tzinfo=timezone.utc)
+    return int(dt.timestamp() * 1000)
+
+def candles_to_arrays(candles):
+    """캔들 원본(최신순) → 시간순 (ts int64, ohlcv float64 N×6) - 시각은 datetime64로 일괄 변환"""
+    ts = np.array([c['candle_date_time_utc'] for c in candles], dtype='datetime64[ms]').astype(np.int64)
+    ohlcv = np.array([[c[f] for f in RAW_FIELDS] for c in candles], dtype=np.float64).reshape(-1, 6)
+    order = np.argsort(ts, kind='stable')
+    return ts[order], ohlcv[order]
+
+def arrays_to_frame(ts, ohlcv):
+    """pyupbit.get_ohlcv와 같은 형태의 DataFrame (KST 인덱스) - pandas는 여기서만 불러옴"""
+    import pandas as pd
+    index = pd.to_datetime(ts + KST_OFFSET_MS, unit='ms')
+    return pd.DataFrame(ohlcv, index=index, columns=COLUMNS)
+
+# ============================================
+# 링버퍼
+# ============================================
+
+class CandleRing:
+    """고정 크기 캔들 링버퍼 (가장 오래된 봉부터 덮어씀)"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.ts = np.zeros(capacity, dtype=np.int64)
+        self.ohlcv = np.zeros((capacity, 6), dtype=np.float64)
+        self.start = 0
+        self.size = 0
+        self.exhausted = False  # 상장 직후 등으로 더 과거 봉이 없음
+
+    def last_ts(self):
+        return int(self.ts[self.last_pos()]) if self.size else None
+
+    def merge(self, ts, ohlcv):
+        """새 봉 병합: 새 데이터의 첫 봉 시각 이후 캐시 봉은 교체 (진행 중인 봉 갱신)"""
+        if len(ts) == 0:
+            return
+        while self.size and self.last_ts() >= ts[0]:
+            self.size -= 1
+        for i in range(len(ts)):
+            pos = (self.start + self.size) % self.capacity
+            self.ts[pos] = ts[i]
+            self.ohlcv[pos] = ohlcv[i]
+            if self.size < self.capacity:
+                self.size += 1
+            else:
+                self.start = (self.start + 1) % self.capacity
+
+    def last_pos(self):
+        """마지막 봉의 버퍼 위치"""
+        return (self.start + self.size - 1) % self.capacity
+
+    def tail(self, count):
+        """최근 count개 봉 (시간순 복사본)"""
+        n = min(count, self.size)
+        idx = (self.start + self.size - n + np.arange(n)) % self.capacity
+        return self.ts[idx], self.ohlcv[idx]
+
+# ============================================
+# 캔들 캐시
+# ============================================
+
+class CandleCache:
+    """(마켓, 봉 간격)별 링버퍼 캐시 + 증분 갱신"""
+
+    def __init__(self, capacity=CANDLE_CACHE_SIZE, fetch=fetch_candles):
+        self.capacity = min(capacity, MAX_CANDLE_COUNT)
+        self.fetch = fetch
+        self.rings = {}
+        self.lock = threading.Lock()
+        self.stats = {'requests': 0, 'candles': 0}
+        self.max_age = 0.0  # 갱신한 지 이 초 안이면 재조회 없이 캐시 사용 (공용 스캔 코어가 설정)
+        self.refreshed = {}  # (마켓, 봉 간격) → 마지막 갱신 시각 (monotonic)
+
+    def ring(self, market, interval):
+        with self.lock:
+            key = (market, interval)
+            if key not in self.rings:
+                self.rings[key] = CandleRing(self.capacity)
+            return self.rings[key]
+
+    def missing_count(self, ring, interval, now_ms=None):
+        """마지막 캐시 봉(진행 중일 수 있음)부터 현재까지 봉 개수"""
+        _, interval_ms = INTERVALS[interval]
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        # 시계 오차 대비 1개 여유
+        return max(int((now_ms - ring.last_ts()) // interval_ms) + 2, 1)
+
+    def refresh(self, market, interval, count):
+        """캐시 갱신: 처음엔 count개 전체, 이후엔 새 봉 + 진행 중인 봉만 조회"""
+        ring = self.ring(market, interval)
+        full = ring.size == 0 or (ring.size < count and not ring.exhausted)
+        if not full and self.max_age and \
+                time.monotonic() - self.refreshed.get((market, interval), float('-inf')) < self.max_age:
+            return ring
+        if not full:
+            request_count = self.missing_count(ring, interval)
+            # 오래 갱신하지 않아 빈 구간이 요청 개수보다 길면 전체 재조회
+            full = request_count >= count
+        if full:
+            request_count = max(count, 1)
+
+        candles = self.fetch(market, interval, request_count)
+        self.stats['requests'] += 1
+        self.stats['candles'] += len(candles)
+
+        ts, ohlcv = candles_to_arrays(candles)
+        with self.lock:
+            if full:
+                ring.size = 0
+                ring.exhausted = len(ts) < request_count
+            ring.merge(ts, ohlcv)
+            self.refreshed[(market, interval)] = time.monotonic()
+        return ring
+
+    def last_time(self, market, interval):
+        """캐시의 마지막 봉 시작 시각 (epoch ms, 없으면 None) - 재조회 없음"""
+        with self.lock:
+            ring = self.rings.get((market, interval))
+            return ring.last_ts() if ring is not None else None
+
+    def get_arrays(self, market, interval, count):
+        """최근 count개 봉 (ts, ohlcv) - 증분 갱신 후"""
+        ring = self.refresh(market, interval, count)
+        with self.lock:
+            return ring.tail(count)
+
+# ============================================
+# 일봉 저장소
+# ============================================
+
+DAILY_HISTORY = int(os.environ.get('DAILY_HISTORY', '100'))  # 보관할 일봉 개수
+TICKER_CHUNK_SIZE = 100  # 현재가 요청 1회당 마켓 수
+FORMING_MAX_AGE = 60  # 진행 중 일봉이 이보다 오래되면 단건 재조회 (초)
+
+def utc_day_start(ms):
+    """UTC 00:00 (업비트 일봉 경계) ms"""
+    return ms // INTERVALS['day'][1] * INTERVALS['day'][1]
+
+class DailyCandleStore:
+    """
+    일봉 공용 저장소
+    - 마감된 일봉: 마켓별로 UTC 하루 한 번만 조회
+    - 오늘 진행 중인 일봉: 스캔마다 현재가(ticker) 일괄 조회로 전 마켓 갱신
+    """
+
+    def __init__(self, history=DAILY_HISTORY, fetch=fetch_candles, fetch_ticker=fetch_tickers):
+        self.history = min(history, MAX_CANDLE_COUNT - 1)
+        self.fetch = fetch
+        self.fetch_ticker = fetch_ticker
+        self.closed = {}  # 마켓 → (UTC 날짜 시작 ms, ts, ohlcv)
+        self.forming = {}  # 마켓 → (갱신 시각, ts, ohlcv 1×6)
+        self.lock = threading.Lock()
+        self.stats = {'requests': 0, 'candles': 0}
+
+    def refresh_forming(self, markets, now_ms=None):
+        """진행 중인 일봉을 현재가 API로 일괄 갱신 (100개 마켓당 요청 1회)"""
+        markets = list(markets)
+        for i in range(0, len(markets), TICKER_CHUNK_SIZE):
+            self.apply_tickers(self.fetch_ticker(markets[i:i + TICKER_CHUNK_SIZE]), now_ms)
+            self.stats['requests'] += 1
+
+    def apply_tickers(self, tickers, now_ms=None):
+        """이미 받은 현재가 원본으로 진행 중인 일봉 갱신 (사전 선별과 요청 공유)"""
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        today = utc_day_start(now_ms)
+        with self.lock:
+            for t in tickers:
+                # trade_date(UTC)가 오늘이 아니면 오늘 체결이 없어 일봉도 없음
+                ts = parse_trade_date(t['trade_date'])
+                if ts != today:
+                    self.forming[t['market']] = (now_ms, np.zeros(0, dtype=np.int64), np.zeros((0, 6)))
+                    continue
+                bar = np.array([[t['opening_price'], t['high_price'], t['low_price'], t['trade_price'],
+                                 t['acc_trade_volume'], t['acc_trade_price']]], dtype=np.float64)
+                self.forming[t['market']] = (now_ms, np.array([ts], dtype=np.int64), bar)
+
+    def load_closed(self, market, today):
+        """마감 일봉 조회 (오늘 봉 포함 history+1개 조회 후 오늘 봉 분리)"""
+        candles = self.fetch(market, 'day', self.history + 1)
+        self.stats['requests'] += 1
+        self.stats['candles'] += len(candles)
+        ts, ohlcv = candles_to_arrays(candles)
+        closed = ts < today
+        with self.lock:
+            self.closed[market] = (today, ts[closed], ohlcv[closed])
+            self.forming[market] = (int(time.time() * 1000), ts[~closed], ohlcv[~closed])
+
+    def get_arrays(self, market, count, now_ms=None):
+        """최근 count개 일봉 (마감 봉 + 오늘 진행 중인 봉)"""
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        today = utc_day_start(now_ms)
+
+        loaded = self.closed.get(market)
+        if loaded is None or loaded[0] != today:
+            self.load_closed(market, today)
+        else:
+            forming = self.forming.get(market)
+            if forming is None or now_ms - forming[0] > FORMING_MAX_AGE * 1000:
+                # 일괄 갱신이 없었으면 오늘 봉만 단건 조회
+                ts, ohlcv = candles_to_arrays(self.fetch(market, 'day', 1))
+                self.stats['requests'] += 1
+                self.stats['candles'] += len(ts)
+                today_bar = ts >= today
+                with self.lock:
+                    self.forming[market] = (now_ms, ts[today_bar], ohlcv[today_bar])
+
+        with self.lock:
+            _, ts, ohlcv = self.closed[market]
+            forming = self.forming.get(market)
+            if forming is not None and len(forming[1]) and forming[1][0] >= today:
+                ts = np.concatenate([ts, forming[1]])
+                ohlcv = np.concatenate([ohlcv, forming[2]])
+        return ts[-count:], ohlcv[-count:]
+
+# 프로세스 공용 캐시 (두 스캐너가 같은 캐시를 공유)
+CANDLE_CACHE = CandleCache()
+DAILY_STORE = DailyCandleStore()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+업비트 통합 스캔 (초단타 + Enhanced 공용 데이터)
+한 회차에 마켓별 데이터를 한 번만 받아 두 전략에 나눠 줌
+- 마켓 목록 / 현재가 (+ 사전 선별, 진행 중 일봉 갱신): 회차당 1번
+- 5분봉: 두 전략이 스캔할 코인 합집합을 한 번에 받아 캔들 캐시에 채움 (이후 두 전략은 캐시만 읽음)
+- 호가: 두 전략 후보 합집합을 묶음 요청 한 번으로 조회
+- 임계값/등급/재알림 기록/저널/엑셀은 전략별로 따로 유지 (각 스크립트 설정 그대로)
+
+사용법:
+    python upbit_combined.py    # RUN_MODE=once(기본) / daemon
+"""
+
+from upbit_metrics import METRICS
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from upbit_api import get_krw_markets
+from upbit_scheduler import run_forever
+from upbit_prescreen import PRESCREEN, TICKER_SCREEN
+from upbit_snapshot import load_snapshot, save_snapshot
+from upbit_candles import CANDLE_CACHE, DAILY_STORE
+from upbit_telegram import TELEGRAM, require_telegram, send_telegram, queue_telegram
+from upbit_orderbook import fetch_orderbooks
+from upbit_trades import TRADE_TAPE
+import upbit_fast_detector as fast
+import upbit_monitor_enhanced as enhanced
+
+SCAN_INTERVAL = int(os.environ.get('SCAN_INTERVAL', '120'))
+RUN_MODE = os.environ.get('RUN_MODE', 'once')  # once(1회 스캔) / daemon(SCAN_INTERVAL마다 반복)
+SCAN_OFFSET = int(os.environ.get('SCAN_OFFSET', '5'))
+SCAN_CONCURRENCY = int(os.environ.get('SCAN_CONCURRENCY', '8'))  # 5분봉 동시 요청 수
+
+# 두 전략이 쓰는 5분봉 개수 중 큰 쪽 (초단타 SURGE_WINDOW, Enhanced 100개)
+SHARED_WINDOW = max(fast.SURGE_WINDOW, 100)
+
+# 이번 회차에 받은 봉/체결은 회차 안에서 재조회하지 않음 (두 전략 후보가 겹쳐도 1번만)
+REUSE_MAX_AGE = SCAN_INTERVAL / 2
+
+# 스냅샷에 함께 저장할 상태 (전략별 등급/알림 기록)
+SNAPSHOT_STATES = {
+    'fast_tiers': fast.TIERS, 'fast_alerts': fast.ALERTS,
+    'enhanced_tiers': enhanced.TIERS, 'enhanced_alerts': enhanced.ALERTS,
+}
+
+# ============================================
+# 공용 데이터 수집
+# ============================================
+
+def screen_tickers(markets):
+    """현재가 일괄 조회 → 진행 중 일봉 갱신 + 사전 선별 (미사용/실패 시 None)"""
+    try:
+        with METRICS.timer('daily'):
+            ticker_rows = TICKER_SCREEN.fetch_all(markets)
+            DAILY_STORE.apply_tickers(ticker_rows)
+        if PRESCREEN:
+            with METRICS.timer('prescreen'):
+                return TICKER_SCREEN.screen(ticker_rows)
+    except Exception as e:
+        METRICS.error('prescreen', e)
+        print(f"❌ 현재가 일괄 조회 오류: {e}")
+    return None
+
+def prefetch_candles(coin):
+    """5분봉 SHARED_WINDOW개를 캐시에 채움 (실패해도 각 전략이 다시 시도)"""
+    try:
+        CANDLE_CACHE.get_arrays(coin, "minute5", SHARED_WINDOW)
+    except Exception as e:
+        METRICS.error('candles', e)
+        print(f"5분봉 조회 오류 ({coin}): {e}")
+
+def union(*groups):
+    """순서를 유지한 합집합"""
+    return list(dict.fromkeys(coin for group in groups for coin in group))
+
+# ============================================
+# 통합 스캔
+# ============================================
+
+@contextmanager
+def reuse_fetched(max_age=REUSE_MAX_AGE):
+    """스캔하는 동안만 캔들 캐시/체결 집계의 max_age 설정 (끝나면 원래 값으로, 공용 객체를 쓰는 다른 코드에 영향 없음)"""
+    saved = CANDLE_CACHE.max_age, TRADE_TAPE.max_age
+    CANDLE_CACHE.max_age = TRADE_TAPE.max_age = max_age
+    try:
+        yield
+    finally:
+        CANDLE_CACHE.max_age, TRADE_TAPE.max_age = saved
+
+def combined_scan():
+    """두 전략 1회차 스캔 (데이터는 한 번만 조회)"""
+    print(f"\n⚡ 통합 스캔: {fast.get_kst_now().strftime('%Y-%m-%d %H:%M:%S')}")
+    METRICS.start_scan()
+
+    with METRICS.timer('markets'):
+        markets = get_krw_markets()
+        passed = screen_tickers(markets)
+    # 전략별 등급 순번(hot 전부 + 차례가 된 cold) + 사전 선별 통과 코인 (사전 선별을 안 쓰면 순번만)
+    passed = passed if passed is not None else set()
+    fast_due = fast.select_scan_markets(markets, passed)
+    enhanced_due = enhanced.select_scan_markets(markets, passed)
+    scanned = union(fast_due, enhanced_due)
+
+    with METRICS.timer('candles'):
+        with ThreadPoolExecutor(SCAN_CONCURRENCY) as pool:
+            list(pool.map(prefetch_candles, scanned))
+
+    # 전략별 후보 선별 (캐시만 읽음, 일봉 마감 봉은 Enhanced가 필요할 때만 조회)
+    fast_candidates = fast.screen_markets(fast_due)
+    enhanced_candidates = enhanced.screen_markets(enhanced_due)
+
+    with METRICS.timer('orderbook'):
+        orderbooks = fetch_orderbooks(union([coin for coin, _ in fast_candidates],
+                                            [coin for coin, _, _ in enhanced_candidates]))
+
+    fast_signals, critical_count = fast.handle_candidates(fast_candidates, orderbooks)
+    enhanced_signals, early_count = enhanced.handle_candidates(enhanced_candidates, orderbooks)
+    fast.flush_signals()
+    enhanced.flush_signals()
+
+    print(f"✅ 초단타 {fast_signals}개 (긴급 {critical_count}개) / Enhanced {enhanced_signals}개 (조기감지 {early_count}개)")
+    METRICS.end_scan('combined', len(scanned))
+
+# ============================================
+# 메인 실행
+# ============================================
+
+def run_scan():
+    """통합 스캔 1회 후 전략별 엑셀 내보내기 + 상태 저장"""
+    with reuse_fetched():
+        combined_scan()
+    fast.export_signals()
+    enhanced.export_signals()
+    save_snapshot(states=SNAPSHOT_STATES)
+
+def main():
+    """메인"""
+    require_telegram()
+    print("""
+    ╔══════════════════════════════════════╗
+    ║   업비트 통합 스캔 (초단타+Enhanced) ║
+    ╚══════════════════════════════════════╝
+    """)
+
+    queue_telegram("⚡ 업비트 통합 스캔 시작! (초단타 + Enhanced)")
+
+    # 이전 실행의 캔들 캐시/일봉/현재가 스냅샷/전략별 등급·알림 기록 복원
+    load_snapshot(states=SNAPSHOT_STATES)
+
+    try:
+        if RUN_MODE == 'daemon':
+            print(f"🔁 데몬 모드: {SCAN_INTERVAL}초 주기")
+            run_forever(run_scan, SCAN_INTERVAL, SCAN_OFFSET)
+        else:
+            run_scan()
+
+    except KeyboardInterrupt:
+        fast.flush_signals()
+        enhanced.flush_signals()
+        fast.export_signals()
+        enhanced.export_signals()
+        print("\n🛑 통합 스캔 중지됨")
+        send_telegram("🛑 업비트 통합 스캔 종료")
+
+    finally:
+        # 남은 알림 발송 후 종료
+        TELEGRAM.close()
+
+if __name__ == "__main__":
+    main()
@@ -5,17 +5,28 @@
 5분봉 중심 실시간 모니터링 - 급등 순간 포착
 """
 
-import pyupbit
-import pandas as pd
+from upbit_metrics import METRICS
 import numpy as np
-import requests
-import time
+import asyncio
 from datetime import datetime, timedelta
 import pytz
-from openpyxl import Workbook, load_workbook
-from openpyxl.styles import Font, PatternFill, Alignment
 import warnings
 import os
+from upbit_api import get_krw_markets
+from upbit_scheduler import run_forever
+from upbit_tiers import MarketTiers, TIER_COLD_EVERY, TIER_FILE
+from upbit_prescreen import PRESCREEN, TICKER_SCREEN
+from upbit_alerts import AlertHistory, ALERT_COOLDOWN
+from upbit_shard import shard_path
+from upbit_snapshot import SNAPSHOT_FILE, load_snapshot, save_snapshot
+from upbit_candles import CANDLE_CACHE
+from upbit_stream import LiveBarBuilder, stream_messages
+from upbit_trades import TRADE_TAPE, TRADE_INTENSITY_THRESHOLD, with_trade_pressure
+from upbit_telegram import TELEGRAM, require_telegram, send_telegram, queue_telegram
+from upbit_journal import SHEETS, SignalJournal, export_excel
+from upbit_rules import RuleSet, load_rules
+from upbit_orderbook import (fetch_orderbooks, fetch_orderbook_chunk, chunk_markets, summarize_orderbook, analyze_orderbook,
+                             depth_pressure, with_depth_changes, ORDERBOOK_HISTORY)
 warnings.filterwarnings('ignore')
 
 # ============================================
@@ -31,52 +42,48 @@ def get_kst_now():
 # 환경변수 설정
 # ============================================
 
-BOT_TOKEN = os.environ.get('BOT_TOKEN', '')
-CHAT_ID = os.environ.get('CHAT_ID', '')
-
-# 🔥 초단타 전용 설정
+# 🔥 초단타 전용 설정 (텔레그램 BOT_TOKEN/CHAT_ID는 upbit_telegram에서 불러옴)
 SCAN_INTERVAL = int(os.environ.get('SCAN_INTERVAL', '120'))  # 2분 스캔
 FAST_SCAN_MODE = True  # 빠른 스캔 모드
 
+# 비동기 스캔 설정
+ASYNC_SCAN = os.environ.get('ASYNC_SCAN', '1') == '1'  # 0이면 기존 순차 스캔
+SCAN_CONCURRENCY = int(os.environ.get('SCAN_CONCURRENCY', '8'))  # 동시 요청 수
+
+# 실행 모드: once(1회 스캔) / daemon(SCAN_INTERVAL마다 반복) / stream(WebSocket 실시간 감지)
+RUN_MODE = os.environ.get('RUN_MODE', 'once')
+SCAN_OFFSET = int(os.environ.get('SCAN_OFFSET', '5'))  # 데몬: 주기 경계 후 몇 초 뒤 스캔
+STREAM_ALERT_COOLDOWN = int(os.environ.get('STREAM_ALERT_COOLDOWN', '300'))  # 같은 코인 재알림 간격 (초)
+
 # 민감도 설정 (더 낮게)
 VOLUME_SPIKE_THRESHOLD = float(os.environ.get('VOLUME_SPIKE_THRESHOLD', '1.8'))  # 1.8배면 알림
 PRICE_CHANGE_THRESHOLD = float(os.environ.get('PRICE_CHANGE_THRESHOLD', '2.5'))  # 2.5% 상승
 CONSECUTIVE_THRESHOLD = int(os.environ.get('CONSECUTIVE_THRESHOLD', '2'))  # 2회 연속
 
-EXCEL_FILE = os.environ.get('EXCEL_FILE', 'upbit_fast_signals.xlsx')
+EXCEL_FILE = shard_path(os.environ.get('EXCEL_FILE', 'upbit_fast_signals.xlsx'))
+JOURNAL_FILE = shard_path(os.environ.get('JOURNAL_FILE', 'upbit_fast_signals.db'))
 
-# 설정 확인
-if not BOT_TOKEN or not CHAT_ID:
-    try:
-        from config import BOT_TOKEN as CONFIG_BOT_TOKEN
-        from config import CHAT_ID as CONFIG_CHAT_ID
-        BOT_TOKEN = CONFIG_BOT_TOKEN
-        CHAT_ID = CONFIG_CHAT_ID
-    except ImportError:
-        print("❌ 텔레그램 설정이 없습니다!")
-        exit(1)
+# 신호 저널 (스캔 중에는 추가만, 엑셀은 스캔 후 생성)
+SIGNAL_JOURNAL = SignalJournal(JOURNAL_FILE, SHEETS['fast']['table'])
 
-# ============================================
-# 텔레그램 전송
-# ============================================
+# 마켓 등급 (hot: 매 회차, cold: TIER_COLD_EVERY회차마다) - 상태가 유지되는 데몬 / TIER_FILE / SNAPSHOT_FILE 지정 시에만 사용
+TIERS = MarketTiers(SCAN_INTERVAL, TIER_COLD_EVERY if RUN_MODE == 'daemon' or TIER_FILE or SNAPSHOT_FILE else 1,
+                    path=TIER_FILE or None)
 
-def send_telegram(message, parse_mode=None):
-    """텔레그램 메시지 전송"""
-    try:
-        url = f"https://api.telegram.org/bot{BOT_TOKEN}/sendMessage"
-        data = {"chat_id": CHAT_ID, "text": message}
-        if parse_mode:
-            data["parse_mode"] = parse_mode
-        response = requests.post(url, data=data, timeout=10)
-        return response.json()
-    except Exception as e:
-        print(f"텔레그램 전송 실패: {e}")
-        return None
+# 코인별 재알림 제한 (쿨다운 안에서는 레벨이 올라갈 때만)
+ALERT_LEVELS = {"NORMAL": 0, "HIGH": 1, "CRITICAL": 2}
+ALERTS = AlertHistory(STREAM_ALERT_COOLDOWN if RUN_MODE == 'stream' else ALERT_COOLDOWN)
+
+# 스냅샷에 함께 저장할 상태
+SNAPSHOT_STATES = {'tiers': TIERS, 'alerts': ALERTS}
 
 # ============================================
 # 🔥 핵심: 초단타 급등 감지 함수
 # ============================================
 
+SURGE_WINDOW = 50  # 5분봉 최근 50개 (약 4시간)
+SURGE_MIN_CANDLES = 20
+
 def detect_price_surge(coin):
     """
     5분봉 기반 급등 조기 감지
@@ -85,199 +92,156 @@ def detect_price_surge(coin):
     - 연속 상승
     """
     try:
-        # 5분봉 최근 50개 (약 4시간)
-        df = pyupbit.get_ohlcv(coin, interval="minute5", count=50)
-        if df is None or len(df) < 20:
-            return None
-        
+        # 5분봉 최근 50개 (약 4시간) - 캐시에서 새 봉만 추가 조회
+        _, ohlcv = CANDLE_CACHE.get_arrays(coin, "minute5", SURGE_WINDOW)
+        return compute_surge_features(ohlcv)
+    except Exception as e:
+        METRICS.error('candles', e)
+        print(f"급등 감지 오류 ({coin}): {e}")
+        return None
+
+def compute_surge_features(ohlcv):
+    """5분봉 배열 (N×5 이상: 시고저종량)에서 급등 지표 계산 (API 호출 없음)"""
+    if ohlcv is None:
+        return None
+    return compute_surge_features_batch([ohlcv])[0]
+
+def stack_candles(blocks, window=SURGE_WINDOW):
+    """코인별 캔들 (N×5: 시고저종량) → (코인 × window) 배열, 봉이 모자라면 왼쪽을 NaN으로 채움"""
+    stacked = np.full((5, len(blocks), window), np.nan)
+    lengths = np.zeros(len(blocks), dtype=np.int64)
+    for row, block in enumerate(blocks):
+        if block is None or len(block) == 0:
+            continue
+        block = np.asarray(block, dtype=np.float64)[-window:, :5]
+        stacked[:, row, window - len(block):] = block.T
+        lengths[row] = len(block)
+    return stacked, lengths
+
+def run_length_from_end(flags):
+    """(코인 × k) 조건 배열 (최근 봉부터) → 맨 앞부터 연속 True 개수"""
+    return np.cumprod(flags, axis=1).sum(axis=1)
+
+def compute_surge_arrays(o, h, l, c, v):
+    """
+    급등 지표 배열 계산 (행 × 봉 배열, 시간순 - 마지막 열이 현재 봉)
+    반환: 지표 이름 → 행별 값 배열
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
         # === 1. 현재 봉 분석 ===
-        current_candle = df.iloc[-1]
-        current_volume = current_candle['volume']
-        current_price = current_candle['close']
+        current_volume = v[:, -1]
+        current_price = c[:, -1]
         
         # === 2. 거래량 분석 ===
         # 평균 거래량 (직전 10개 봉)
-        avg_volume = df['volume'].iloc[-11:-1].mean()
-        volume_ratio = current_volume / avg_volume if avg_volume > 0 else 0
+        avg_volume = v[:, -11:-1].sum(axis=1) / 10
+        volume_ratio = np.where(avg_volume > 0, current_volume / avg_volume, 0)
         
         # 최근 3개 봉의 거래량 합
-        recent_3_volume = df['volume'].iloc[-3:].sum()
-        prev_10_volume = df['volume'].iloc[-13:-3].sum()
-        volume_acceleration = recent_3_volume / prev_10_volume if prev_10_volume > 0 else 0
+        recent_3_volume = v[:, -3:].sum(axis=1)
+        prev_10_volume = v[:, -13:-3].sum(axis=1)
+        volume_acceleration = np.where(prev_10_volume > 0, recent_3_volume / prev_10_volume, 0)
         
         # === 3. 가격 분석 ===
         # 현재 봉의 상승률
-        candle_change = ((current_candle['close'] - current_candle['open']) / current_candle['open']) * 100
-        
-        # 5분 전 대비 가격 변화
-        price_5m_ago = df['close'].iloc[-2]
-        price_change_5m = ((current_price - price_5m_ago) / price_5m_ago) * 100
+        candle_change = ((c[:, -1] - o[:, -1]) / o[:, -1]) * 100
         
-        # 15분 전 대비 가격 변화
-        if len(df) >= 4:
-            price_15m_ago = df['close'].iloc[-4]
-            price_change_15m = ((current_price - price_15m_ago) / price_15m_ago) * 100
-        else:
-            price_change_15m = 0
+        # 5분 전 / 15분 전 대비 가격 변화
+        price_change_5m = ((current_price - c[:, -2]) / c[:, -2]) * 100
+        price_change_15m = ((current_price - c[:, -4]) / c[:, -4]) * 100
         
         # === 4. 연속 상승 분석 ===
-        consecutive_green = 0
-        for i in range(1, min(6, len(df))):
-            if df['close'].iloc[-i] > df['open'].iloc[-i]:  # 양봉
-                consecutive_green += 1
-            else:
-                break
-        
-        # 연속 거래량 증가
-        consecutive_volume = 0
-        for i in range(1, min(5, len(df))):
-            if df['volume'].iloc[-i] > df['volume'].iloc[-i-1]:
-                consecutive_volume += 1
-            else:
-                break
+        # 최근 5개 봉 양봉 연속 / 최근 4개 봉 거래량 연속 증가 (최근 봉부터)
+        green = c > o
+        consecutive_green = run_length_from_end(green[:, :-6:-1])
+        consecutive_volume = run_length_from_end((v[:, 1:] > v[:, :-1])[:, :-5:-1])
         
         # === 5. 체결강도 (매수세 분석) ===
         # 최근 5개 봉의 양봉 비율
-        recent_5 = df.iloc[-5:]
-        green_count = sum(recent_5['close'] > recent_5['open'])
-        buying_pressure = green_count / 5
+        buying_pressure = green[:, -5:].sum(axis=1) / 5
         
-        # 고점 돌파 여부
-        high_20 = df['high'].iloc[-21:-1].max()
+        # 고점 돌파 여부 (직전 20개 봉 고가)
+        high_20 = np.nanmax(h[:, -21:-1], axis=1)
         breaking_high = current_price > high_20
-        
-        return {
-            'volume_ratio': volume_ratio,
-            'volume_acceleration': volume_acceleration,
-            'candle_change': candle_change,
-            'price_change_5m': price_change_5m,
-            'price_change_15m': price_change_15m,
-            'consecutive_green': consecutive_green,
-            'consecutive_volume': consecutive_volume,
-            'buying_pressure': buying_pressure,
-            'breaking_high': breaking_high,
-            'current_price': current_price,
-            'current_volume': current_volume
-        }
-    except Exception as e:
-        print(f"급등 감지 오류 ({coin}): {e}")
-        return None
+    
+    return {
+        'volume_ratio': volume_ratio,
+        'volume_acceleration': volume_acceleration,
+        'candle_change': candle_change,
+        'price_change_5m': price_change_5m,
+        'price_change_15m': price_change_15m,
+        'consecutive_green': consecutive_green,
+        'consecutive_volume': consecutive_volume,
+        'buying_pressure': buying_pressure,
+        'breaking_high': breaking_high,
+        'current_price': current_price,
+        'current_volume': current_volume
+    }
 
-# ============================================
-# 호가창 실시간 분석
-# ============================================
+def surge_features_row(features, row):
+    """지표 배열에서 한 행 → 급등 지표 dict (evaluate_fast_signal 입력)"""
+    surge_data = {name: values[row] for name, values in features.items()}
+    surge_data['consecutive_green'] = int(surge_data['consecutive_green'])
+    surge_data['consecutive_volume'] = int(surge_data['consecutive_volume'])
+    return surge_data
 
-def analyze_orderbook_momentum(coin):
-    """호가창 매수/매도 압력 분석"""
-    try:
-        orderbook = pyupbit.get_orderbook(coin)
-        if not orderbook or not isinstance(orderbook, list):
-            return None
-        
-        ob = orderbook[0]
-        if 'orderbook_units' not in ob:
-            return None
-        
-        units = ob['orderbook_units']
-        
-        # 전체 매수/매도 물량
-        total_bid = sum([u.get('bid_size', 0) for u in units])
-        total_ask = sum([u.get('ask_size', 0) for u in units])
-        
-        # 상위 3호가 매수/매도
-        top3_bid = sum([units[i].get('bid_size', 0) for i in range(min(3, len(units)))])
-        top3_ask = sum([units[i].get('ask_size', 0) for i in range(min(3, len(units)))])
-        
-        # 비율 계산
-        bid_ask_ratio = total_bid / total_ask if total_ask > 0 else 0
-        top3_ratio = top3_bid / top3_ask if top3_ask > 0 else 0
-        
-        # 호가창 불균형 (매수벽/매도벽)
-        imbalance = (total_bid - total_ask) / (total_bid + total_ask) if (total_bid + total_ask) > 0 else 0
-        
-        return {
-            'bid_ask_ratio': bid_ask_ratio,
-            'top3_ratio': top3_ratio,
-            'imbalance': imbalance,
-            'total_bid': total_bid,
-            'total_ask': total_ask
-        }
-    except Exception as e:
-        return None
+def compute_surge_features_batch(blocks):
+    """
+    전 코인 급등 지표 일괄 계산 (코인 × 봉 배열, 벡터 연산 1회)
+    blocks: 코인별 5분봉 배열 (N×5, 시고저종량 순, 시간순) 목록
+    반환: 코인별 지표 dict 목록 (봉 20개 미만은 None)
+    """
+    stacked, lengths = stack_candles(blocks)
+    features = compute_surge_arrays(*stacked)
+    return [surge_features_row(features, row) if lengths[row] >= SURGE_MIN_CANDLES else None
+            for row in range(len(blocks))]
 
 # ============================================
 # 🎯 초단타 신호 판단
 # ============================================
 
-def evaluate_fast_signal(surge_data, orderbook_data):
-    """
-    초단타 신호 강도 평가
-    점수 체계: 0-10점
-    """
-    score = 0
-    signals = []
-    alert_level = "NORMAL"
-    
-    if not surge_data:
-        return 0, [], "NONE"
-    
+# 점수 체계: 0-10점 (그룹 = if/elif, 레벨 NORMAL → HIGH → CRITICAL)
+FAST_RULES = [
     # === 거래량 폭발 (0-3점) ===
-    if surge_data['volume_ratio'] >= 3.0:
-        score += 3
-        signals.append("🔥🔥 거래량 3배 폭발")
-        alert_level = "CRITICAL"
-    elif surge_data['volume_ratio'] >= 2.0:
-        score += 2
-        signals.append("🔥 거래량 2배 급증")
-        alert_level = "HIGH"
-    elif surge_data['volume_ratio'] >= 1.5:
-        score += 1
-        signals.append("⚡ 거래량 1.5배 증가")
-    
+    [{'when': [('volume_ratio', '>=', 3.0)], 'points': 3, 'label': "🔥🔥 거래량 3배 폭발", 'level': "CRITICAL"},
+     {'when': [('volume_ratio', '>=', 2.0)], 'points': 2, 'label': "🔥 거래량 2배 급증", 'level': "HIGH"},
+     {'when': [('volume_ratio', '>=', 1.5)], 'points': 1, 'label': "⚡ 거래량 1.5배 증가"}],
     # === 가격 급등 (0-3점) ===
-    if surge_data['price_change_5m'] >= 5:
-        score += 3
-        signals.append("🚀🚀 5분 5% 급등")
-        alert_level = "CRITICAL"
-    elif surge_data['price_change_5m'] >= 3:
-        score += 2
-        signals.append("🚀 5분 3% 상승")
-        if alert_level == "NORMAL":
-            alert_level = "HIGH"
-    elif surge_data['price_change_5m'] >= 2:
-        score += 1
-        signals.append("📈 5분 2% 상승")
-    
+    [{'when': [('price_change_5m', '>=', 5)], 'points': 3, 'label': "🚀🚀 5분 5% 급등", 'level': "CRITICAL"},
+     {'when': [('price_change_5m', '>=', 3)], 'points': 2, 'label': "🚀 5분 3% 상승", 'level': "HIGH", 'level_from': "NORMAL"},
+     {'when': [('price_change_5m', '>=', 2)], 'points': 1, 'label': "📈 5분 2% 상승"}],
     # === 연속 상승 (0-2점) ===
-    if surge_data['consecutive_green'] >= 4:
-        score += 2
-        signals.append("✅ 4연속 양봉")
-    elif surge_data['consecutive_green'] >= 3:
-        score += 1
-        signals.append("✅ 3연속 양봉")
-    
+    [{'when': [('consecutive_green', '>=', 4)], 'points': 2, 'label': "✅ 4연속 양봉"},
+     {'when': [('consecutive_green', '>=', 3)], 'points': 1, 'label': "✅ 3연속 양봉"}],
     # === 거래량 가속 (0-1점) ===
-    if surge_data['volume_acceleration'] >= 2.0:
-        score += 1
-        signals.append("⚡ 거래량 가속")
-    
-    # === 매수세 우위 (0-1점) ===
-    if surge_data['buying_pressure'] >= 0.8:
-        score += 1
-        signals.append("💪 강한 매수세")
-    
+    [{'when': [('volume_acceleration', '>=', 2.0)], 'points': 1, 'label': "⚡ 거래량 가속"}],
+    # === 매수세 우위 (0-1점, 실제 체결강도는 upbit_trades) ===
+    [{'when': [('buying_pressure', '>=', 0.8)], 'points': 1, 'label': "💪 강한 매수세"},
+     {'when': [('trade_intensity', '>=', TRADE_INTENSITY_THRESHOLD)], 'points': 1, 'label': "💪 체결강도 {trade_intensity:.0f}%"}],
     # === 고점 돌파 (0-1점) ===
-    if surge_data['breaking_high']:
-        score += 1
-        signals.append("🎯 20봉 고점 돌파")
-    
-    # === 호가창 매수세 (0-1점) ===
-    if orderbook_data:
-        if orderbook_data['bid_ask_ratio'] >= 1.8:
-            score += 1
-            signals.append("💰 호가창 매수벽")
-    
-    return score, signals, alert_level
+    [{'when': [('breaking_high', 'truthy')], 'points': 1, 'label': "🎯 20봉 고점 돌파"}],
+    # === 호가창 매수세 (0-1점, 호가 변화: 매수벽 증가 / 매도벽 철수) ===
+    [{'when': [('bid_ask_ratio', '>=', 1.8)], 'points': 1, 'label': "💰 호가창 매수벽"},
+     {'when': [('depth_signal', 'truthy')], 'points': 1, 'label': "{depth_signal}"}],
+]
+
+# 급등 지표가 없는 코인은 "NONE"
+FAST_SCORER = RuleSet(load_rules('fast', FAST_RULES), empty_level="NONE")
+
+def fast_features(surge_data, orderbook_data):
+    """급등 지표 + 호가 → 채점용 지표 dict (급등 지표가 없으면 None)"""
+    if not surge_data:
+        return None
+    if not orderbook_data:
+        return surge_data
+    return {**surge_data, **orderbook_data, 'depth_signal': depth_pressure(orderbook_data)}
+
+def evaluate_fast_signal(surge_data, orderbook_data):
+    """
+    초단타 신호 강도 평가 (코인 1개, 여러 코인은 FAST_SCORER.score_rows로 한 번에)
+    점수 체계: 0-10점
+    """
+    return FAST_SCORER.score_row(fast_features(surge_data, orderbook_data))
 
 # ============================================
 # 텔레그램 메시지 포맷
@@ -322,6 +286,9 @@ def format_fast_alert(coin, score, signals, surge_data, orderbook_data, alert_le
     if surge_data['buying_pressure'] >= 0.6:
         message += f"💪 매수세: {surge_data['buying_pressure']*100:.0f}%\n"
     
+    if 'trade_intensity' in surge_data:
+        message += f"📊 체결강도: {surge_data['trade_intensity']:.0f}%\n"
+    
     if orderbook_data:
         message += f"💰 호가 비율: {orderbook_data['bid_ask_ratio']:.2f}\n"
     
@@ -342,108 +309,348 @@ def format_fast_alert(coin, score, signals, surge_data, orderbook_data, alert_le
 # ============================================
 
 def save_fast_signal(coin, score, surge_data, alert_level):
-    """엑셀에 빠르게 저장"""
+    """저널에 신호 행 추가 (커밋은 스캔 끝에 flush_signals)"""
+    row = [
+        get_kst_now().strftime('%H:%M:%S'),
+        coin.replace('KRW-', ''),
+        alert_level,
+        f"{score}/10",
+        surge_data['current_price'],
+        f"{surge_data['volume_ratio']:.2f}",
+        f"{surge_data['price_change_5m']:+.2f}",
+        f"{surge_data['price_change_15m']:+.2f}",
+        surge_data['consecutive_green'],
+        f"{surge_data['buying_pressure']*100:.0f}"
+    ]
+    SIGNAL_JOURNAL.append(coin, row)
+
+def flush_signals():
+    """저널 일괄 커밋"""
     try:
-        try:
-            wb = load_workbook(EXCEL_FILE)
-            ws = wb.active
-        except:
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "초단타신호"
-            
-            headers = ['시간', '코인', '레벨', '점수', '현재가', '거래량배수', 
-                      '5분변화%', '15분변화%', '연속양봉', '매수세%']
-            ws.append(headers)
-            
-            for cell in ws[1]:
-                cell.font = Font(bold=True)
-                cell.fill = PatternFill(start_color="FF6B6B", end_color="FF6B6B", fill_type="solid")
-                cell.alignment = Alignment(horizontal="center")
-        
-        row = [
-            get_kst_now().strftime('%H:%M:%S'),
-            coin.replace('KRW-', ''),
-            alert_level,
-            f"{score}/10",
-            surge_data['current_price'],
-            f"{surge_data['volume_ratio']:.2f}",
-            f"{surge_data['price_change_5m']:+.2f}",
-            f"{surge_data['price_change_15m']:+.2f}",
-            surge_data['consecutive_green'],
-            f"{surge_data['buying_pressure']*100:.0f}"
-        ]
-        
-        ws.append(row)
-        
-        if ws.max_row > 201:  # 200개만 유지
-            ws.delete_rows(2, ws.max_row - 201)
-        
-        wb.save(EXCEL_FILE)
-        
+        with METRICS.timer('journal'):
+            SIGNAL_JOURNAL.flush()
+    except Exception as e:
+        METRICS.error('journal', e)
+        print(f"신호 저장 오류: {e}")
+
+def export_signals():
+    """새 신호가 있으면 저널 최근 200개로 엑셀 생성 (스캔 밖에서 실행)"""
+    if not SIGNAL_JOURNAL.unexported:
+        return
+    try:
+        with METRICS.timer('export'):
+            export_excel(SIGNAL_JOURNAL, EXCEL_FILE, SHEETS['fast'])
     except Exception as e:
+        METRICS.error('export', e)
         print(f"엑셀 저장 오류: {e}")
 
 # ============================================
 # 메인 스캔
 # ============================================
 
-def fast_scan_market():
-    """초고속 시장 스캔"""
-    print(f"\n⚡ 스캔: {get_kst_now().strftime('%H:%M:%S')}")
+def handle_fast_signal(coin, surge_data, orderbook_data, check_repeat=True, result=None, bar_ms=None):
+    """
+    신호 평가 후 알림/저장 (6점 이상), 신호 레벨 반환 (check_repeat: 재알림 제한 확인)
+    result: 이미 일괄 채점한 (점수, 신호 목록, 레벨)
+    bar_ms: 신호를 낸 5분봉 시작 시각 (없으면 캔들 캐시의 마지막 봉) - 알림 지연 계측용
+    """
+    # 3. 신호 평가
+    if result is None:
+        with METRICS.timer('scoring'):
+            result = evaluate_fast_signal(surge_data, orderbook_data)
+    score, signals, alert_level = result
     
-    tickers = pyupbit.get_tickers(fiat="KRW")
+    # 4. 알림 발송 (6점 이상)
+    if score < 6:
+        return None
     
-    # 빠른 스캔을 위해 시총 상위 코인만 (선택)
-    # 또는 전체 스캔
+    with METRICS.timer('alerts'):
+        if check_repeat and not ALERTS.allow(coin, ALERT_LEVELS[alert_level]):
+            # 저널에는 남기고 텔레그램만 생략
+            METRICS.inc('alerts_suppressed_total', strategy='fast')
+            print(f"🔕 {coin}: {score}/10점 (재알림 제한)")
+        else:
+            message = format_fast_alert(coin, score, signals, surge_data, orderbook_data, alert_level)
+            if message:
+                queue_telegram(message)
+                METRICS.alert('fast', bar_ms if bar_ms is not None else CANDLE_CACHE.last_time(coin, "minute5"))
+                print(f"{'🚨' if alert_level == 'CRITICAL' else '⚠️'} {coin}: {score}/10점")
     
+    with METRICS.timer('journal'):
+        save_fast_signal(coin, score, surge_data, alert_level)
+    return alert_level
+
+def handle_candidates(candidates, orderbooks):
+    """후보 코인 신호 평가/알림 → (신호 수, 긴급 수)"""
     signal_count = 0
     critical_count = 0
     
-    for coin in tickers:
+    analyzed = []
+    for coin, surge_data in candidates:
         try:
-            # 1. 급등 감지
-            surge_data = detect_price_surge(coin)
-            if not surge_data:
-                continue
-            
-            # 빠른 필터링: 거래량 1.5배 미만은 스킵
-            if surge_data['volume_ratio'] < 1.5:
-                continue
-            
-            # 2. 호가창 분석
-            orderbook_data = analyze_orderbook_momentum(coin)
-            
-            # 3. 신호 평가
-            score, signals, alert_level = evaluate_fast_signal(surge_data, orderbook_data)
-            
-            # 4. 알림 발송 (6점 이상)
-            if score >= 6:
+            # 2. 호가창 분석 + 체결강도 (새 체결만 조회)
+            orderbook_data = analyze_orderbook(coin, orderbooks.get(coin, {}))
+            surge_data = with_trade_pressure(coin, surge_data)
+            analyzed.append((coin, surge_data, orderbook_data))
+        except Exception as e:
+            METRICS.error('signals', e)
+            continue
+    
+    # 3. 후보 전체 일괄 채점 (NumPy 1회)
+    with METRICS.timer('scoring'):
+        results = FAST_SCORER.score_rows([fast_features(surge_data, orderbook_data)
+                                          for _, surge_data, orderbook_data in analyzed])
+    
+    for (coin, surge_data, orderbook_data), result in zip(analyzed, results):
+        try:
+            alert_level = handle_fast_signal(coin, surge_data, orderbook_data, result=result)
+            if alert_level:
                 signal_count += 1
                 if alert_level == "CRITICAL":
                     critical_count += 1
-                
-                message = format_fast_alert(coin, score, signals, surge_data, orderbook_data, alert_level)
-                if message:
-                    send_telegram(message)
-                    print(f"{'🚨' if alert_level == 'CRITICAL' else '⚠️'} {coin}: {score}/10점")
-                
-                save_fast_signal(coin, score, surge_data, alert_level)
-            
-            time.sleep(0.05)  # API 제한
-            
         except Exception as e:
+            METRICS.error('signals', e)
             continue
     
+    return signal_count, critical_count
+
+def fetch_surge_candles(coin):
+    """급등 감지용 5분봉 (N×6 배열, 캐시에서 새 봉만 추가 조회) - 실패 시 None"""
+    try:
+        _, ohlcv = CANDLE_CACHE.get_arrays(coin, "minute5", SURGE_WINDOW)
+        return ohlcv
+    except Exception as e:
+        METRICS.error('candles', e)
+        print(f"급등 감지 오류 ({coin}): {e}")
+        return None
+
+def screen_surge_candidates(tickers, blocks):
+    """전 코인 급등 지표 일괄 계산 → 거래량 1.5배 이상 후보 [(코인, 지표)]"""
+    candidates = []
+    for coin, surge_data in zip(tickers, compute_surge_features_batch(blocks)):
+        # 빠른 필터링: 거래량 1.5배 미만은 스킵
+        if not surge_data or surge_data['volume_ratio'] < 1.5:
+            continue
+        candidates.append((coin, surge_data))
+    return candidates
+
+def select_scan_markets(markets, passed=None):
+    """
+    이번 회차 스캔할 코인
+    - 등급 순번 먼저: hot 전부 + 차례가 된 cold (사전 선별 결과와 무관하게 항상 스캔)
+    - 사전 선별 사용 시: 여기에 현재가 스냅샷 비교를 통과한 나머지 코인 추가
+    - passed: 공용 스캔 코어(upbit_combined)가 이미 선별한 코인
+    """
+    due = TIERS.select(markets)
+    if passed is None and PRESCREEN:
+        try:
+            with METRICS.timer('prescreen'):
+                passed = TICKER_SCREEN.screen(TICKER_SCREEN.fetch_all(markets))
+        except Exception as e:
+            METRICS.error('prescreen', e)
+            print(f"현재가 사전 선별 오류: {e}")
+    if passed is not None:
+        due = set(due)
+        due = [coin for coin in markets if coin in due or coin in passed]
+    
+    METRICS.set('scan_markets', len(due), strategy='fast')
+    if len(due) < len(markets):
+        print(f"🔎 {len(due)}/{len(markets)}개 스캔 (hot {TIERS.counts()[0]}개)")
+    return due
+
+def update_tiers(due, blocks, candidates):
+    """스캔 결과로 등급 갱신 (5분봉 조회 실패 코인은 제외)"""
+    TIERS.update([coin for coin, block in zip(due, blocks) if block is not None],
+                 [coin for coin, _ in candidates])
+    hot, cold = TIERS.counts()
+    METRICS.set('tier_markets', hot, tier='hot')
+    METRICS.set('tier_markets', cold, tier='cold')
+
+def screen_markets(tickers):
+    """1단계: 5분봉 수집 후 전 코인 급등 지표 일괄 계산, 등급 갱신 → 후보 [(코인, 지표)]"""
+    blocks = []
+    with METRICS.timer('candles'):
+        # 요청 간격은 upbit_api의 그룹별 요청 제한이 조절
+        for coin in tickers:
+            blocks.append(fetch_surge_candles(coin))
+    
+    with METRICS.timer('features'):
+        candidates = screen_surge_candidates(tickers, blocks)
+    update_tiers(tickers, blocks, candidates)
+    return candidates
+
+def fast_scan_market():
+    """초고속 시장 스캔"""
+    print(f"\n⚡ 스캔: {get_kst_now().strftime('%H:%M:%S')}")
+    METRICS.start_scan()
+    
+    with METRICS.timer('markets'):
+        tickers = select_scan_markets(get_krw_markets())
+    
+    # 1단계: 5분봉 수집 후 전 코인 급등 지표 일괄 계산
+    candidates = screen_markets(tickers)
+    
+    # 2단계: 후보 코인 호가창 일괄 조회
+    with METRICS.timer('orderbook'):
+        orderbooks = fetch_orderbooks([coin for coin, _ in candidates])
+    
+    signal_count, critical_count = handle_candidates(candidates, orderbooks)
+    flush_signals()
+    
+    if signal_count > 0:
+        print(f"✅ {signal_count}개 신호 (긴급 {critical_count}개)")
+    METRICS.end_scan('fast', len(tickers))
+
+# ============================================
+# ⚡ 비동기 병렬 스캔
+# ============================================
+
+async def call_limited(semaphore, func, *args, **kwargs):
+    """동시 요청 수 제한 하에서 블로킹 API 호출 (초당 요청 수는 upbit_api의 그룹별 요청 제한이 조절)"""
+    async with semaphore:
+        return await asyncio.to_thread(func, *args, **kwargs)
+
+async def fetch_surge_candles_async(coin, semaphore):
+    """코인 1개 급등 감지용 5분봉 조회"""
+    return await call_limited(semaphore, fetch_surge_candles, coin)
+
+async def fetch_orderbooks_async(coins, semaphore):
+    """후보 코인 호가 일괄 조회 (묶음 요청 병렬)"""
+    async def fetch_chunk(chunk):
+        try:
+            return await call_limited(semaphore, fetch_orderbook_chunk, chunk)
+        except Exception as e:
+            METRICS.error('orderbook', e)
+            print(f"호가 일괄 조회 오류 ({len(chunk)}개): {e}")
+            return {}
+    
+    orderbooks = {}
+    for result in await asyncio.gather(*[fetch_chunk(chunk) for chunk in chunk_markets(coins)]):
+        orderbooks.update(result)
+    return orderbooks
+
+async def fast_scan_market_async():
+    """비동기 병렬 시장 스캔 (동시 요청 수/초당 요청 수 제한)"""
+    print(f"\n⚡ 스캔(병렬): {get_kst_now().strftime('%H:%M:%S')}")
+    METRICS.start_scan()
+    
+    # 업비트 시세 API는 엔드포인트 그룹별로 초당 요청 수가 따로 제한됨 (upbit_api에서 그룹별로 조절)
+    semaphore = asyncio.Semaphore(SCAN_CONCURRENCY)
+    
+    with METRICS.timer('markets'):
+        markets = await call_limited(semaphore, get_krw_markets)
+        tickers = await asyncio.to_thread(select_scan_markets, markets)
+    with METRICS.timer('candles'):
+        blocks = await asyncio.gather(*[fetch_surge_candles_async(coin, semaphore) for coin in tickers])
+    
+    # 전 코인 급등 지표 일괄 계산 후 후보 코인만 호가창 일괄 조회
+    with METRICS.timer('features'):
+        candidates = screen_surge_candidates(tickers, blocks)
+    update_tiers(tickers, blocks, candidates)
+    with METRICS.timer('orderbook'):
+        orderbooks = await fetch_orderbooks_async([coin for coin, _ in candidates], semaphore)
+    
+    # 알림/저장은 티커 순서대로 순차 처리
+    signal_count, critical_count = handle_candidates(candidates, orderbooks)
+    flush_signals()
+    
     if signal_count > 0:
         print(f"✅ {signal_count}개 신호 (긴급 {critical_count}개)")
+    METRICS.end_scan('fast', len(tickers))
+
+# ============================================
+# 📡 WebSocket 실시간 감지
+# ============================================
+
+def handle_stream_signal(coin, surge_data, orderbook_data, bar_ms=None):
+    """실시간 감지 신호 알림/저장 (신호마다 바로 커밋, 재알림 제한은 수신 루프에서 확인)"""
+    handle_fast_signal(coin, surge_data, orderbook_data, check_repeat=False, bar_ms=bar_ms)
+    flush_signals()
+    METRICS.export()
+
+async def stream_fast_signals():
+    """체결로 5분봉을 실시간 생성하고 봉이 바뀔 때마다 신호 평가"""
+    print(f"\n📡 실시간 감지 시작: {get_kst_now().strftime('%H:%M:%S')}")
+    
+    semaphore = asyncio.Semaphore(SCAN_CONCURRENCY)
+    
+    # REST 5분봉으로 초기화
+    tickers = await call_limited(semaphore, get_krw_markets)
+    builder = LiveBarBuilder("minute5", SURGE_WINDOW)
+    
+    async def seed_coin(coin):
+        try:
+            ts, ohlcv = await call_limited(semaphore, CANDLE_CACHE.get_arrays, coin, "minute5", SURGE_WINDOW)
+            builder.seed(coin, ts, ohlcv)
+        except Exception as e:
+            METRICS.error('candles', e)
+            print(f"5분봉 초기화 오류 ({coin}): {e}")
+    
+    async def reseed():
+        # 끊긴 동안 놓친 체결은 되돌릴 수 없으므로 진행 중인 봉까지 REST 5분봉으로 다시 채움
+        await asyncio.gather(*(seed_coin(coin) for coin in tickers))
+        print(f"📊 재접속: {len(tickers)}개 코인 5분봉 다시 채움")
+    
+    await asyncio.gather(*(seed_coin(coin) for coin in tickers))
+    print(f"📊 {len(tickers)}개 코인 구독")
+    
+    orderbooks = {}
+    pending = set()
+    
+    async for message in stream_messages(tickers, on_reconnect=reseed):
+        coin = message.get('code')
+        if message.get('type') == 'orderbook':
+            orderbooks[coin] = message
+            ORDERBOOK_HISTORY.record(coin, message, message.get('timestamp'))
+            continue
+        if message.get('type') != 'trade':
+            continue
+        TRADE_TAPE.add_trade(coin, message)
+        
+        if not builder.add_trade(coin, message['trade_price'], message['trade_volume'], message['trade_timestamp']):
+            continue
+        
+        bar_ts, bar_ohlcv = builder.tail(coin)
+        surge_data = compute_surge_features_batch([bar_ohlcv])[0]
+        if not surge_data or surge_data['volume_ratio'] < 1.5:
+            continue
+        
+        orderbook_data = with_depth_changes(coin, summarize_orderbook(orderbooks.get(coin)))
+        pressure = TRADE_TAPE.pressure(coin)
+        if pressure:
+            surge_data.update(pressure)
+        score, signals, alert_level = evaluate_fast_signal(surge_data, orderbook_data)
+        if score < 6:
+            continue
+        
+        # 재알림 제한: 쿨다운 안에서는 레벨이 올라갈 때만
+        if not ALERTS.allow(coin, ALERT_LEVELS[alert_level]):
+            continue
+        
+        # 알림/저장은 백그라운드로 (수신 지연 방지)
+        task = asyncio.create_task(asyncio.to_thread(handle_stream_signal, coin, surge_data, orderbook_data, int(bar_ts[-1])))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+    
+    if pending:
+        await asyncio.gather(*pending)
 
 # ============================================
 # 메인 실행
 # ============================================
 
+def run_scan():
+    """스캔 1회 (ASYNC_SCAN에 따라 병렬/순차) 후 엑셀 내보내기 + 상태 저장"""
+    if ASYNC_SCAN:
+        asyncio.run(fast_scan_market_async())
+    else:
+        fast_scan_market()
+    export_signals()
+    save_snapshot(states=SNAPSHOT_STATES)
+
 def main():
     """메인"""
+    require_telegram()
     print("""
     ╔══════════════════════════════════════╗
     ║     업비트 초단타 급등 감지         ║
@@ -451,14 +658,33 @@ def main():
     ╚══════════════════════════════════════╝
     """)
     
-    send_telegram("⚡ 초단타 급등 감지 시작!")
+    # 시작 알림은 워커로 넘기고 바로 스캔 시작 (첫 시세 요청을 늦추지 않음)
+    queue_telegram("⚡ 초단타 급등 감지 시작!")
+    
+    # 이전 실행의 캔들 캐시/현재가 스냅샷/등급/알림 기록 복원
+    load_snapshot(states=SNAPSHOT_STATES)
     
     try:
-        fast_scan_market()
+        if RUN_MODE == 'stream':
+            asyncio.run(stream_fast_signals())
+            export_signals()
+            save_snapshot(states=SNAPSHOT_STATES)
+        elif RUN_MODE == 'daemon':
+            # 프로세스를 유지하며 캔들 캐시/세션/마켓 목록을 재사용
+            print(f"🔁 데몬 모드: {SCAN_INTERVAL}초 주기")
+            run_forever(run_scan, SCAN_INTERVAL, SCAN_OFFSET)
+        else:
+            run_scan()
         
     except KeyboardInterrupt:
+        flush_signals()
+        export_signals()
         print("\n🛑 모니터링 종료")
         send_telegram("🛑 초단타 모니터링 종료")
+    
+    finally:
+        # 남은 알림 발송 후 종료
+        TELEGRAM.close()
 
 if __name__ == "__main__":
     main()
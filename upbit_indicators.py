@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+업비트 스트리밍 기술적 지표 모듈
+마켓별 지표 상태(Wilder 평활, EMA, 이동 합/제곱합)를 유지하며 봉 1개당 O(1)로 갱신
+- RSI(14), MACD(12, 26, 9), 볼린저 밴드(20, 2), MA5/MA20, 20일 평균 거래량
+- ta 라이브러리 (ewm adjust=False, 표준편차 ddof=0)와 같은 정의
+"""
+
+import math
+import threading
+from collections import deque
+
+RSI_WINDOW = 14
+MACD_FAST = 12
+MACD_SLOW = 26
+MACD_SIGN = 9
+BB_WINDOW = 20
+BB_DEV = 2
+MA_SHORT = 5
+MA_LONG = 20
+VOLUME_WINDOW = 20
+
+class RollingWindow:
+    """고정 길이 이동 합/제곱합 (기준값을 빼서 누적해 자릿수 손실 방지)"""
+
+    def __init__(self, size):
+        self.size = size
+        self.values = deque()
+        self.shift = None
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def push(self, value):
+        if self.shift is None:
+            self.shift = value
+        x = value - self.shift
+        self.values.append(x)
+        self.total += x
+        self.total_sq += x * x
+        if len(self.values) > self.size:
+            old = self.values.popleft()
+            self.total -= old
+            self.total_sq -= old * old
+
+    def stats_with(self, value):
+        """value를 추가했다고 가정한 (개수, 평균, 분산) - 상태는 바꾸지 않음"""
+        shift = self.shift if self.shift is not None else value
+        x = value - shift
+        n = len(self.values) + 1
+        total = self.total + x
+        total_sq = self.total_sq + x * x
+        if n > self.size:
+            old = self.values[0]
+            n -= 1
+            total -= old
+            total_sq -= old * old
+        mean = total / n
+        var = max(total_sq / n - mean * mean, 0.0)
+        return n, mean + shift, var
+
+class IndicatorState:
+    """마켓 1개 지표 상태: push()로 마감 봉 반영, peek()으로 진행 중인 봉 계산"""
+
+    def __init__(self):
+        self.count = 0
+        self.prev_close = None
+        self.avg_up = 0.0
+        self.avg_down = 0.0
+        self.ema_fast = None
+        self.ema_slow = None
+        self.signal = None
+        self.signal_count = 0
+        self.closes_bb = RollingWindow(BB_WINDOW)
+        self.closes_short = RollingWindow(MA_SHORT)
+        self.volumes = RollingWindow(VOLUME_WINDOW)
+
+    def step(self, close, volume):
+        """봉 1개 반영 결과 (새 상태값, 지표) - O(1), 상태 변경 없음"""
+        count = self.count + 1
+
+        # RSI: 첫 봉의 변화량은 0으로 시작하는 Wilder 평활
+        diff = close - self.prev_close if self.prev_close is not None else 0.0
+        alpha = 1 / RSI_WINDOW
+        avg_up = self.avg_up * (1 - alpha) + max(diff, 0.0) * alpha if count > 1 else max(diff, 0.0)
+        avg_down = self.avg_down * (1 - alpha) + max(-diff, 0.0) * alpha if count > 1 else max(-diff, 0.0)
+        if count < RSI_WINDOW:
+            rsi = math.nan
+        elif avg_down == 0:
+            rsi = 100.0
+        else:
+            rsi = 100 - (100 / (1 + avg_up / avg_down))
+
+        # MACD: 첫 봉부터 시작하는 EMA, 시그널은 MACD가 정의된 시점부터
+        ema_fast = close if self.ema_fast is None else self.ema_fast + (close - self.ema_fast) * (2 / (MACD_FAST + 1))
+        ema_slow = close if self.ema_slow is None else self.ema_slow + (close - self.ema_slow) * (2 / (MACD_SLOW + 1))
+        signal, signal_count = self.signal, self.signal_count
+        macd = macd_signal = math.nan
+        if count >= MACD_SLOW:
+            macd = ema_fast - ema_slow
+            signal = macd if signal is None else signal + (macd - signal) * (2 / (MACD_SIGN + 1))
+            signal_count += 1
+            if signal_count >= MACD_SIGN:
+                macd_signal = signal
+
+        # 볼린저 밴드 / 이동평균 / 평균 거래량
+        n_bb, ma20, var20 = self.closes_bb.stats_with(close)
+        n_short, ma5, _ = self.closes_short.stats_with(close)
+        n_vol, volume_avg, _ = self.volumes.stats_with(volume)
+        std20 = math.sqrt(var20)
+
+        values = {
+            'rsi': rsi,
+            'macd': macd,
+            'macd_signal_line': macd_signal,
+            'bb_high': ma20 + BB_DEV * std20 if n_bb >= BB_WINDOW else math.nan,
+            'bb_low': ma20 - BB_DEV * std20 if n_bb >= BB_WINDOW else math.nan,
+            'ma5': ma5 if n_short >= MA_SHORT else math.nan,
+            'ma20': ma20 if n_bb >= MA_LONG else math.nan,
+            'volume_avg': volume_avg if n_vol >= VOLUME_WINDOW else math.nan,
+        }
+        state = (count, close, avg_up, avg_down, ema_fast, ema_slow, signal, signal_count)
+        return state, values
+
+    def push(self, close, volume):
+        """마감 봉 반영"""
+        state, values = self.step(close, volume)
+        (self.count, self.prev_close, self.avg_up, self.avg_down,
+         self.ema_fast, self.ema_slow, self.signal, self.signal_count) = state
+        self.closes_bb.push(close)
+        self.closes_short.push(close)
+        self.volumes.push(volume)
+        return values
+
+    def peek(self, close, volume):
+        """진행 중인 봉을 반영한 지표 (상태는 그대로)"""
+        return self.step(close, volume)[1]
+
+def interpret_indicators(values, close, volume):
+    """지표 값 → calculate_indicators 결과 형식"""
+    rsi = values['rsi']
+    rsi_signal = "과매도" if rsi < 30 else "과매수" if rsi > 70 else "중립"
+
+    macd_line = values['macd']
+    signal_line = values['macd_signal_line']
+    macd_hist = macd_line - signal_line
+    macd_signal = "골든크로스" if macd_line > signal_line and macd_hist > 0 else "데드크로스" if macd_line < signal_line and macd_hist < 0 else "중립"
+
+    if close >= values['bb_high']:
+        bb_signal = "상단터치"
+    elif close <= values['bb_low']:
+        bb_signal = "하단터치"
+    else:
+        bb_signal = "중립"
+
+    ma_signal = "상향돌파" if values['ma5'] > values['ma20'] else "하향돌파"
+
+    volume_percent = (volume / values['volume_avg']) * 100
+    volume_signal = "급증" if volume_percent > 150 else "정상"
+
+    return {
+        'rsi': rsi,
+        'rsi_signal': rsi_signal,
+        'macd_signal': macd_signal,
+        'bb_signal': bb_signal,
+        'ma_signal': ma_signal,
+        'volume_percent': volume_percent,
+        'volume_signal': volume_signal,
+        'current_price': close
+    }
+
+class IndicatorEngine:
+    """
+    마켓별 지표 상태 관리
+    - 마감 봉 구간이 바뀔 때(일봉은 하루 한 번)만 상태를 다시 쌓고
+    - 스캔마다 진행 중인 마지막 봉은 peek()으로 O(1) 계산
+    """
+
+    def __init__(self):
+        self.states = {}  # 마켓 → (마감 봉 첫 ts, 마지막 ts, IndicatorState)
+        self.lock = threading.Lock()
+
+    def indicators(self, market, ts, ohlcv):
+        """시간순 봉 (ts, ohlcv N×6)의 마지막 봉 기준 지표 - 마지막 봉은 진행 중으로 취급"""
+        if len(ts) < 2:
+            return None
+        key = (int(ts[0]), int(ts[-2]))
+        with self.lock:
+            entry = self.states.get(market)
+            if entry is None or entry[:2] != key:
+                state = IndicatorState()
+                for close, volume in zip(ohlcv[:-1, 3], ohlcv[:-1, 4]):
+                    state.push(float(close), float(volume))
+                entry = key + (state,)
+                self.states[market] = entry
+            state = entry[2]
+
+        close, volume = float(ohlcv[-1, 3]), float(ohlcv[-1, 4])
+        return interpret_indicators(state.peek(close, volume), close, volume)
+
+# 프로세스 공용 지표 엔진
+INDICATOR_ENGINE = IndicatorEngine()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+업비트 신호 기록 모듈
+- 스캔 중에는 SQLite 저널에 행만 추가 (스캔 끝에 한 번에 커밋)
+- 서식 있는 엑셀은 스캔 밖에서 저널 최근 행으로 새로 생성
+- JOURNAL_KEEP_DAYS일보다 오래된 행은 flush 트랜잭션에서 함께 삭제
+
+사용법:
+    python upbit_journal.py fast                       # 저널 → upbit_fast_signals.xlsx
+    python upbit_journal.py enhanced [저널.db] [출력.xlsx]
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import closing
+
+JOURNAL_KEEP_DAYS = float(os.environ.get('JOURNAL_KEEP_DAYS', '30'))  # 저널 보관 일수 (0이면 전부 보관)
+
+# 시트별 엑셀 형식 (헤더/색상/유지 행 수는 기존 엑셀과 동일)
+SHEETS = {
+    'fast': {
+        'table': 'fast_signals',
+        'title': "초단타신호",
+        'headers': ['시간', '코인', '레벨', '점수', '현재가', '거래량배수',
+                    '5분변화%', '15분변화%', '연속양봉', '매수세%'],
+        'color': "FF6B6B",
+        'keep': 200,
+        'journal': 'upbit_fast_signals.db',
+        'excel': 'upbit_fast_signals.xlsx',
+    },
+    'enhanced': {
+        'table': 'enhanced_signals',
+        'title': "실시간 신호",
+        'headers': ['시간', '코인', '신호타입', '신호강도', '현재가', '5분봉거래량',
+                    '가격변화5분', '연속증가', '일봉거래량', 'RSI', '판단'],
+        'color': "366092",
+        'keep': 100,
+        'journal': 'upbit_signals_enhanced.db',
+        'excel': 'upbit_signals_enhanced.xlsx',
+    },
+}
+
+def to_json_value(value):
+    """numpy 스칼라 등 → JSON 기본형"""
+    if hasattr(value, 'item'):
+        return value.item()
+    raise TypeError(f"JSON 변환 불가: {type(value)}")
+
+# ============================================
+# 저널 (추가 전용)
+# ============================================
+
+class SignalJournal:
+    """신호 행을 메모리에 모았다가 flush() 때 한 트랜잭션으로 추가"""
+
+    def __init__(self, path, table, keep_days=None):
+        self.path = path
+        self.table = table
+        self.keep_days = JOURNAL_KEEP_DAYS if keep_days is None else keep_days
+        self.pending = []
+        self.lock = threading.Lock()
+        self.unexported = 0  # 마지막 엑셀 생성 이후 기록된 행 수
+
+    def connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                     "id INTEGER PRIMARY KEY AUTOINCREMENT, time REAL, market TEXT, row TEXT)")
+        # 보관 기간 삭제 / 샤드 병합의 시각 조건용
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_time ON {self.table} (time)")
+        return conn
+
+    def append(self, market, row):
+        """행 1개 추가 예약 (디스크 쓰기 없음)"""
+        record = (time.time(), market, json.dumps(row, ensure_ascii=False, default=to_json_value))
+        with self.lock:
+            self.pending.append(record)
+
+    def flush(self):
+        """예약된 행을 한 번에 커밋 (보관 기간이 지난 행은 같은 트랜잭션에서 삭제) → 기록한 행 수"""
+        with self.lock:
+            records, self.pending = self.pending, []
+        if not records:
+            return 0
+        try:
+            with closing(self.connect()) as conn, conn:
+                conn.executemany(f"INSERT INTO {self.table} (time, market, row) VALUES (?, ?, ?)", records)
+                self.prune(conn)
+        except sqlite3.Error:
+            with self.lock:
+                self.pending[:0] = records  # 다음 flush에서 재시도
+            raise
+        self.unexported += len(records)
+        return len(records)
+
+    def prune(self, conn):
+        """보관 기간이 지난 행 삭제 (호출한 쪽 트랜잭션 안에서)"""
+        if self.keep_days:
+            conn.execute(f"DELETE FROM {self.table} WHERE time < ?", (time.time() - self.keep_days * 86400,))
+
+    def tail(self, count):
+        """최근 count개 행 (오래된 순)"""
+        if not os.path.exists(self.path):
+            return []
+        with closing(self.connect()) as conn:
+            rows = conn.execute(f"SELECT row FROM {self.table} ORDER BY id DESC LIMIT ?", (count,)).fetchall()
+        return [json.loads(row) for row, in reversed(rows)]
+
+# ============================================
+# 엑셀 내보내기
+# ============================================
+
+def export_excel(journal, excel_file, sheet):
+    """저널 최근 행으로 엑셀을 새로 생성 (임시 파일에 쓴 뒤 교체) - openpyxl은 신호가 있을 때만 불러옴"""
+    from openpyxl import Workbook
+    from openpyxl.styles import Font, PatternFill, Alignment
+    
+    wb = Workbook()
+    ws = wb.active
+    ws.title = sheet['title']
+
+    ws.append(sheet['headers'])
+    for cell in ws[1]:
+        cell.font = Font(bold=True)
+        cell.fill = PatternFill(start_color=sheet['color'], end_color=sheet['color'], fill_type="solid")
+        cell.alignment = Alignment(horizontal="center")
+
+    rows = journal.tail(sheet['keep'])
+    for row in rows:
+        ws.append(row)
+
+    temp_file = f"{excel_file}.tmp"
+    wb.save(temp_file)
+    os.replace(temp_file, excel_file)
+    journal.unexported = 0
+    return len(rows)
+
+def main():
+    """저널 → 엑셀 내보내기"""
+    if len(sys.argv) < 2 or sys.argv[1] not in SHEETS:
+        print(__doc__)
+        sys.exit(1)
+
+    sheet = SHEETS[sys.argv[1]]
+    journal_file = sys.argv[2] if len(sys.argv) > 2 else sheet['journal']
+    excel_file = sys.argv[3] if len(sys.argv) > 3 else sheet['excel']
+    count = export_excel(SignalJournal(journal_file, sheet['table']), excel_file, sheet)
+    print(f"📄 {count}개 신호 → {excel_file}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+업비트 모니터 계측 모듈
+- 단계별 소요 시간 히스토그램, 엔드포인트별 API 호출/오류 수, 단계별 오류 수
+- 스캔마다 요약 출력 + 초당 처리 코인 수, 봉 마감 → 알림 지연
+- 프로세스 시작(이 모듈 import) → 첫 시세 요청까지 걸린 시간 (import 비용 확인용)
+- METRICS_FILE 지정 시 스캔마다 Prometheus 텍스트(.prom) 또는 JSON(.json)으로 저장
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from upbit_shard import SHARD_COUNT, SHARD_INDEX, shard_path
+
+METRICS_FILE = shard_path(os.environ.get('METRICS_FILE', ''))  # 예: /var/lib/node_exporter/upbit.prom, metrics.json
+METRICS_PREFIX = 'upbit_'
+
+# 히스토그램 구간 (초)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+class Histogram:
+    """누적 구간 히스토그램 (Prometheus histogram과 같은 구조)"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+class Metrics:
+    """프로세스 공용 계측값 (스레드 안전)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}  # (이름, 라벨) → 값
+        self.gauges = {}
+        self.histograms = {}
+        self.scan = {}  # 현재 스캔의 단계별 소요 시간
+        self.scan_errors = 0
+        self.scan_started = None
+        self.started = time.perf_counter()  # 스크립트 첫 줄에서 import → 프로세스 시작 시각
+        self.first_request = None
+
+    @staticmethod
+    def key(name, labels):
+        if SHARD_COUNT > 1:
+            labels = dict(labels, shard=SHARD_INDEX)  # 샤드별 파일을 한 수집기로 모아도 겹치지 않게
+        return name, tuple(sorted(labels.items()))
+
+    # ============================================
+    # 기록
+    # ============================================
+
+    def inc(self, name, value=1, **labels):
+        key = self.key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        with self.lock:
+            self.gauges[self.key(name, labels)] = value
+
+    def observe(self, name, value, **labels):
+        key = self.key(name, labels)
+        with self.lock:
+            if key not in self.histograms:
+                self.histograms[key] = Histogram()
+            self.histograms[key].observe(value)
+
+    @contextmanager
+    def timer(self, stage):
+        """단계 소요 시간 기록 (stage_seconds 히스토그램 + 이번 스캔 합계)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.observe('stage_seconds', elapsed, stage=stage)
+            with self.lock:
+                self.scan[stage] = self.scan.get(stage, 0.0) + elapsed
+
+    def error(self, stage, exc):
+        """삼킨 예외 집계 (단계, 예외 종류별)"""
+        self.inc('errors_total', stage=stage, type=type(exc).__name__)
+        with self.lock:
+            self.scan_errors += 1
+
+    def api_call(self, endpoint, elapsed, ok=True):
+        """시세 API 호출 1회 (엔드포인트별 호출 수/오류 수/응답 시간, 첫 호출이면 시작 → 첫 요청 시간)"""
+        if self.first_request is None:
+            self.first_request = time.perf_counter() - elapsed - self.started
+            self.set('startup_seconds', self.first_request)
+            print(f"🚀 시작 → 첫 시세 요청 {self.first_request:.2f}초")
+        self.inc('api_requests_total', endpoint=endpoint)
+        if not ok:
+            self.inc('api_errors_total', endpoint=endpoint)
+        self.observe('api_seconds', elapsed, endpoint=endpoint)
+
+    def alert(self, strategy, bar_ms=None):
+        """알림 1건: 신호를 낸 봉의 시작 시각(= 직전 봉 마감, epoch ms) → 알림까지 걸린 시간 (봉 시각을 모르면 건수만)"""
+        self.inc('alerts_total', strategy=strategy)
+        if bar_ms is not None:
+            self.observe('alert_latency_seconds', max(time.time() * 1000 - bar_ms, 0) / 1000, strategy=strategy)
+
+    # ============================================
+    # 스캔 단위 요약
+    # ============================================
+
+    def start_scan(self):
+        with self.lock:
+            self.scan = {}
+            self.scan_errors = 0
+            self.scan_started = time.perf_counter()
+
+    def end_scan(self, strategy, coins):
+        """스캔 종료: 전체 시간/초당 코인 수 기록, 요약 출력, 파일 저장"""
+        elapsed = time.perf_counter() - (self.scan_started or time.perf_counter())
+        rate = coins / elapsed if elapsed > 0 else 0.0
+        self.inc('scans_total', strategy=strategy)
+        self.observe('scan_seconds', elapsed, strategy=strategy)
+        self.set('scan_coins', coins, strategy=strategy)
+        self.set('scan_coins_per_second', rate, strategy=strategy)
+        self.set('last_scan_timestamp', time.time(), strategy=strategy)
+
+        with self.lock:
+            stages = ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in
+                               sorted(self.scan.items(), key=lambda item: -item[1]))
+            errors = self.scan_errors
+        print(f"📈 {coins}개 코인 {elapsed:.1f}초 ({rate:.0f}개/초) | {stages or '-'} | 오류 {errors}건")
+        self.export()
+
+    # ============================================
+    # 내보내기
+    # ============================================
+
+    @staticmethod
+    def format_labels(labels, extra=()):
+        pairs = list(labels) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+    def prometheus_text(self):
+        """Prometheus 텍스트 형식"""
+        lines = []
+        with self.lock:
+            for kind, metrics in (('counter', self.counters), ('gauge', self.gauges)):
+                for name in sorted({name for name, _ in metrics}):
+                    lines.append(f"# TYPE {METRICS_PREFIX}{name} {kind}")
+                    for (metric, labels), value in sorted(metrics.items()):
+                        if metric == name:
+                            lines.append(f"{METRICS_PREFIX}{name}{self.format_labels(labels)} {value}")
+
+            for name in sorted({name for name, _ in self.histograms}):
+                lines.append(f"# TYPE {METRICS_PREFIX}{name} histogram")
+                for (metric, labels), hist in sorted(self.histograms.items()):
+                    if metric != name:
+                        continue
+                    for bound, count in zip(hist.buckets, hist.counts):
+                        lines.append(f"{METRICS_PREFIX}{name}_bucket{self.format_labels(labels, [('le', bound)])} {count}")
+                    lines.append(f"{METRICS_PREFIX}{name}_bucket{self.format_labels(labels, [('le', '+Inf')])} {hist.count}")
+                    lines.append(f"{METRICS_PREFIX}{name}_sum{self.format_labels(labels)} {hist.sum}")
+                    lines.append(f"{METRICS_PREFIX}{name}_count{self.format_labels(labels)} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+    def to_json(self):
+        """JSON 형식 (대시보드/스크립트용)"""
+        def entries(metrics, value):
+            return [{'name': name, 'labels': dict(labels), **value(v)} for (name, labels), v in sorted(metrics.items())]
+
+        with self.lock:
+            return {
+                'time': time.time(),
+                'counters': entries(self.counters, lambda v: {'value': v}),
+                'gauges': entries(self.gauges, lambda v: {'value': v}),
+                'histograms': entries(self.histograms, lambda h: {
+                    'count': h.count, 'sum': h.sum,
+                    'buckets': dict(zip([str(b) for b in h.buckets], h.counts)),
+                }),
+            }
+
+    def export(self, path=None):
+        """METRICS_FILE로 저장 (.json이면 JSON, 그 외 Prometheus 텍스트) - 임시 파일에 쓴 뒤 교체"""
+        path = path or METRICS_FILE
+        if not path:
+            return
+        try:
+            text = json.dumps(self.to_json()) if path.endswith('.json') else self.prometheus_text()
+            temp_path = f"{path}.tmp"
+            with open(temp_path, 'w') as f:
+                f.write(text)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"계측값 저장 오류: {e}")
+
+# 프로세스 공용 계측값
+METRICS = Metrics()
@@ -5,18 +5,27 @@
 일봉 + 단기 시간봉 병행 분석으로 조기 감지 강화
 """
 
-import pyupbit
-import pandas as pd
+from upbit_metrics import METRICS
 import numpy as np
-import requests
-import time
 from datetime import datetime, timedelta
 import pytz
-import ta
-from openpyxl import Workbook, load_workbook
-from openpyxl.styles import Font, PatternFill, Alignment
 import warnings
 import os
+from upbit_api import get_krw_markets
+from upbit_scheduler import run_forever
+from upbit_tiers import MarketTiers, TIER_COLD_EVERY, TIER_FILE
+from upbit_prescreen import PRESCREEN, TICKER_SCREEN
+from upbit_alerts import AlertHistory
+from upbit_shard import shard_path
+from upbit_snapshot import SNAPSHOT_FILE, load_snapshot, save_snapshot
+from upbit_candles import CANDLE_CACHE, DAILY_STORE, arrays_to_frame
+from upbit_rollup import rollup
+from upbit_indicators import INDICATOR_ENGINE
+from upbit_telegram import TELEGRAM, require_telegram, send_telegram, queue_telegram
+from upbit_journal import SHEETS, SignalJournal, export_excel
+from upbit_orderbook import fetch_orderbooks, analyze_orderbook, depth_pressure
+from upbit_trades import TRADE_INTENSITY_THRESHOLD, with_trade_pressure
+from upbit_rules import RuleSet, load_rules
 warnings.filterwarnings('ignore')
 
 # ============================================
@@ -32,101 +41,90 @@ def get_kst_now():
 # 환경변수에서 설정 불러오기
 # ============================================
 
-BOT_TOKEN = os.environ.get('BOT_TOKEN', '')
-CHAT_ID = os.environ.get('CHAT_ID', '')
-
-# 모니터링 설정
+# 모니터링 설정 (텔레그램 BOT_TOKEN/CHAT_ID는 upbit_telegram에서 불러옴)
 SCAN_INTERVAL = int(os.environ.get('SCAN_INTERVAL', '180'))  # 3분으로 단축
+RUN_MODE = os.environ.get('RUN_MODE', 'once')  # once(1회 스캔) / daemon(SCAN_INTERVAL마다 반복)
+SCAN_OFFSET = int(os.environ.get('SCAN_OFFSET', '5'))  # 데몬: 주기 경계 후 몇 초 뒤 스캔
 VOLUME_THRESHOLD_WATCH = float(os.environ.get('VOLUME_THRESHOLD_WATCH', '1.3'))  # 더 낮게
 VOLUME_THRESHOLD_STRONG = float(os.environ.get('VOLUME_THRESHOLD_STRONG', '2.0'))
+LOCAL_ROLLUP = os.environ.get('LOCAL_ROLLUP', '1') == '1'  # 15분봉을 5분봉에서 로컬 생성
+INDICATOR_ENGINE_MODE = os.environ.get('INDICATOR_ENGINE', 'stream')  # stream: 증분 계산, ta: ta 라이브러리로 재계산
 
 # 신호 강도 설정
 SIGNAL_THRESHOLD_STRONG = int(os.environ.get('SIGNAL_THRESHOLD_STRONG', '6'))  # 낮춤
 SIGNAL_THRESHOLD_MEDIUM = int(os.environ.get('SIGNAL_THRESHOLD_MEDIUM', '4'))  # 낮춤
 
 # 출력 파일 설정
-EXCEL_FILE = os.environ.get('EXCEL_FILE', 'upbit_signals_enhanced.xlsx')
+EXCEL_FILE = shard_path(os.environ.get('EXCEL_FILE', 'upbit_signals_enhanced.xlsx'))
+JOURNAL_FILE = shard_path(os.environ.get('JOURNAL_FILE', 'upbit_signals_enhanced.db'))
 
-# 설정 확인
-if not BOT_TOKEN or not CHAT_ID:
-    try:
-        from config import BOT_TOKEN as CONFIG_BOT_TOKEN
-        from config import CHAT_ID as CONFIG_CHAT_ID
-        BOT_TOKEN = CONFIG_BOT_TOKEN
-        CHAT_ID = CONFIG_CHAT_ID
-    except ImportError:
-        print("❌ 텔레그램 설정이 없습니다!")
-        exit(1)
+# 신호 저널 (스캔 중에는 추가만, 엑셀은 스캔 후 생성)
+SIGNAL_JOURNAL = SignalJournal(JOURNAL_FILE, SHEETS['enhanced']['table'])
 
-# ============================================
-# 텔레그램 전송 함수
-# ============================================
+# 마켓 등급 (hot: 매 회차, cold: TIER_COLD_EVERY회차마다) - 상태가 유지되는 데몬 / TIER_FILE / SNAPSHOT_FILE 지정 시에만 사용
+TIERS = MarketTiers(SCAN_INTERVAL, TIER_COLD_EVERY if RUN_MODE == 'daemon' or TIER_FILE or SNAPSHOT_FILE else 1,
+                    path=TIER_FILE or None)
 
-def send_telegram(message, parse_mode=None):
-    """텔레그램 메시지 전송"""
-    try:
-        url = f"https://api.telegram.org/bot{BOT_TOKEN}/sendMessage"
-        data = {
-            "chat_id": CHAT_ID,
-            "text": message
-        }
-        if parse_mode:
-            data["parse_mode"] = parse_mode
-            
-        response = requests.post(url, data=data, timeout=10)
-        return response.json()
-    except Exception as e:
-        print(f"텔레그램 전송 실패: {e}")
-        return None
+# 코인별 재알림 제한 (쿨다운 안에서는 점수가 올라갈 때만)
+ALERTS = AlertHistory()
+
+# 스냅샷에 함께 저장할 상태
+SNAPSHOT_STATES = {'tiers': TIERS, 'alerts': ALERTS}
 
 # ============================================
 # 🆕 단기 시간봉 분석 함수 (핵심 개선)
 # ============================================
 
 def analyze_short_term_volume(coin):
-    """5분봉, 15분봉 기반 실시간 급등 감지"""
+    """5분봉, 15분봉 기반 실시간 급등 감지 (NumPy 배열만 사용)"""
     try:
-        # 5분봉 데이터 (최근 100개 = 약 8시간)
-        df_5m = pyupbit.get_ohlcv(coin, interval="minute5", count=100)
-        # 15분봉 데이터 (최근 100개 = 약 1일)
-        df_15m = pyupbit.get_ohlcv(coin, interval="minute15", count=100)
+        # 5분봉 데이터 (최근 100개 = 약 8시간) - 캐시에서 새 봉만 추가 조회
+        ts_5m, ohlcv_5m = CANDLE_CACHE.get_arrays(coin, "minute5", 100)
+        if LOCAL_ROLLUP:
+            # 15분봉은 5분봉에서 로컬 집계 (약 33개, 지표 계산엔 10개면 충분)
+            _, ohlcv_15m = rollup(ts_5m, ohlcv_5m, "minute15")
+        else:
+            # 15분봉 데이터 (최근 100개 = 약 1일)
+            _, ohlcv_15m = CANDLE_CACHE.get_arrays(coin, "minute15", 100)
         
-        if df_5m is None or df_15m is None or len(df_5m) < 20 or len(df_15m) < 20:
+        if len(ohlcv_5m) < 20 or len(ohlcv_15m) < 20:
             return None
         
+        open_5m, close_5m, volume_5m = ohlcv_5m[:, 0], ohlcv_5m[:, 3], ohlcv_5m[:, 4]
+        close_15m, volume_15m = ohlcv_15m[:, 3], ohlcv_15m[:, 4]
+        
         # === 5분봉 분석 ===
-        current_5m_volume = df_5m['volume'].iloc[-1]
-        volume_5m_ma_10 = df_5m['volume'].rolling(10).mean().iloc[-1]
+        current_5m_volume = volume_5m[-1]
+        volume_5m_ma_10 = volume_5m[-10:].mean()
         volume_5m_ratio = current_5m_volume / volume_5m_ma_10 if volume_5m_ma_10 > 0 else 0
         
         # 최근 3개 봉의 평균 거래량
-        recent_3_volume = df_5m['volume'].iloc[-3:].mean()
-        prev_10_volume = df_5m['volume'].iloc[-13:-3].mean()
+        recent_3_volume = volume_5m[-3:].mean()
+        prev_10_volume = volume_5m[-13:-3].mean()
         volume_surge_ratio = recent_3_volume / prev_10_volume if prev_10_volume > 0 else 0
         
         # 5분봉 가격 변화
-        price_change_5m = ((df_5m['close'].iloc[-1] - df_5m['close'].iloc[-4]) / df_5m['close'].iloc[-4]) * 100
+        price_change_5m = ((close_5m[-1] - close_5m[-4]) / close_5m[-4]) * 100
         
         # === 15분봉 분석 ===
-        current_15m_volume = df_15m['volume'].iloc[-1]
-        volume_15m_ma_10 = df_15m['volume'].rolling(10).mean().iloc[-1]
+        current_15m_volume = volume_15m[-1]
+        volume_15m_ma_10 = volume_15m[-10:].mean()
         volume_15m_ratio = current_15m_volume / volume_15m_ma_10 if volume_15m_ma_10 > 0 else 0
         
         # 15분봉 가격 변화
-        price_change_15m = ((df_15m['close'].iloc[-1] - df_15m['close'].iloc[-4]) / df_15m['close'].iloc[-4]) * 100
+        price_change_15m = ((close_15m[-1] - close_15m[-4]) / close_15m[-4]) * 100
         
         # === 연속 거래량 증가 감지 ===
         consecutive_increase = 0
-        for i in range(1, min(5, len(df_5m))):
-            if df_5m['volume'].iloc[-i] > df_5m['volume'].iloc[-i-1]:
+        for i in range(1, min(5, len(volume_5m))):
+            if volume_5m[-i] > volume_5m[-i-1]:
                 consecutive_increase += 1
             else:
                 break
         
         # === 체결강도 (간접 계산) ===
         # 양봉/음봉 비율로 매수세 판단
-        recent_candles = df_5m.iloc[-10:]
-        bullish_count = sum(recent_candles['close'] > recent_candles['open'])
+        bullish_count = int(np.count_nonzero(close_5m[-10:] > open_5m[-10:]))
         bullish_ratio = bullish_count / 10
         
         return {
@@ -137,9 +135,10 @@ def analyze_short_term_volume(coin):
             'price_change_15m': price_change_15m,
             'consecutive_increase': consecutive_increase,
             'bullish_ratio': bullish_ratio,
-            'current_price': df_5m['close'].iloc[-1]
+            'current_price': close_5m[-1]
         }
     except Exception as e:
+        METRICS.error('short_term', e)
         print(f"단기 시간봉 분석 오류 ({coin}): {e}")
         return None
 
@@ -150,24 +149,26 @@ def analyze_short_term_volume(coin):
 def analyze_volume(coin):
     """거래량 분석 - 일봉 기반"""
     try:
-        df = pyupbit.get_ohlcv(coin, interval="day", count=30)
-        if df is None or len(df) < 20:
+        # 공용 일봉 저장소 (마감 봉은 하루 한 번, 오늘 봉만 스캔마다 갱신)
+        _, ohlcv = DAILY_STORE.get_arrays(coin, 30)
+        if len(ohlcv) < 20:
             return None
+        close, volume = ohlcv[:, 3], ohlcv[:, 4]
         
-        current_volume = df['volume'].iloc[-1]
-        volume_ma_20 = df['volume'].rolling(20).mean().iloc[-1]
+        current_volume = volume[-1]
+        volume_ma_20 = volume[-20:].mean()
         volume_ratio = current_volume / volume_ma_20
         
-        volume_ma_7 = df['volume'].rolling(7).mean().iloc[-1]
-        volume_ma_14 = df['volume'].rolling(14).mean().iloc[-1]
+        volume_ma_7 = volume[-7:].mean()
+        volume_ma_14 = volume[-14:].mean()
         accumulation_index = ((volume_ma_7 - volume_ma_14) / volume_ma_14) * 100
         
-        price_7d_ago = df['close'].iloc[-8]
-        current_price = df['close'].iloc[-1]
+        price_7d_ago = close[-8]
+        current_price = close[-1]
         price_change_7d = abs((current_price - price_7d_ago) / price_7d_ago) * 100
         
-        price_change_1d = abs((df['close'].iloc[-1] - df['close'].iloc[-2]) / df['close'].iloc[-2]) * 100
-        volume_change_1d = ((current_volume - df['volume'].iloc[-2]) / df['volume'].iloc[-2]) * 100
+        price_change_1d = abs((close[-1] - close[-2]) / close[-2]) * 100
+        volume_change_1d = ((current_volume - volume[-2]) / volume[-2]) * 100
         
         if price_change_1d > 0:
             divergence = volume_change_1d / price_change_1d
@@ -183,52 +184,32 @@ def analyze_volume(coin):
             'current_price': current_price
         }
     except Exception as e:
+        METRICS.error('daily', e)
         return None
 
 # ============================================
-# 호가창 분석 함수 (기존 유지)
+# 기술적 지표 계산 함수 (기존 유지)
 # ============================================
 
-def analyze_orderbook(coin):
-    """호가창 물량 변화 분석"""
+def calculate_indicators(coin):
+    """5가지 기술적 지표 계산 (마켓별 지표 상태를 이어 받아 진행 중인 봉만 계산)"""
     try:
-        orderbook = pyupbit.get_orderbook(coin)
-        if orderbook is None or not isinstance(orderbook, list) or len(orderbook) == 0:
-            return None
-        
-        orderbook_data = orderbook[0]
-        if 'orderbook_units' not in orderbook_data:
+        ts, ohlcv = DAILY_STORE.get_arrays(coin, 100)
+        if len(ts) < 50:
             return None
         
-        units = orderbook_data['orderbook_units']
-        total_bid_size = sum([item.get('bid_size', 0) for item in units])
-        total_ask_size = sum([item.get('ask_size', 0) for item in units])
-        bid_ask_ratio = total_bid_size / total_ask_size if total_ask_size > 0 else 0
-        
-        top_bid = units[0].get('bid_size', 0) if len(units) > 0 else 0
-        top_ask = units[0].get('ask_size', 0) if len(units) > 0 else 0
-        
-        return {
-            'total_bid': total_bid_size,
-            'total_ask': total_ask_size,
-            'bid_ask_ratio': bid_ask_ratio,
-            'top_bid': top_bid,
-            'top_ask': top_ask
-        }
+        if INDICATOR_ENGINE_MODE == 'ta':
+            return calculate_indicators_ta(arrays_to_frame(ts, ohlcv))
+        return INDICATOR_ENGINE.indicators(coin, ts, ohlcv)
     except Exception as e:
+        METRICS.error('indicators', e)
         return None
 
-# ============================================
-# 기술적 지표 계산 함수 (기존 유지)
-# ============================================
-
-def calculate_indicators(coin):
-    """5가지 기술적 지표 계산"""
+def calculate_indicators_ta(df):
+    """ta 라이브러리로 100개 봉 전체 재계산 (검증용)"""
+    import ta
+    
     try:
-        df = pyupbit.get_ohlcv(coin, interval="day", count=100)
-        if df is None or len(df) < 50:
-            return None
-        
         rsi = ta.momentum.RSIIndicator(df['close'], window=14).rsi().iloc[-1]
         rsi_signal = "과매도" if rsi < 30 else "과매수" if rsi > 70 else "중립"
         
@@ -270,93 +251,58 @@ def calculate_indicators(coin):
             'current_price': current_price
         }
     except Exception as e:
+        METRICS.error('indicators', e)
         return None
 
 # ============================================
 # 🆕 개선된 신호 강도 판단 함수
 # ============================================
 
-def calculate_signal_strength(volume_data, indicators, orderbook_data, short_term_data):
-    """단기 + 중장기 지표 통합 분석 (최대 14개 지표)"""
-    score = 0
-    signals = []
-    signal_type = "NORMAL"  # EARLY, NORMAL, STRONG
-    
+# 단기 + 중장기 지표 통합 (최대 14개 지표, 그룹 = if/elif, 레벨 NORMAL / EARLY)
+ENHANCED_RULES = [
     # === 🔥 조기 감지 신호 (단기 시간봉) ===
-    if short_term_data:
-        # 1. 5분봉 거래량 급증
-        if short_term_data['volume_5m_ratio'] >= 2.0:
-            score += 2  # 가중치 2배
-            signals.append("🔥 5분봉 거래량 폭발")
-            signal_type = "EARLY"
-        elif short_term_data['volume_5m_ratio'] >= 1.5:
-            score += 1
-            signals.append("⚡ 5분봉 거래량 증가")
-        
-        # 2. 연속 거래량 증가
-        if short_term_data['consecutive_increase'] >= 3:
-            score += 2
-            signals.append("🔥 연속 거래량 증가")
-            signal_type = "EARLY"
-        
-        # 3. 급등 진행 중
-        if short_term_data['price_change_5m'] > 5:
-            score += 2
-            signals.append("🚀 5분봉 급등 중")
-            signal_type = "EARLY"
-        elif short_term_data['price_change_5m'] > 3:
-            score += 1
-            signals.append("📈 5분봉 상승 중")
-        
-        # 4. 15분봉 거래량 급증
-        if short_term_data['volume_15m_ratio'] >= 2.0:
-            score += 1
-            signals.append("✅ 15분봉 거래량 돌파")
-        
-        # 5. 매수세 우위
-        if short_term_data['bullish_ratio'] >= 0.7:
-            score += 1
-            signals.append("✅ 매수세 강함")
-    
+    # 1. 5분봉 거래량 급증 (가중치 2배)
+    [{'when': [('volume_5m_ratio', '>=', 2.0)], 'points': 2, 'label': "🔥 5분봉 거래량 폭발", 'level': "EARLY"},
+     {'when': [('volume_5m_ratio', '>=', 1.5)], 'points': 1, 'label': "⚡ 5분봉 거래량 증가"}],
+    # 2. 연속 거래량 증가
+    [{'when': [('consecutive_increase', '>=', 3)], 'points': 2, 'label': "🔥 연속 거래량 증가", 'level': "EARLY"}],
+    # 3. 급등 진행 중
+    [{'when': [('price_change_5m', '>', 5)], 'points': 2, 'label': "🚀 5분봉 급등 중", 'level': "EARLY"},
+     {'when': [('price_change_5m', '>', 3)], 'points': 1, 'label': "📈 5분봉 상승 중"}],
+    # 4. 15분봉 거래량 급증
+    [{'when': [('volume_15m_ratio', '>=', 2.0)], 'points': 1, 'label': "✅ 15분봉 거래량 돌파"}],
+    # 5. 매수세 우위 (양봉 비율 또는 실제 체결강도)
+    [{'when': [('bullish_ratio', '>=', 0.7)], 'points': 1, 'label': "✅ 매수세 강함"},
+     {'when': [('trade_intensity', '>=', TRADE_INTENSITY_THRESHOLD)], 'points': 1, 'label': "✅ 체결강도 {trade_intensity:.0f}%"}],
     # === 일봉 거래량 분석 ===
-    if volume_data:
-        if volume_data['volume_ratio'] >= 2.0:
-            score += 1
-            signals.append("✅ 일봉 거래량 MA 돌파")
-        
-        if volume_data['accumulation_index'] > 20 and volume_data['price_change_7d'] < 5:
-            score += 1
-            signals.append("✅ 축적 패턴")
-        
-        if volume_data['divergence'] > 10:
-            score += 1
-            signals.append("✅ 고괴리")
-    
-    # === 호가창 ===
-    if orderbook_data:
-        if orderbook_data['bid_ask_ratio'] > 1.5:
-            score += 1
-            signals.append("✅ 매수벽 우세")
-    
+    [{'when': [('volume_ratio', '>=', 2.0)], 'points': 1, 'label': "✅ 일봉 거래량 MA 돌파"}],
+    [{'when': [('accumulation_index', '>', 20), ('price_change_7d', '<', 5)], 'points': 1, 'label': "✅ 축적 패턴"}],
+    [{'when': [('divergence', '>', 10)], 'points': 1, 'label': "✅ 고괴리"}],
+    # === 호가창 (호가 변화: 최근 스냅샷 대비 매수벽 증가 / 매도벽 철수) ===
+    [{'when': [('bid_ask_ratio', '>', 1.5)], 'points': 1, 'label': "✅ 매수벽 우세"},
+     {'when': [('depth_signal', 'truthy')], 'points': 1, 'label': "✅ {depth_signal}"}],
     # === 기술적 지표 ===
-    if indicators:
-        if indicators['rsi'] < 30:
-            score += 1
-            signals.append("✅ RSI 과매도")
-        
-        if indicators['macd_signal'] == "골든크로스":
-            score += 1
-            signals.append("✅ MACD 골든크로스")
-        
-        if indicators['bb_signal'] == "하단터치":
-            score += 1
-            signals.append("✅ 볼린저 하단")
-        
-        if indicators['ma_signal'] == "상향돌파":
-            score += 1
-            signals.append("✅ MA 상향돌파")
-    
-    return score, signals, signal_type
+    [{'when': [('rsi', '<', 30)], 'points': 1, 'label': "✅ RSI 과매도"}],
+    [{'when': [('macd_signal', '==', "골든크로스")], 'points': 1, 'label': "✅ MACD 골든크로스"}],
+    [{'when': [('bb_signal', '==', "하단터치")], 'points': 1, 'label': "✅ 볼린저 하단"}],
+    [{'when': [('ma_signal', '==', "상향돌파")], 'points': 1, 'label': "✅ MA 상향돌파"}],
+]
+
+ENHANCED_SCORER = RuleSet(load_rules('enhanced', ENHANCED_RULES))
+
+def signal_features(volume_data, indicators, orderbook_data, short_term_data):
+    """단기/일봉/지표/호가 → 채점용 지표 dict (없는 항목은 빠짐 → 해당 규칙 불성립)"""
+    features = {}
+    for data in (short_term_data, volume_data, orderbook_data, indicators):
+        if data:
+            features.update(data)
+    if orderbook_data:
+        features['depth_signal'] = depth_pressure(orderbook_data)
+    return features
+
+def calculate_signal_strength(volume_data, indicators, orderbook_data, short_term_data):
+    """단기 + 중장기 지표 통합 분석 (코인 1개, 여러 코인은 ENHANCED_SCORER.score_rows로 한 번에)"""
+    return ENHANCED_SCORER.score_row(signal_features(volume_data, indicators, orderbook_data, short_term_data))
 
 # ============================================
 # 🆕 개선된 텔레그램 메시지
@@ -404,6 +350,9 @@ def format_telegram_message(coin, score, signals, volume_data, indicators, order
         if short_term_data['bullish_ratio'] >= 0.6:
             message += f"💪 매수세: {short_term_data['bullish_ratio']*100:.0f}%\n"
         
+        if 'trade_intensity' in short_term_data:
+            message += f"📊 체결강도: {short_term_data['trade_intensity']:.0f}%\n"
+        
         message += "\n"
     
     # 기존 정보
@@ -423,78 +372,93 @@ def format_telegram_message(coin, score, signals, volume_data, indicators, order
     return message
 
 # ============================================
-# 엑셀 저장 함수 (개선)
+# 신호 저장 함수 (저널 + 엑셀 내보내기)
 # ============================================
 
 def save_to_excel(coin, score, volume_data, indicators, orderbook_data, short_term_data, signal_type):
-    """엑셀에 결과 저장"""
+    """저널에 신호 행 추가 (커밋은 스캔 끝에 flush_signals)"""
+    current_price = short_term_data['current_price'] if short_term_data else (volume_data['current_price'] if volume_data else '')
+    
+    row_data = [
+        get_kst_now().strftime('%Y-%m-%d %H:%M:%S'),
+        coin.replace('KRW-', ''),
+        signal_type,
+        f"{score}/14",
+        current_price,
+        f"{short_term_data['volume_5m_ratio']:.2f}" if short_term_data else '',
+        f"{short_term_data['price_change_5m']:+.2f}%" if short_term_data else '',
+        f"{short_term_data['consecutive_increase']}" if short_term_data else '',
+        f"{volume_data['volume_ratio']:.2f}" if volume_data else '',
+        f"{indicators['rsi']:.1f}" if indicators else '',
+        "🔥조기감지" if signal_type == "EARLY" else "강력매수" if score >= 7 else "매수준비"
+    ]
+    
+    SIGNAL_JOURNAL.append(coin, row_data)
+
+def flush_signals():
+    """저널 일괄 커밋"""
     try:
-        try:
-            wb = load_workbook(EXCEL_FILE)
-            ws = wb.active
-        except:
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "실시간 신호"
-            
-            headers = ['시간', '코인', '신호타입', '신호강도', '현재가', '5분봉거래량', 
-                      '가격변화5분', '연속증가', '일봉거래량', 'RSI', '판단']
-            ws.append(headers)
-            
-            for cell in ws[1]:
-                cell.font = Font(bold=True)
-                cell.fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-                cell.alignment = Alignment(horizontal="center")
-        
-        current_price = short_term_data['current_price'] if short_term_data else (volume_data['current_price'] if volume_data else '')
-        
-        row_data = [
-            get_kst_now().strftime('%Y-%m-%d %H:%M:%S'),
-            coin.replace('KRW-', ''),
-            signal_type,
-            f"{score}/14",
-            current_price,
-            f"{short_term_data['volume_5m_ratio']:.2f}" if short_term_data else '',
-            f"{short_term_data['price_change_5m']:+.2f}%" if short_term_data else '',
-            f"{short_term_data['consecutive_increase']}" if short_term_data else '',
-            f"{volume_data['volume_ratio']:.2f}" if volume_data else '',
-            f"{indicators['rsi']:.1f}" if indicators else '',
-            "🔥조기감지" if signal_type == "EARLY" else "강력매수" if score >= 7 else "매수준비"
-        ]
-        
-        ws.append(row_data)
-        
-        if ws.max_row > 101:
-            ws.delete_rows(2, ws.max_row - 101)
-        
-        wb.save(EXCEL_FILE)
-        
+        with METRICS.timer('journal'):
+            SIGNAL_JOURNAL.flush()
     except Exception as e:
+        METRICS.error('journal', e)
+        print(f"신호 저장 오류: {e}")
+
+def export_signals():
+    """새 신호가 있으면 저널 최근 100개로 엑셀 생성 (스캔 밖에서 실행)"""
+    if not SIGNAL_JOURNAL.unexported:
+        return
+    try:
+        with METRICS.timer('export'):
+            export_excel(SIGNAL_JOURNAL, EXCEL_FILE, SHEETS['enhanced'])
+    except Exception as e:
+        METRICS.error('export', e)
         print(f"엑셀 저장 오류: {e}")
 
 # ============================================
 # 🆕 개선된 메인 스캔 함수
 # ============================================
 
-def scan_upbit_market():
-    """업비트 전체 시장 스캔 (단기 + 중장기 병행)"""
-    print(f"\n{'='*50}")
-    print(f"🔍 스캔 시작: {get_kst_now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print(f"{'='*50}\n")
-    
-    tickers = pyupbit.get_tickers(fiat="KRW")
-    print(f"📊 총 {len(tickers)}개 코인 분석 중...\n")
-    
-    signal_count = 0
-    early_detect_count = 0
+def select_scan_markets(markets, passed=None):
+    """
+    이번 회차 스캔할 코인
+    - 등급 순번 먼저: hot 전부 + 차례가 된 cold (사전 선별 결과와 무관하게 항상 스캔)
+    - 현재가 일괄 조회 (API 1~2회) → 오늘 진행 중인 일봉 갱신 + 직전 스냅샷 대비 사전 선별 통과 코인 추가
+    - passed: 공용 스캔 코어(upbit_combined)가 이미 선별한 코인 (현재가/일봉 갱신도 끝난 상태)
+    """
+    tickers = TIERS.select(markets)
+    if passed is None:
+        try:
+            with METRICS.timer('daily'):
+                ticker_rows = TICKER_SCREEN.fetch_all(markets if PRESCREEN else tickers)
+                DAILY_STORE.apply_tickers(ticker_rows)
+            if PRESCREEN:
+                with METRICS.timer('prescreen'):
+                    passed = TICKER_SCREEN.screen(ticker_rows)
+        except Exception as e:
+            METRICS.error('daily', e)
+            print(f"❌ 현재가 일괄 조회 오류: {e}")
+    if passed is not None:
+        due = set(tickers)
+        tickers = [coin for coin in markets if coin in due or coin in passed]
     
+    METRICS.set('scan_markets', len(tickers), strategy='enhanced')
+    if len(tickers) < len(markets):
+        print(f"🔎 {len(tickers)}/{len(markets)}개 스캔 (hot {TIERS.counts()[0]}개)")
+    return tickers
+
+def screen_markets(tickers):
+    """1~2단계: 단기 시간봉 + 일봉으로 후보 선별 후 등급 갱신 → [(코인, 단기 지표, 일봉 지표)]"""
+    candidates = []
+    scanned = []
     for idx, coin in enumerate(tickers, 1):
         try:
             if idx % 50 == 0:
                 print(f"진행률: {idx}/{len(tickers)} ({idx/len(tickers)*100:.1f}%)")
             
             # 🆕 1단계: 단기 시간봉 먼저 체크 (빠른 감지)
-            short_term_data = analyze_short_term_volume(coin)
+            with METRICS.timer('short_term'):
+                short_term_data = analyze_short_term_volume(coin)
             
             # 조기 감지 조건: 5분봉 거래량 1.5배 이상 OR 가격 3% 이상 상승
             early_signal = False
@@ -506,48 +470,122 @@ def scan_upbit_market():
                     print(f"⚡ {coin}: 조기 감지! 5분봉 거래량 {short_term_data['volume_5m_ratio']:.1f}배")
             
             # 2단계: 일봉 분석 (기존)
-            volume_data = analyze_volume(coin)
+            with METRICS.timer('daily'):
+                volume_data = analyze_volume(coin)
+            if short_term_data or volume_data:
+                scanned.append(coin)
             
             # 조기 감지 OR 일봉 조건 충족 시 정밀 분석
             if not early_signal and (not volume_data or volume_data['volume_ratio'] < VOLUME_THRESHOLD_WATCH):
                 continue
             
-            # 3단계: 기술적 지표 + 호가창
-            indicators = calculate_indicators(coin)
-            orderbook_data = analyze_orderbook(coin)
-            
-            # 4단계: 신호 강도 계산
-            score, signals, signal_type = calculate_signal_strength(volume_data, indicators, orderbook_data, short_term_data)
+            candidates.append((coin, short_term_data, volume_data))
             
+        except Exception as e:
+            METRICS.error('screening', e)
+            print(f"❌ {coin} 분석 오류: {e}")
+            continue
+    
+    # 관문 통과(조기 감지 / 일봉 거래량) 코인은 hot, 연속 미통과 시 cold로 강등
+    TIERS.update(scanned, [coin for coin, _, _ in candidates])
+    hot, cold = TIERS.counts()
+    METRICS.set('tier_markets', hot, tier='hot')
+    METRICS.set('tier_markets', cold, tier='cold')
+    return candidates
+
+def handle_candidates(candidates, orderbooks):
+    """3~5단계: 후보 코인 지표/호가 분석, 신호 평가/알림 → (신호 수, 조기감지 수)"""
+    signal_count = 0
+    early_detect_count = 0
+    
+    analyzed = []
+    for coin, short_term_data, volume_data in candidates:
+        try:
+            # 3단계: 기술적 지표 + 호가창
+            with METRICS.timer('indicators'):
+                indicators = calculate_indicators(coin)
+            orderbook_data = analyze_orderbook(coin, orderbooks.get(coin, {}))
+            short_term_data = with_trade_pressure(coin, short_term_data)
+            analyzed.append((coin, short_term_data, volume_data, indicators, orderbook_data))
+        except Exception as e:
+            METRICS.error('signals', e)
+            print(f"❌ {coin} 분석 오류: {e}")
+            continue
+    
+    # 4단계: 후보 전체 신호 강도 일괄 계산 (NumPy 1회)
+    with METRICS.timer('scoring'):
+        results = ENHANCED_SCORER.score_rows([signal_features(volume_data, indicators, orderbook_data, short_term_data)
+                                              for _, short_term_data, volume_data, indicators, orderbook_data in analyzed])
+    
+    for (coin, short_term_data, volume_data, indicators, orderbook_data), (score, signals, signal_type) in zip(analyzed, results):
+        try:
             # 5단계: 신호 발송 (4개 이상만)
             if score >= 4:
                 signal_count += 1
                 if signal_type == "EARLY":
                     early_detect_count += 1
                 
-                message = format_telegram_message(coin, score, signals, volume_data, indicators, orderbook_data, short_term_data, signal_type)
-                if message:
-                    send_telegram(message)
-                    print(f"{'🔥' if signal_type == 'EARLY' else '✅'} 신호 발송: {coin} ({score}/14, {signal_type})")
+                with METRICS.timer('alerts'):
+                    if not ALERTS.allow(coin, score):
+                        # 저널에는 남기고 텔레그램만 생략
+                        METRICS.inc('alerts_suppressed_total', strategy='enhanced')
+                        print(f"🔕 {coin}: {score}/14 (재알림 제한)")
+                    else:
+                        message = format_telegram_message(coin, score, signals, volume_data, indicators, orderbook_data, short_term_data, signal_type)
+                        if message:
+                            queue_telegram(message)
+                            METRICS.alert('enhanced', CANDLE_CACHE.last_time(coin, "minute5"))
+                            print(f"{'🔥' if signal_type == 'EARLY' else '✅'} 신호 발송: {coin} ({score}/14, {signal_type})")
                 
-                save_to_excel(coin, score, volume_data, indicators, orderbook_data, short_term_data, signal_type)
-            
-            time.sleep(0.1)
+                with METRICS.timer('journal'):
+                    save_to_excel(coin, score, volume_data, indicators, orderbook_data, short_term_data, signal_type)
             
         except Exception as e:
-            print(f"❌ {coin} 분석 오류: {e}")
+            METRICS.error('signals', e)
+            print(f"❌ {coin} 신호 처리 오류: {e}")
             continue
     
+    return signal_count, early_detect_count
+
+def scan_upbit_market():
+    """업비트 전체 시장 스캔 (단기 + 중장기 병행)"""
+    print(f"\n{'='*50}")
+    print(f"🔍 스캔 시작: {get_kst_now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"{'='*50}\n")
+    METRICS.start_scan()
+    
+    with METRICS.timer('markets'):
+        markets = get_krw_markets()
+    tickers = select_scan_markets(markets)
+    print(f"📊 총 {len(tickers)}개 코인 분석 중...\n")
+    
+    candidates = screen_markets(tickers)
+    
+    # 3단계: 후보 코인 호가창 일괄 조회
+    with METRICS.timer('orderbook'):
+        orderbooks = fetch_orderbooks([coin for coin, _, _ in candidates])
+    
+    signal_count, early_detect_count = handle_candidates(candidates, orderbooks)
+    flush_signals()
+    
     print(f"\n{'='*50}")
     print(f"✅ 스캔 완료: 총 {signal_count}개 신호 (조기감지 {early_detect_count}개)")
     print(f"{'='*50}\n")
+    METRICS.end_scan('enhanced', len(tickers))
 
 # ============================================
 # 메인 실행
 # ============================================
 
+def run_scan():
+    """스캔 1회 후 엑셀 내보내기 + 상태 저장"""
+    scan_upbit_market()
+    export_signals()
+    save_snapshot(states=SNAPSHOT_STATES)
+
 def main():
     """메인 실행 함수"""
+    require_telegram()
     print("""
     ╔══════════════════════════════════════╗
     ║   업비트 실시간 모니터링 v2.0       ║
@@ -563,12 +601,26 @@ def main():
     else:
         print("❌ 텔레그램 연결 실패! 계속 진행...\n")
     
+    # 이전 실행의 캔들 캐시/일봉/현재가 스냅샷/등급/알림 기록 복원
+    load_snapshot(states=SNAPSHOT_STATES)
+    
     try:
-        scan_upbit_market()
+        if RUN_MODE == 'daemon':
+            # 프로세스를 유지하며 캔들 캐시/일봉/지표 상태를 재사용
+            print(f"🔁 데몬 모드: {SCAN_INTERVAL}초 주기")
+            run_forever(run_scan, SCAN_INTERVAL, SCAN_OFFSET)
+        else:
+            run_scan()
         
     except KeyboardInterrupt:
+        flush_signals()
+        export_signals()
         print("\n\n🛑 모니터링 중지됨")
         send_telegram("🛑 업비트 모니터링 v2.0 종료")
+    
+    finally:
+        # 남은 알림 발송 후 종료
+        TELEGRAM.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+업비트 호가창 공통 모듈
+여러 코인의 호가를 한 번의 요청으로 묶어서 조회 + 매수/매도 비율 계산
+- 호가는 고정 깊이 배열 (depth × 4: 매수가, 매수량, 매도가, 매도량)로 보관
+- 묶음 요청 1회분은 (마켓 × depth × 4) 배열 하나에 담고 마켓별로 나눠 씀
+- 조회/수신한 호가는 마켓별 링버퍼(미리 할당한 배열)에 쌓아 최근 N개 스냅샷 대비 변화(매수벽 증가, 매도벽 철수, 불균형 변화) 계산
+- 링버퍼는 상태 스냅샷(upbit_snapshot)으로 실행 간에 유지 → 1회 실행도 이전 실행의 호가와 비교
+"""
+
+import os
+import threading
+import time
+
+import numpy as np
+
+from upbit_api import fetch_orderbook
+from upbit_metrics import METRICS
+
+# 한 번의 호가 요청에 담을 마켓 수
+ORDERBOOK_CHUNK_SIZE = int(os.environ.get('ORDERBOOK_CHUNK_SIZE', '50'))
+ORDERBOOK_DEPTH = int(os.environ.get('ORDERBOOK_DEPTH', '30'))  # 보관할 호가 단계 수 (모자라면 0으로 채움)
+
+# 호가 시계열 링버퍼 (메모리 = 마켓 수 × 스냅샷 수 × 깊이 × 4 × 4바이트, 시작 시 한 번 할당)
+ORDERBOOK_HISTORY_MARKETS = int(os.environ.get('ORDERBOOK_HISTORY_MARKETS', '256'))  # 추적할 최대 마켓 수 (넘으면 가장 오래 갱신 안 된 마켓 교체)
+ORDERBOOK_HISTORY_SIZE = int(os.environ.get('ORDERBOOK_HISTORY_SIZE', '120'))  # 마켓별 보관 스냅샷 수
+ORDERBOOK_HISTORY_DEPTH = int(os.environ.get('ORDERBOOK_HISTORY_DEPTH', '15'))  # 보관할 호가 단계 수
+ORDERBOOK_HISTORY_INTERVAL = float(os.environ.get('ORDERBOOK_HISTORY_INTERVAL', '1'))  # 같은 마켓 최소 저장 간격 (초)
+
+# 호가 변화 지표 / 점수 조건
+ORDERBOOK_DELTA_WINDOW = int(os.environ.get('ORDERBOOK_DELTA_WINDOW', '10'))  # 비교할 최근 스냅샷 수
+ORDERBOOK_DELTA_MAX_AGE = float(os.environ.get('ORDERBOOK_DELTA_MAX_AGE', '600'))  # 최신 스냅샷보다 이 초 이상 오래된 스냅샷은 비교 안 함
+ORDERBOOK_IMBALANCE_RISE = float(os.environ.get('ORDERBOOK_IMBALANCE_RISE', '0.1'))  # 불균형 증가 폭
+ORDERBOOK_WALL_GROWTH = float(os.environ.get('ORDERBOOK_WALL_GROWTH', '1.5'))  # 최대 매수벽 증가 배수
+ORDERBOOK_WALL_PULL = float(os.environ.get('ORDERBOOK_WALL_PULL', '0.5'))  # 최대 매도벽이 빠진 비율
+
+# 호가 배열 열 순서
+UNIT_FIELDS = ('bid_price', 'bid_size', 'ask_price', 'ask_size')
+BID_PRICE, BID_SIZE, ASK_PRICE, ASK_SIZE = range(len(UNIT_FIELDS))
+
+# ============================================
+# 호가 변환
+# ============================================
+
+def fill_orderbook(book, ob):
+    """호가 원본 1건의 orderbook_units → book (depth × 4) 배열에 채움"""
+    units = ob['orderbook_units'][:len(book)]
+    if units:
+        book[:len(units)] = [[u.get(f, 0) for f in UNIT_FIELDS] for u in units]
+    return book
+
+def orderbook_to_array(ob, depth=None):
+    """호가 원본 1건 → (depth × 4) 배열 (원본에 호가가 없으면 None)"""
+    if not ob or 'orderbook_units' not in ob:
+        return None
+    return fill_orderbook(np.zeros((depth or ORDERBOOK_DEPTH, len(UNIT_FIELDS))), ob)
+
+# ============================================
+# 호가 조회 (다중 마켓)
+# ============================================
+
+def fetch_orderbook_chunk(coins):
+    """마켓 목록 1묶음 호가 조회 → {마켓: 호가 배열} (요청 1회, 배열 할당 1회)"""
+    orderbook = fetch_orderbook(list(coins))
+    if not orderbook:
+        return {}
+    orderbook = [ob for ob in orderbook if isinstance(ob, dict) and 'market' in ob and 'orderbook_units' in ob]
+    block = np.zeros((len(orderbook), ORDERBOOK_DEPTH, len(UNIT_FIELDS)))
+    books = {ob['market']: fill_orderbook(book, ob) for ob, book in zip(orderbook, block)}
+    for ob in orderbook:
+        ORDERBOOK_HISTORY.record(ob['market'], books[ob['market']], ob.get('timestamp'))
+    return books
+
+def chunk_markets(coins, chunk_size=None):
+    """마켓 목록을 요청 단위로 분할"""
+    size = chunk_size or ORDERBOOK_CHUNK_SIZE
+    coins = list(coins)
+    return [coins[i:i + size] for i in range(0, len(coins), size)]
+
+def fetch_orderbooks(coins, chunk_size=None):
+    """여러 마켓 호가를 묶음 요청으로 조회 → {마켓: 호가}"""
+    orderbooks = {}
+    for chunk in chunk_markets(coins, chunk_size):
+        try:
+            orderbooks.update(fetch_orderbook_chunk(chunk))
+        except Exception as e:
+            METRICS.error('orderbook', e)
+            print(f"호가 일괄 조회 오류 ({len(chunk)}개): {e}")
+    return orderbooks
+
+# ============================================
+# 호가창 비율 계산
+# ============================================
+
+def analyze_orderbook(coin, orderbook=None):
+    """호가창 매수/매도 압력 + 최근 스냅샷 대비 물량 변화 분석 (orderbook: 일괄 조회된 호가, 없으면 단건 조회)"""
+    try:
+        if orderbook is None:
+            orderbook = fetch_orderbooks([coin]).get(coin)
+        return with_depth_changes(coin, summarize_orderbook(orderbook))
+    except Exception as e:
+        METRICS.error('orderbook', e)
+        return None
+
+def summarize_orderbook(book):
+    """호가 배열 (depth × 4) 또는 호가 원본 1건에서 매수/매도 물량 및 비율 계산"""
+    if isinstance(book, dict):
+        book = orderbook_to_array(book)
+    if book is None:
+        return None
+
+    # 30단계 정도는 파이썬 합계가 NumPy 호출보다 빠름 (합산 순서도 원본과 같음)
+    bid_size = book[:, BID_SIZE].tolist()
+    ask_size = book[:, ASK_SIZE].tolist()
+
+    # 전체 매수/매도 물량
+    total_bid = sum(bid_size)
+    total_ask = sum(ask_size)
+
+    # 상위 3호가 매수/매도
+    top3_bid = sum(bid_size[:3])
+    top3_ask = sum(ask_size[:3])
+
+    # 비율 계산
+    bid_ask_ratio = total_bid / total_ask if total_ask > 0 else 0
+    top3_ratio = top3_bid / top3_ask if top3_ask > 0 else 0
+
+    # 호가창 불균형 (매수벽/매도벽)
+    imbalance = (total_bid - total_ask) / (total_bid + total_ask) if (total_bid + total_ask) > 0 else 0
+
+    return {
+        'bid_ask_ratio': bid_ask_ratio,
+        'top3_ratio': top3_ratio,
+        'imbalance': imbalance,
+        'total_bid': total_bid,
+        'total_ask': total_ask,
+        'top_bid': bid_size[0] if bid_size else 0,
+        'top_ask': ask_size[0] if ask_size else 0
+    }
+
+# ============================================
+# 호가 시계열 (마켓별 링버퍼)
+# ============================================
+
+class OrderbookHistory:
+    """
+    마켓별 고정 깊이 호가 스냅샷 링버퍼
+    books: (마켓 × 스냅샷 × depth × 4) float32, times: (마켓 × 스냅샷) 초 - 생성 시 한 번 할당
+    """
+
+    def __init__(self, markets=ORDERBOOK_HISTORY_MARKETS, history=ORDERBOOK_HISTORY_SIZE,
+                 depth=ORDERBOOK_HISTORY_DEPTH, interval=ORDERBOOK_HISTORY_INTERVAL):
+        self.history = history
+        self.depth = depth
+        self.interval = interval
+        self.books = np.zeros((markets, history, depth, len(UNIT_FIELDS)), dtype=np.float32)
+        self.times = np.zeros((markets, history))
+        self.count = np.zeros(markets, dtype=np.int64)  # 마켓별 누적 저장 수 (다음 위치 = count % history)
+        self.index = {}  # 마켓 → 행
+        self.lock = threading.Lock()
+
+    @property
+    def nbytes(self):
+        return self.books.nbytes + self.times.nbytes + self.count.nbytes
+
+    def row(self, market):
+        """마켓 행 (새 마켓은 빈 행, 가득 차면 가장 오래 갱신 안 된 마켓 행을 비워서 사용)"""
+        row = self.index.get(market)
+        if row is not None:
+            return row
+        if len(self.index) < len(self.books):
+            row = len(self.index)
+        else:
+            last = self.times[np.arange(len(self.books)), (self.count - 1) % self.history]
+            row = int(np.argmin(last))
+            del self.index[next(m for m, r in self.index.items() if r == row)]
+            self.count[row] = 0
+        self.index[market] = row
+        return row
+
+    def record(self, market, book, timestamp_ms=None):
+        """호가 스냅샷 저장 (배열 또는 호가 원본, 같은 마켓은 interval초에 한 번) → 저장 여부"""
+        now = timestamp_ms / 1000 if timestamp_ms else time.time()
+        with self.lock:
+            row = self.row(market)
+            count = self.count[row]
+            if count and now - self.times[row, (count - 1) % self.history] < self.interval:
+                return False
+            if isinstance(book, dict):
+                book = orderbook_to_array(book, self.depth)
+            if book is None:
+                return False
+            pos = count % self.history
+            target = self.books[row, pos]
+            target[:] = 0
+            rows = min(len(book), self.depth)
+            target[:rows] = book[:rows]
+            self.times[row, pos] = now
+            self.count[row] = count + 1
+            return True
+
+    def export_state(self):
+        """
+        스냅샷용 (호가 N × depth × 4, 시각 N, [[마켓, 시작, 개수]]) - 기록이 있는 마켓만, 마켓별 오래된 순
+        """
+        with self.lock:
+            markets = [(market, row) for market, row in self.index.items() if self.count[row]]
+            index, books, times = [], [], []
+            start = 0
+            for market, row in markets:
+                count = int(self.count[row])
+                positions = np.arange(count - min(count, self.history), count) % self.history
+                books.append(self.books[row, positions])
+                times.append(self.times[row, positions])
+                index.append([market, start, len(positions)])
+                start += len(positions)
+        if not index:
+            return np.zeros((0, self.depth, len(UNIT_FIELDS)), dtype=np.float32), np.zeros(0), []
+        return np.concatenate(books), np.concatenate(times), index
+
+    def import_state(self, books, times, index):
+        """스냅샷 상태 채우기 (이미 기록한 마켓은 그대로, 깊이/보관 수가 다르면 현재 설정에 맞춰 자름)"""
+        depth = min(self.depth, books.shape[1]) if len(books) else 0
+        with self.lock:
+            for market, start, length in index:
+                if market in self.index and self.count[self.index[market]]:
+                    continue
+                row = self.row(market)
+                keep = min(length, self.history)
+                end = start + length
+                self.books[row] = 0
+                self.books[row, :keep, :depth] = books[end - keep:end, :depth]
+                self.times[row, :keep] = times[end - keep:end]
+                self.count[row] = keep
+
+    def delta_features(self, markets, window=ORDERBOOK_DELTA_WINDOW, max_age=ORDERBOOK_DELTA_MAX_AGE):
+        """
+        최근 window개 스냅샷 중 가장 오래된 것(max_age초 이내) 대비 최신 스냅샷 변화 (마켓 일괄 계산)
+        반환: {마켓: 지표 dict} (스냅샷 2개 미만 마켓은 제외)
+        """
+        with self.lock:
+            names = [market for market in markets if market in self.index]
+            rows = np.array([self.index[market] for market in names], dtype=np.int64)
+            if len(rows) == 0:
+                return {}
+            count = self.count[rows]
+            # (마켓 × window) 링버퍼 위치, 오래된 순 (없는 칸은 valid=False)
+            offsets = np.arange(window)
+            positions = (count[:, None] - window + offsets) % self.history
+            valid = offsets >= window - np.minimum(count, min(window, self.history))[:, None]
+            times = self.times[rows[:, None], positions]
+            latest_time = times[:, -1]
+            valid &= times >= latest_time[:, None] - max_age
+            first = np.argmax(valid, axis=1)
+            snapshots = valid.sum(axis=1)
+            start = self.books[rows, positions[np.arange(len(rows)), first]].astype(np.float64)
+            latest = self.books[rows, positions[:, -1]].astype(np.float64)
+            start_time = times[np.arange(len(rows)), first]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            def imbalance(book):
+                bid, ask = book[:, :, BID_SIZE].sum(axis=1), book[:, :, ASK_SIZE].sum(axis=1)
+                return np.where(bid + ask > 0, (bid - ask) / (bid + ask), 0.0)
+
+            # 매수벽 증가: 최대 매수 잔량 (현재 / 비교 시점)
+            start_wall = start[:, :, BID_SIZE].max(axis=1)
+            bid_wall_growth = np.where(start_wall > 0, latest[:, :, BID_SIZE].max(axis=1) / start_wall, 0.0)
+
+            # 매도벽 철수: 비교 시점 최대 매도벽 가격이 아직 호가 범위 안인데 잔량이 빠진 비율 (체결로 뚫린 경우 제외)
+            wall_level = start[:, :, ASK_SIZE].argmax(axis=1)
+            wall_price = start[np.arange(len(rows)), wall_level, ASK_PRICE]
+            wall_size = start[np.arange(len(rows)), wall_level, ASK_SIZE]
+            ask_price, ask_size = latest[:, :, ASK_PRICE], latest[:, :, ASK_SIZE]
+            remaining = np.where(ask_price == wall_price[:, None], ask_size, 0.0).sum(axis=1)
+            in_range = (wall_price >= ask_price[:, 0]) & (wall_price <= ask_price.max(axis=1))
+            ask_wall_pull = np.where(in_range & (wall_size > 0), np.clip(1 - remaining / wall_size, 0.0, 1.0), 0.0)
+
+            imbalance_change = imbalance(latest) - imbalance(start)
+
+        return {
+            market: {
+                'bid_wall_growth': float(bid_wall_growth[i]),
+                'ask_wall_pull': float(ask_wall_pull[i]),
+                'imbalance_change': float(imbalance_change[i]),
+                'depth_snapshots': int(snapshots[i]),
+                'depth_seconds': float(latest_time[i] - start_time[i]),
+            }
+            for i, market in enumerate(names) if snapshots[i] >= 2
+        }
+
+# 프로세스 공용 호가 시계열 (REST 일괄 조회 / WebSocket 호가 모두 저장)
+ORDERBOOK_HISTORY = OrderbookHistory()
+
+def with_depth_changes(coin, orderbook_data):
+    """호가 요약에 링버퍼 변화 지표 추가 (스냅샷이 2개 미만이면 요약 그대로)"""
+    if orderbook_data is None:
+        return None
+    changes = ORDERBOOK_HISTORY.delta_features([coin]).get(coin)
+    return {**orderbook_data, **changes} if changes else orderbook_data
+
+def depth_pressure(orderbook_data):
+    """호가 변화로 본 매수 압력 → 신호 이름 (불균형이 매수 쪽으로 늘면서 매수벽 증가 또는 매도벽 철수, 없으면 None)"""
+    if not orderbook_data or 'imbalance_change' not in orderbook_data:
+        return None
+    if orderbook_data['imbalance_change'] < ORDERBOOK_IMBALANCE_RISE:
+        return None
+    if orderbook_data['bid_wall_growth'] >= ORDERBOOK_WALL_GROWTH:
+        return "📥 매수벽 증가"
+    if orderbook_data['ask_wall_pull'] >= ORDERBOOK_WALL_PULL:
+        return "🧱 매도벽 철수"
+    return None
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+업비트 현재가(ticker) 일괄 사전 선별
+캔들 조회 전에 전 마켓 현재가를 1~2회 요청으로 받아 직전 스캔 스냅샷과 비교
+- 거래대금 증가 속도: 직전 스냅샷 이후 초당 거래대금 / 24시간 평균 초당 거래대금
+- 가격 변화: 직전 스냅샷 대비 등락률 (%)
+- 둘 중 하나라도 기준 이상이거나 비교할 스냅샷이 없으면 통과 (놓치는 쪽보다 더 보는 쪽)
+"""
+
+import os
+import threading
+import time
+
+from upbit_api import fetch_tickers
+
+PRESCREEN = os.environ.get('PRESCREEN', '1') == '1'  # 0이면 사전 선별 없이 전체 캔들 분석
+PRESCREEN_VOLUME_RATIO = float(os.environ.get('PRESCREEN_VOLUME_RATIO', '1.2'))  # 24시간 평균 대비 거래대금 속도
+PRESCREEN_PRICE_CHANGE = float(os.environ.get('PRESCREEN_PRICE_CHANGE', '1.0'))  # 직전 스냅샷 대비 등락률 절댓값 (%)
+PRESCREEN_MAX_AGE = int(os.environ.get('PRESCREEN_MAX_AGE', '900'))  # 이보다 오래된 스냅샷은 비교하지 않음 (초)
+TICKER_CHUNK_SIZE = 100  # 현재가 요청 1회당 마켓 수
+
+class TickerScreen:
+    """마켓별 직전 현재가 스냅샷 (시각 ms, 당일 누적 거래대금, 현재가)"""
+
+    def __init__(self, fetch=fetch_tickers):
+        self.fetch = fetch
+        self.snapshots = {}
+        self.lock = threading.Lock()
+
+    def fetch_all(self, markets):
+        """전 마켓 현재가 원본 (100개 마켓당 요청 1회)"""
+        markets = list(markets)
+        tickers = []
+        for i in range(0, len(markets), TICKER_CHUNK_SIZE):
+            tickers.extend(self.fetch(markets[i:i + TICKER_CHUNK_SIZE]))
+        return tickers
+
+    def compare(self, ticker, now_ms):
+        """직전 스냅샷 대비 (거래대금 속도 배율, 등락률 %) - 비교 불가면 None"""
+        previous = self.snapshots.get(ticker['market'])
+        if previous is None:
+            return None
+        prev_ms, prev_value, prev_price = previous
+        elapsed = (now_ms - prev_ms) / 1000
+        value_delta = ticker['acc_trade_price'] - prev_value
+        # UTC 00:00에 당일 누적 거래대금이 초기화되면 비교 불가
+        if elapsed < 1 or elapsed > PRESCREEN_MAX_AGE or value_delta < 0 or prev_price <= 0:
+            return None
+
+        average_rate = ticker.get('acc_trade_price_24h', 0) / 86400
+        if average_rate > 0:
+            volume_ratio = (value_delta / elapsed) / average_rate
+        else:
+            volume_ratio = float('inf') if value_delta > 0 else 0.0
+        price_change = (ticker['trade_price'] - prev_price) / prev_price * 100
+        return volume_ratio, price_change
+
+    def screen(self, tickers, now_ms=None):
+        """현재가 목록 → 통과 마켓 집합 (스냅샷 갱신 포함)"""
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        passed = set()
+        with self.lock:
+            for ticker in tickers:
+                delta = self.compare(ticker, now_ms)
+                if delta is None or delta[0] >= PRESCREEN_VOLUME_RATIO or abs(delta[1]) >= PRESCREEN_PRICE_CHANGE:
+                    passed.add(ticker['market'])
+                self.snapshots[ticker['market']] = (now_ms, ticker['acc_trade_price'], ticker['trade_price'])
+        return passed
+
+# 프로세스 공용 사전 선별 (스냅샷은 스캔 회차 사이에 유지)
+TICKER_SCREEN = TickerScreen()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+업비트 시세 API 요청 제한 (엔드포인트 그룹별 토큰 버킷)
+모든 시세 요청(순차/스레드/비동기)이 같은 버킷을 거침
+- 그룹별 초당 API_RATE_LIMIT개 (업비트 시세 API 그룹당 10회/초)
+- 응답 헤더 Remaining-Req의 sec(이번 1초 남은 요청 수)로 토큰 수 보정, 0이면 1초 대기
+- 429/418 응답: 속도를 절반으로 낮추고 지수 대기, 이후 성공할 때마다 조금씩 복구
+- 같은 IP에서 여러 프로세스(샤드)가 돌면 API_RATE_SHARE로 나눈 몫만 사용
+"""
+
+import os
+import re
+import threading
+import time
+
+API_RATE_LIMIT = float(os.environ.get('API_RATE_LIMIT', '9'))  # 그룹별 초당 요청 수
+API_RATE_BURST = float(os.environ.get('API_RATE_BURST', '1'))  # 한 번에 몰아 보낼 수 있는 요청 수
+API_RATE_SHARE = int(os.environ.get('API_RATE_SHARE', '1'))  # 같은 IP 한도를 나눠 쓰는 프로세스 수 (upbit_shard run이 설정)
+API_RATE_MIN = 1.0  # 429가 반복돼도 이 아래로는 낮추지 않음 (초당)
+API_RATE_RECOVERY = 0.1  # 성공 응답 1회당 속도 복구량 (초당)
+API_BACKOFF_MAX = 10.0  # 429 대기 상한 (초)
+
+REMAINING_SEC = re.compile(r'sec=(\d+)')
+
+def parse_remaining(header):
+    """'group=candles; min=1799; sec=9' → 9 (헤더 없으면 None)"""
+    match = REMAINING_SEC.search(header or '')
+    return int(match.group(1)) if match else None
+
+class TokenBucket:
+    """초당 rate개 토큰, 부족하면 빚(음수 토큰)으로 예약하고 그만큼 대기"""
+
+    def __init__(self, rate=API_RATE_LIMIT, burst=API_RATE_BURST):
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()  # 미래 시각이면 그때까지 충전 중지 (대기 중)
+        self.lock = threading.Lock()
+
+    def refill(self, now):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def reserve(self):
+        """토큰 1개 예약 → 대기할 초"""
+        with self.lock:
+            now = time.monotonic()
+            self.refill(now)
+            self.tokens -= 1
+            wait = max(self.updated - now, 0.0)
+            if self.tokens < 0:
+                wait += -self.tokens / self.rate
+            return wait
+
+    def acquire(self):
+        """토큰이 생길 때까지 대기 → 대기한 초"""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def pause(self, seconds):
+        """seconds초 동안 새 요청 중지"""
+        now = time.monotonic()
+        self.tokens = min(self.tokens, 0.0)
+        self.updated = max(self.updated, now + seconds)
+
+    def observe(self, remaining):
+        """성공 응답: 서버가 알려준 남은 요청 수로 보정 + 속도 복구"""
+        with self.lock:
+            self.refill(time.monotonic())
+            if remaining is not None:
+                self.tokens = min(self.tokens, remaining)
+                if remaining == 0:
+                    self.pause(1.0)
+            self.rate = min(self.max_rate, self.rate + API_RATE_RECOVERY)
+
+    def penalize(self, attempt):
+        """429/418 응답: 속도 절반 + 지수 대기 → 대기할 초"""
+        with self.lock:
+            self.rate = max(min(API_RATE_MIN, self.max_rate), self.rate / 2)
+            backoff = min(0.5 * 2 ** attempt, API_BACKOFF_MAX)
+            self.pause(backoff)
+            return backoff
+
+class RateLimiter:
+    """엔드포인트 그룹 → 토큰 버킷 (프로세스 공용)"""
+
+    def __init__(self, rate=API_RATE_LIMIT, burst=API_RATE_BURST):
+        self.rate = rate
+        self.burst = burst
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def bucket(self, group):
+        with self.lock:
+            if group not in self.buckets:
+                self.buckets[group] = TokenBucket(self.rate, self.burst)
+            return self.buckets[group]
+
+# 프로세스 공용 요청 제한 (두 스캐너, 스레드, 비동기 요청이 모두 공유)
+RATE_LIMITER = RateLimiter(API_RATE_LIMIT / max(API_RATE_SHARE, 1))
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+업비트 캔들 롤업 모듈
+기본 봉(1분/5분) 하나로 15분봉, 1시간봉, 일봉을 로컬에서 생성
+
+업비트 분봉은 UTC 기준 정각 경계, 일봉은 UTC 00:00 (KST 09:00) 경계로 집계됨
+(KST = UTC+9 이므로 분/시간 경계는 KST에서도 동일)
+"""
+
+import numpy as np
+
+from upbit_candles import INTERVALS
+
+def bucket_start(ts, interval):
+    """캔들 시작 시각(ms, UTC) → 목표 간격 봉 시작 시각"""
+    _, interval_ms = INTERVALS[interval]
+    return ts // interval_ms * interval_ms
+
+def rollup(ts, ohlcv, interval, drop_partial=True):
+    """
+    기본 봉 (ts, ohlcv) → 목표 간격 봉 (ts, ohlcv)
+    - 시가: 첫 봉 시가 / 고가: 최대 / 저가: 최소 / 종가: 마지막 봉 종가
+    - 거래량, 거래대금: 합계
+    - drop_partial: 기본 봉이 구간 시작부터 있지 않은 첫 봉은 버림 (앞부분이 잘린 봉)
+    """
+    if len(ts) == 0:
+        return ts[:0], ohlcv[:0]
+
+    buckets = bucket_start(ts, interval)
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(ts)] - 1
+
+    out = np.empty((len(starts), 6), dtype=np.float64)
+    out[:, 0] = ohlcv[starts, 0]
+    out[:, 1] = np.maximum.reduceat(ohlcv[:, 1], starts)
+    out[:, 2] = np.minimum.reduceat(ohlcv[:, 2], starts)
+    out[:, 3] = ohlcv[ends, 3]
+    out[:, 4] = np.add.reduceat(ohlcv[:, 4], starts)
+    out[:, 5] = np.add.reduceat(ohlcv[:, 5], starts)
+    out_ts = buckets[starts]
+
+    if drop_partial and ts[0] != out_ts[0]:
+        return out_ts[1:], out[1:]
+    return out_ts, out
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+업비트 점수 규칙 (선언형 규칙 → 벡터 평가기)
+점수 함수의 if/elif 사슬을 규칙 목록으로 적고, 한 번 컴파일해 전 코인을 NumPy 연산 한 번으로 채점
+- 규칙: {'when': [(지표, 비교, 기준값), ...], 'points': 점수, 'label': 신호 문구, 'level': 레벨, 'level_from': 레벨}
+  - when: 조건을 모두 만족해야 적중 (비교: >= > <= < == != truthy)
+  - label: 지표 이름으로 포맷 가능 ("💪 체결강도 {trade_intensity:.0f}%")
+  - level: 적중 시 레벨 변경 / level_from: 현재 레벨이 이 값일 때만 변경
+- 그룹: 규칙 목록 = if/elif 사슬 (앞에서부터 처음 적중한 규칙 하나만)
+- 지표가 없는 코인(호가 없음 등)은 그 지표를 쓰는 조건이 모두 불성립 (기존 `if orderbook_data:` 와 동일)
+- 코인 1개(실시간 체결마다 채점 등)는 score_row로 배열 없이 같은 규칙을 순서대로 평가 (배열 준비 비용이 더 큼)
+- SCORING_RULES_FILE(JSON, {"fast": [그룹...], "enhanced": [그룹...]})이 있으면 내장 규칙 대신 사용
+  → 기준값/점수 조정에 코드 수정 불필요
+"""
+
+import json
+import math
+import operator
+import os
+import string
+
+import numpy as np
+
+SCORING_RULES_FILE = os.environ.get('SCORING_RULES_FILE', '')  # 비우면 내장 규칙
+
+# 비교 연산 (값 배열, 기준값) → bool 배열
+RULE_OPS = {
+    '>=': np.greater_equal,
+    '>': np.greater,
+    '<=': np.less_equal,
+    '<': np.less,
+    '==': np.equal,
+    '!=': np.not_equal,
+    'truthy': lambda values, _: values.astype(bool),
+}
+
+# 같은 비교의 스칼라 버전 (score_row용)
+SCALAR_OPS = {
+    '>=': operator.ge,
+    '>': operator.gt,
+    '<=': operator.le,
+    '<': operator.lt,
+    '==': operator.eq,
+    '!=': operator.ne,
+    'truthy': lambda value, _: bool(value),
+}
+
+def load_rules(name, default):
+    """규칙 파일에 name 규칙이 있으면 그것, 없으면 내장 규칙"""
+    if not SCORING_RULES_FILE:
+        return default
+    with open(SCORING_RULES_FILE, encoding='utf-8') as f:
+        return json.load(f).get(name, default)
+
+class RuleSet:
+    """규칙 그룹 목록 → 벡터 평가기 (점수 배열, 적중 행렬, 레벨 배열)"""
+
+    def __init__(self, groups, default_level="NORMAL", empty_level=None):
+        self.default_level = default_level
+        self.empty_level = empty_level or default_level  # 지표 dict 자체가 없는 코인의 레벨
+        self.groups = []
+        self.rules = []
+        self.features = {}  # 지표 → 'object'(문자열/참거짓 비교) / 'float'
+        for group in groups:
+            compiled = []
+            for rule in group:
+                conditions = []
+                for condition in rule['when']:
+                    feature, op = condition[0], condition[1]
+                    if op not in RULE_OPS:
+                        raise ValueError(f"알 수 없는 비교 연산: {op}")
+                    conditions.append((feature, RULE_OPS[op], condition[2] if len(condition) > 2 else None, SCALAR_OPS[op]))
+                    if op in ('==', '!=', 'truthy') or self.features.get(feature) == 'object':
+                        self.features[feature] = 'object'
+                    else:
+                        self.features[feature] = 'float'
+                label = rule['label']
+                fields = [field for _, field, _, _ in string.Formatter().parse(label) if field]
+                compiled.append({
+                    'index': len(self.rules),
+                    'conditions': conditions,
+                    'points': rule.get('points', 1),
+                    'label': label,
+                    'fields': fields,
+                    'level': rule.get('level'),
+                    'level_from': rule.get('level_from'),
+                })
+                self.rules.append(compiled[-1])
+            self.groups.append(compiled)
+        # 문구에 쓰는 지표는 조건에도 있어야 값이 있음 (조건에 없으면 채점 중 KeyError)
+        for rule in self.rules:
+            for field in rule['fields']:
+                if field not in self.features:
+                    raise ValueError(f"규칙 문구의 지표가 조건에 없음: {field} ({rule['label']})")
+
+    def columns(self, rows):
+        """
+        지표 dict 목록 → (지표별 값 배열, 지표별 존재 여부 배열) - 규칙에 쓰는 지표만
+        숫자 지표는 없으면 NaN (비교가 항상 불성립이라 존재 여부 불필요)
+        """
+        rows = [row or {} for row in rows]
+        columns, present = {}, {}
+        for feature, kind in self.features.items():
+            if kind == 'float':
+                columns[feature] = np.fromiter((row.get(feature, np.nan) for row in rows), dtype=np.float64, count=len(rows))
+            else:
+                values = [row.get(feature) for row in rows]
+                present[feature] = np.fromiter((value is not None for value in values), dtype=bool, count=len(rows))
+                columns[feature] = np.empty(len(rows), dtype=object)
+                columns[feature][:] = values
+        return columns, present
+
+    def evaluate(self, columns, size, present=None):
+        """
+        지표 배열(코인/봉 축) → (점수, 적중 행렬[규칙 × 코인], 레벨) 한 번에
+        present: 지표별 존재 여부 (생략한 지표는 columns에 있으면 전부 존재)
+        """
+        present = present or {}
+        scores = np.zeros(size, dtype=np.int64)
+        levels = np.full(size, self.default_level, dtype=object)
+        hits = np.zeros((len(self.rules), size), dtype=bool)
+        with np.errstate(invalid='ignore'):
+            for group in self.groups:
+                taken = np.zeros(size, dtype=bool)
+                for rule in group:
+                    hit = ~taken
+                    for feature, op, threshold, _ in rule['conditions']:
+                        if feature not in columns:
+                            hit = np.zeros(size, dtype=bool)
+                            break
+                        mask = present.get(feature)
+                        hit = hit & op(columns[feature], threshold) if mask is None else hit & mask & op(columns[feature], threshold)
+                    hit = np.asarray(hit, dtype=bool)
+                    taken |= hit
+                    hits[rule['index']] = hit
+                    scores += rule['points'] * hit
+                    if rule['level']:
+                        change = hit & (levels == rule['level_from']) if rule['level_from'] else hit
+                        levels[change] = rule['level']
+        return scores, hits, levels
+
+    def signals(self, hits, columns):
+        """코인별 적중 규칙 문구 목록 (규칙 순서)"""
+        labels = [[] for _ in range(hits.shape[1])]
+        coins, indexes = np.nonzero(hits.T)  # 코인 순 → 같은 코인 안에서는 규칙 순
+        for i, index in zip(coins.tolist(), indexes.tolist()):
+            rule = self.rules[index]
+            labels[i].append(rule['label'].format_map({field: columns[field][i] for field in rule['fields']})
+                             if rule['fields'] else rule['label'])
+        return labels
+
+    def value(self, row, feature):
+        """행의 지표 값 (없으면 None, 숫자 지표는 배열 평가와 같게 float, NaN은 None)"""
+        value = row.get(feature)
+        if value is None or self.features.get(feature) != 'float':
+            return value
+        value = float(value)
+        return None if math.isnan(value) else value
+
+    def score_row(self, row):
+        """지표 dict 1개 → (점수, 신호 목록, 레벨) - score_rows와 같은 결과를 배열 없이 (None 행은 (0, [], empty_level))"""
+        if not row:
+            return 0, [], self.empty_level
+        score = 0
+        labels = []
+        level = self.default_level
+        for group in self.groups:
+            for rule in group:
+                hit = True
+                for feature, _, threshold, op in rule['conditions']:
+                    value = self.value(row, feature)
+                    if value is None or not op(value, threshold):
+                        hit = False
+                        break
+                if not hit:
+                    continue
+                score += rule['points']
+                labels.append(rule['label'].format_map({field: self.value(row, field) for field in rule['fields']})
+                              if rule['fields'] else rule['label'])
+                if rule['level'] and (not rule['level_from'] or level == rule['level_from']):
+                    level = rule['level']
+                break
+        return score, labels, level
+
+    def score_rows(self, rows):
+        """지표 dict 목록 → [(점수, 신호 목록, 레벨)] (점수 함수와 같은 결과, None 행은 (0, [], empty_level))"""
+        if not rows:
+            return []
+        columns, present = self.columns(rows)
+        scores, hits, levels = self.evaluate(columns, len(rows), present)
+        return [(score, labels, level) if row else (0, [], self.empty_level)
+                for row, score, labels, level in zip(rows, scores.tolist(), self.signals(hits, columns), levels.tolist())]
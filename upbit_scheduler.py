@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+업비트 모니터링 데몬 스케줄러
+벽시계 기준 interval 배수 시각마다 스캔 실행 (누적 지연 없음)
+- 스캔이 다음 시각을 넘기면 놓친 회차는 건너뜀 (스캔끼리 겹치지 않음)
+- 캐시/세션/지표 상태는 프로세스 메모리에 그대로 유지
+"""
+
+import time
+
+def next_run_time(now, interval, offset=0):
+    """now 이후 첫 번째 (interval 배수 + offset) 시각"""
+    return (int((now - offset) // interval) + 1) * interval + offset
+
+def run_forever(scan, interval, offset=0, max_cycles=None):
+    """
+    scan()을 interval초마다 반복 실행
+    offset: 배수 시각에서 밀어낼 초 (예: 봉 마감 직후 5초)
+    """
+    cycle = 0
+    # 첫 회차는 바로 실행 (직전 배수 시각 회차로 취급)
+    slot = next_run_time(time.time(), interval, offset) - interval
+    while max_cycles is None or cycle < max_cycles:
+        started = time.time()
+        try:
+            scan()
+        except Exception as e:
+            print(f"❌ 스캔 오류: {e}")
+        cycle += 1
+
+        # 다음 회차 = 방금 실행한 회차 + interval (이미 지났을 때만 건너뜀)
+        now = time.time()
+        next_time = slot + interval
+        if now > next_time:
+            resume = next_run_time(now, interval, offset)
+            skipped = round((resume - next_time) / interval)
+            print(f"⚠️ 스캔 {now - started:.1f}초 소요 → {skipped}회차 건너뜀")
+            next_time = resume
+        if max_cycles is not None and cycle >= max_cycles:
+            break
+        time.sleep(max(next_time - time.time(), 0))
+        slot = next_time
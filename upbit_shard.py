@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+업비트 마켓 샤딩 (여러 프로세스 / GitHub Actions matrix 작업에 마켓 나눠 스캔)
+- 마켓 → 샤드는 마켓 이름 rendezvous 해시로 고정 (샤드 수가 같으면 항상 같은 워커 → 캔들 캐시/스냅샷/등급 유지)
+  샤드 수를 N → N+1로 늘리면 약 1/(N+1)의 마켓만 새 샤드로 옮겨 가고 나머지는 그대로
+- 샤드별 저널/엑셀/스냅샷/등급/계측 파일은 이름 뒤에 .shard{번호}를 붙여 따로 저장
+- 같은 IP에서 도는 프로세스끼리는 요청 한도를 API_RATE_SHARE로 나눠 씀 (upbit_ratelimit)
+- merge: 샤드별 저널의 새 행만 하나로 합치며 같은 코인 중복 알림 제거 후 엑셀 생성
+
+사용법:
+    python upbit_shard.py run 4 upbit_combined.py                 # 로컬 프로세스 4개로 실행 후 병합
+    python upbit_shard.py merge fast shard0.db shard1.db ...       # 저널 병합 → upbit_fast_signals.db/.xlsx
+    python upbit_shard.py merge enhanced [저널들...]               # 생략하면 기본 저널 이름의 .shard* 파일
+"""
+
+import glob
+import hashlib
+import os
+import sqlite3
+import subprocess
+import sys
+from contextlib import closing
+
+SHARD_INDEX = int(os.environ.get('SHARD_INDEX', '0'))
+SHARD_COUNT = int(os.environ.get('SHARD_COUNT', '1'))  # 1이면 샤딩 안 함
+MERGE_DEDUPE_WINDOW = int(os.environ.get('MERGE_DEDUPE_WINDOW', '60'))  # 다른 샤드의 같은 코인 알림을 중복으로 볼 간격 (초)
+
+# ============================================
+# 샤드 배정
+# ============================================
+
+def shard_weight(market, index):
+    """(마켓, 샤드) 가중치 - 등급 순환(upbit_tiers, crc32)과 무관한 해시"""
+    return hashlib.blake2b(f"{index}:{market}".encode(), digest_size=8, person=b'upbit-shard').digest()
+
+def shard_of(market, count=None):
+    """마켓 → 샤드 번호 (가중치가 가장 큰 샤드, 프로세스/실행과 무관하게 고정)"""
+    count = count or SHARD_COUNT
+    return max(range(count), key=lambda index: shard_weight(market, index))
+
+def shard_markets(markets, index=None, count=None):
+    """이 샤드가 맡은 마켓만 (순서 유지)"""
+    index = SHARD_INDEX if index is None else index
+    count = count or SHARD_COUNT
+    if count <= 1:
+        return list(markets)
+    return [market for market in markets if shard_of(market, count) == index]
+
+def shard_path(path, index=None, count=None):
+    """샤드별 파일 이름: upbit_fast_signals.db → upbit_fast_signals.shard0.db (샤딩 안 하면 그대로)"""
+    index = SHARD_INDEX if index is None else index
+    count = count or SHARD_COUNT
+    if not path or count <= 1:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.shard{index}{ext}"
+
+# ============================================
+# 저널 병합
+# ============================================
+
+def read_journal(path, table, after_id=0, after_time=float('-inf')):
+    """
+    저널 파일 → [(행 번호, 시각, 마켓, 행 JSON)] (행 번호가 after_id보다 크거나 시각이 after_time보다 늦은 행만)
+    시각 조건: 샤드 저널이 새로 만들어져(캐시 유실 등) 행 번호가 다시 1부터 시작해도 새 행을 놓치지 않음
+    """
+    with closing(sqlite3.connect(path, timeout=30)) as conn:
+        try:
+            return conn.execute(f"SELECT id, time, market, row FROM {table} WHERE id > ? OR time > ? ORDER BY id",
+                                (after_id, after_time)).fetchall()
+        except sqlite3.OperationalError:
+            return []  # 아직 신호가 없어 테이블이 없음
+
+def merge_journals(sources, journal, window=MERGE_DEDUPE_WINDOW):
+    """
+    샤드별 저널 → 통합 저널 (시간순, 증분)
+    - 샤드 파일별 마지막으로 병합한 행 번호/시각을 통합 저널에 저장 → 다음 병합은 그 뒤의 새 행만 읽음
+    - 이미 병합된 행(같은 시각/마켓)은 건너뜀 → 반복 실행해도 중복 없음
+    - 다른 샤드가 같은 코인을 window초 안에 또 기록했으면 중복 알림으로 보고 제외 (샤드 수 변경 직후 등)
+      코인별 마지막으로 남긴 시각/샤드도 저장해 이전 병합분과도 비교
+    - 추가/병합 위치 저장/보관 기간 지난 행 삭제는 한 트랜잭션
+    반환: 추가한 행 수
+    """
+    with closing(journal.connect()) as conn, conn:
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {journal.table}_merged ("
+                     "source TEXT PRIMARY KEY, last_id INTEGER, last_time REAL)")
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {journal.table}_merge_last ("
+                     "market TEXT PRIMARY KEY, time REAL, source TEXT)")
+        marks = {source: (last_id, last_time) for source, last_id, last_time
+                 in conn.execute(f"SELECT source, last_id, last_time FROM {journal.table}_merged")}
+        last = {market: (time_, source) for market, time_, source
+                in conn.execute(f"SELECT market, time, source FROM {journal.table}_merge_last")}
+
+        rows = []
+        for path in sources:
+            source = os.path.basename(path)
+            new = read_journal(path, journal.table, *marks.get(source, (0, float('-inf'))))
+            if new:
+                marks[source] = (max(id_ for id_, _, _, _ in new), max(time_ for _, time_, _, _ in new))
+                rows.extend((time_, market, row, source) for _, time_, market, row in new)
+        rows.sort()
+
+        existing = set()
+        if rows:
+            existing = set(conn.execute(f"SELECT time, market FROM {journal.table} WHERE time >= ?", (rows[0][0],)))
+
+        merged = []
+        kept = set()
+        for time_, market, row, source in rows:
+            previous = last.get(market)
+            if previous and previous[1] != source and time_ - previous[0] < window:
+                continue
+            last[market] = (time_, source)
+            kept.add(market)
+            if (time_, market) not in existing:
+                merged.append((time_, market, row))
+
+        conn.executemany(f"INSERT INTO {journal.table} (time, market, row) VALUES (?, ?, ?)", merged)
+        conn.executemany(f"INSERT OR REPLACE INTO {journal.table}_merged (source, last_id, last_time) VALUES (?, ?, ?)",
+                         [(source, last_id, last_time) for source, (last_id, last_time) in marks.items()])
+        conn.executemany(f"INSERT OR REPLACE INTO {journal.table}_merge_last (market, time, source) VALUES (?, ?, ?)",
+                         [(market, *last[market]) for market in kept])
+        journal.prune(conn)
+    journal.unexported += len(merged)
+    return len(merged)
+
+def merge_kind(kind, sources=None):
+    """전략(fast/enhanced) 저널 병합 후 엑셀 생성"""
+    from upbit_journal import SHEETS, SignalJournal, export_excel
+
+    sheet = SHEETS[kind]
+    if not sources:
+        root, ext = os.path.splitext(sheet['journal'])
+        sources = sorted(glob.glob(f"{root}.shard*{ext}"))
+    journal = SignalJournal(sheet['journal'], sheet['table'])
+    added = merge_journals(sources, journal)
+    print(f"🧩 {kind}: 샤드 저널 {len(sources)}개 → {sheet['journal']} ({added}행 추가)")
+    if journal.unexported:
+        export_excel(journal, sheet['excel'], sheet)
+
+# ============================================
+# 로컬 실행
+# ============================================
+
+def run_local(count, script, *args):
+    """스크립트를 샤드 수만큼 프로세스로 실행 (요청 한도는 나눠 씀), 모두 끝나면 저널 병합"""
+    processes = []
+    for index in range(count):
+        env = dict(os.environ, SHARD_INDEX=str(index), SHARD_COUNT=str(count), API_RATE_SHARE=str(count))
+        processes.append(subprocess.Popen([sys.executable, script, *args], env=env))
+    try:
+        codes = [process.wait() for process in processes]
+    except KeyboardInterrupt:
+        codes = [process.wait() for process in processes]  # 자식도 같은 Ctrl+C를 받아 정리 후 종료
+    for kind in ('fast', 'enhanced'):
+        merge_kind(kind)
+    return max(codes)
+
+def main():
+    if len(sys.argv) >= 4 and sys.argv[1] == 'run':
+        sys.exit(run_local(int(sys.argv[2]), *sys.argv[3:]))
+    elif len(sys.argv) >= 3 and sys.argv[1] == 'merge':
+        merge_kind(sys.argv[2], sys.argv[3:])
+    else:
+        print(__doc__)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+업비트 모니터 상태 스냅샷 (1회 실행 간 캐시 유지)
+시작할 때 불러오고 스캔이 끝날 때 저장 → 1회 실행도 증분 갱신처럼 동작
+- 캔들 캐시 / 마감 일봉 / 직전 현재가 스냅샷 / 호가 링버퍼는 몇 개의 큰 배열로 묶어 저장
+- 마켓 등급, 코인별 알림 기록, 체결 집계(최신 시각 + 최근 체결 번호 + 봉별 합계) 등 작은 상태는 JSON 메타데이터로 저장
+
+파일 형식 (리틀 엔디언):
+    헤더 32바이트: 매직 b'UPBS', 버전 u32, 메타 길이 u64, 데이터 길이 u64, CRC32 u32, 예약 u32
+    메타 JSON (배열 이름/dtype/shape/오프셋 + 작은 상태)
+    데이터: 64바이트 정렬 배열들 (np.memmap으로 복사 없이 읽음)
+
+사용법:
+    python upbit_snapshot.py 스냅샷.bin    # 내용 요약 출력
+"""
+
+import json
+import os
+import struct
+import sys
+import zlib
+
+import numpy as np
+
+from upbit_candles import CANDLE_CACHE, DAILY_STORE
+from upbit_orderbook import ORDERBOOK_HISTORY
+from upbit_prescreen import TICKER_SCREEN
+from upbit_trades import TRADE_TAPE
+from upbit_shard import shard_path
+
+# 예: upbit_fast_state.bin (없으면 저장/불러오기 안 함, 샤딩 시 샤드별 파일)
+SNAPSHOT_FILE = shard_path(os.environ.get('SNAPSHOT_FILE', ''))
+SNAPSHOT_MAGIC = b'UPBS'
+SNAPSHOT_VERSION = 2  # 배열 구성/메타 형식이 바뀌면 올림 (다른 버전 파일은 무시)
+HEADER = struct.Struct('<4sIQQII')
+ALIGN = 64
+
+class SnapshotError(Exception):
+    """스냅샷 파일 손상/버전 불일치"""
+
+# ============================================
+# 파일 형식
+# ============================================
+
+def write_snapshot(path, arrays, state):
+    """배열 dict + JSON 상태 → 스냅샷 파일 (임시 파일에 쓴 뒤 교체)"""
+    layout = {}
+    chunks = []
+    offset = 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        padding = -offset % ALIGN
+        chunks.append(b'\0' * padding)
+        offset += padding
+        layout[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+        chunks.append(array.tobytes())
+        offset += array.nbytes
+
+    meta = json.dumps({'arrays': layout, 'state': state}, ensure_ascii=False).encode('utf-8')
+    meta += b' ' * (-(HEADER.size + len(meta)) % ALIGN)  # 데이터 시작도 정렬
+    data = b''.join(chunks)
+    checksum = zlib.crc32(data, zlib.crc32(meta))
+
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(meta), len(data), checksum, 0))
+        f.write(meta)
+        f.write(data)
+    os.replace(temp_path, path)
+    return HEADER.size + len(meta) + len(data)
+
+def read_snapshot(path):
+    """스냅샷 파일 → (배열 dict (읽기 전용 memmap 뷰), JSON 상태)"""
+    with open(path, 'rb') as f:
+        header = f.read(HEADER.size)
+    if len(header) < HEADER.size:
+        raise SnapshotError("헤더가 잘림")
+    magic, version, meta_size, data_size, checksum, _ = HEADER.unpack(header)
+    if magic != SNAPSHOT_MAGIC:
+        raise SnapshotError("스냅샷 파일이 아님")
+    if version != SNAPSHOT_VERSION:
+        raise SnapshotError(f"버전 불일치 (파일 {version}, 현재 {SNAPSHOT_VERSION})")
+
+    mapped = np.memmap(path, dtype=np.uint8, mode='r')
+    if len(mapped) != HEADER.size + meta_size + data_size:
+        raise SnapshotError("파일 크기 불일치")
+    meta = bytes(mapped[HEADER.size:HEADER.size + meta_size])
+    data = mapped[HEADER.size + meta_size:]
+    if zlib.crc32(data, zlib.crc32(meta)) != checksum:
+        raise SnapshotError("체크섬 불일치")
+
+    meta = json.loads(meta)
+    arrays = {}
+    for name, spec in meta['arrays'].items():
+        dtype = np.dtype(spec['dtype'])
+        count = int(np.prod(spec['shape']))
+        arrays[name] = np.frombuffer(data, dtype=dtype, count=count, offset=spec['offset']).reshape(spec['shape'])
+    return arrays, meta['state']
+
+# ============================================
+# 상태 수집 / 복원
+# ============================================
+
+def pack_series(series):
+    """[(키, ts, ohlcv)] → (이어 붙인 ts, 이어 붙인 ohlcv, [[키..., 시작, 길이]])"""
+    index = []
+    start = 0
+    for key, ts, _ in series:
+        index.append([*key, start, len(ts)])
+        start += len(ts)
+    ts_all = np.concatenate([ts for _, ts, _ in series]) if series else np.zeros(0, dtype=np.int64)
+    ohlcv_all = np.concatenate([ohlcv for _, _, ohlcv in series]) if series else np.zeros((0, 6))
+    return ts_all.astype(np.int64), ohlcv_all.astype(np.float64), index
+
+def collect(states):
+    """공용 캐시 + 스크립트별 상태 객체 → (배열 dict, JSON 상태)"""
+    with CANDLE_CACHE.lock:
+        rings = list(CANDLE_CACHE.rings.items())
+    candles = []
+    exhausted = []
+    for (market, interval), ring in rings:
+        if ring.size:
+            ts, ohlcv = ring.tail(ring.size)
+            candles.append(((market, interval), ts, ohlcv))
+            exhausted.append(ring.exhausted)
+    candle_ts, candle_ohlcv, candle_index = pack_series(candles)
+
+    with DAILY_STORE.lock:
+        closed = [((market, day), ts, ohlcv) for market, (day, ts, ohlcv) in DAILY_STORE.closed.items()]
+    daily_ts, daily_ohlcv, daily_index = pack_series(closed)
+
+    with TICKER_SCREEN.lock:
+        tickers = list(TICKER_SCREEN.snapshots.items())
+    ticker_values = np.array([values for _, values in tickers], dtype=np.float64).reshape(-1, 3)
+
+    orderbook_books, orderbook_times, orderbook_index = ORDERBOOK_HISTORY.export_state()
+
+    arrays = {
+        'candle_ts': candle_ts, 'candle_ohlcv': candle_ohlcv,
+        'daily_ts': daily_ts, 'daily_ohlcv': daily_ohlcv,
+        'ticker_values': ticker_values,
+        'orderbook_books': orderbook_books, 'orderbook_times': orderbook_times,
+    }
+    state = {
+        'candles': [row + [flag] for row, flag in zip(candle_index, exhausted)],
+        'daily': daily_index,
+        'tickers': [market for market, _ in tickers],
+        'orderbooks': orderbook_index,
+        'objects': {name: obj.state for name, obj in states.items()},
+    }
+    state['trades'] = TRADE_TAPE.export_state()
+    return arrays, state
+
+def restore(arrays, state, states):
+    """스냅샷 내용을 공용 캐시 + 스크립트별 상태 객체에 채움 → 캔들 시리즈 수"""
+    candle_ts, candle_ohlcv = arrays['candle_ts'], arrays['candle_ohlcv']
+    for market, interval, start, length, exhausted in state['candles']:
+        ring = CANDLE_CACHE.ring(market, interval)
+        if ring.size:
+            continue  # 이미 받은 데이터가 더 최신
+        keep = min(length, ring.capacity)
+        end = start + length
+        with CANDLE_CACHE.lock:
+            ring.merge(candle_ts[end - keep:end], candle_ohlcv[end - keep:end])
+            ring.exhausted = exhausted
+
+    daily_ts, daily_ohlcv = arrays['daily_ts'], arrays['daily_ohlcv']
+    with DAILY_STORE.lock:
+        for market, day, start, length in state['daily']:
+            if market not in DAILY_STORE.closed:
+                # memmap 뷰 대신 복사본 보관 (파일 교체 후에도 유효)
+                DAILY_STORE.closed[market] = (day, np.array(daily_ts[start:start + length]),
+                                              np.array(daily_ohlcv[start:start + length]))
+
+    with TICKER_SCREEN.lock:
+        for market, (ms, value, price) in zip(state['tickers'], arrays['ticker_values'].tolist()):
+            TICKER_SCREEN.snapshots.setdefault(market, (int(ms), value, price))
+
+    TRADE_TAPE.import_state(state.get('trades', {}))
+    ORDERBOOK_HISTORY.import_state(arrays['orderbook_books'], arrays['orderbook_times'], state['orderbooks'])
+
+    for name, obj in states.items():
+        if name in state['objects']:
+            obj.state = state['objects'][name]
+    return len(state['candles'])
+
+def save_snapshot(path=None, states=None):
+    """현재 상태 저장 (실패해도 스캔에는 영향 없음)"""
+    path = path or SNAPSHOT_FILE
+    if not path:
+        return
+    try:
+        size = write_snapshot(path, *collect(states or {}))
+        print(f"💾 상태 저장: {path} ({size / 1024:.0f}KB)")
+    except Exception as e:
+        print(f"상태 저장 오류: {e}")
+
+def load_snapshot(path=None, states=None):
+    """저장된 상태 불러오기 (없거나 손상/버전 불일치면 빈 상태로 시작)"""
+    path = path or SNAPSHOT_FILE
+    if not path or not os.path.exists(path):
+        return False
+    try:
+        series = restore(*read_snapshot(path), states or {})
+        print(f"♻️ 상태 복원: {path} (캔들 {series}개 시리즈)")
+        return True
+    except Exception as e:
+        print(f"상태 복원 오류 (빈 상태로 시작): {e}")
+        return False
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        return
+    arrays, state = read_snapshot(sys.argv[1])
+    for name, array in arrays.items():
+        print(f"{name}: {array.dtype} {array.shape}")
+    print(f"캔들 시리즈 {len(state['candles'])}개, 마감 일봉 {len(state['daily'])}개, 현재가 {len(state['tickers'])}개, "
+          f"호가 {len(state['orderbooks'])}개 마켓")
+    for name, value in state['objects'].items():
+        print(f"{name}: {len(value)}개")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+업비트 WebSocket 실시간 스트림 모듈
+- 체결(trade)/호가(orderbook) 구독 + 체결로 5분봉 실시간 생성
+- 녹화(record) / 재생 서버(replay): 녹화한 메시지를 로컬 WebSocket으로 재생해 검증
+
+사용법:
+    python upbit_stream.py record recorded.jsonl 60       # 60초 녹화
+    python upbit_stream.py replay recorded.jsonl 8765     # ws://localhost:8765 재생 서버
+    UPBIT_WS_URL=ws://localhost:8765 STREAM_ONCE=1 RUN_MODE=stream python upbit_fast_detector.py
+"""
+
+import asyncio
+import json
+import sys
+import time
+import uuid
+import os
+
+import numpy as np
+
+from upbit_api import INTERVALS, get_krw_markets
+from upbit_candles import CandleRing
+
+UPBIT_WS_URL = os.environ.get('UPBIT_WS_URL', 'wss://api.upbit.com/websocket/v1')
+WS_RECONNECT_DELAY = 1.0  # 재접속 대기 (초, 최대 30초까지 2배씩)
+STREAM_ONCE = os.environ.get('STREAM_ONCE', '0') == '1'  # 서버가 연결을 닫으면 종료 (재생 서버 1회 검증용)
+
+# ============================================
+# 구독 / 수신
+# ============================================
+
+def build_subscription(markets, types=('trade', 'orderbook')):
+    """업비트 WebSocket 구독 요청 메시지"""
+    request = [{'ticket': str(uuid.uuid4())}]
+    for message_type in types:
+        request.append({'type': message_type, 'codes': list(markets)})
+    request.append({'format': 'DEFAULT'})
+    return request
+
+async def stream_messages(markets, types=('trade', 'orderbook'), url=None, once=None, on_reconnect=None):
+    """
+    구독 후 메시지(dict)를 계속 돌려주는 비동기 제너레이터
+    연결이 끊기거나 서버가 정상 종료해도 재접속 (업비트는 유휴/장시간 연결을 정상 종료로 닫음)
+    접속 거부(HTTP 429 등 핸드셰이크 실패)/타임아웃도 같은 대기 시간 증가로 재시도
+    once: 서버가 닫으면 재접속 없이 종료 (기본 STREAM_ONCE)
+    on_reconnect: 재접속 후 구독 전에 await하는 콜백 (끊긴 동안 놓친 체결을 REST로 다시 채우기)
+    """
+    import websockets  # 실시간 모드에서만 필요
+    
+    url = url or UPBIT_WS_URL
+    once = STREAM_ONCE if once is None else once
+    delay = WS_RECONNECT_DELAY
+    connected = False
+    while True:
+        try:
+            async with websockets.connect(url, ping_interval=60, max_size=None) as ws:
+                if connected and on_reconnect is not None:
+                    await on_reconnect()
+                connected = True
+                await ws.send(json.dumps(build_subscription(markets, types)))
+                delay = WS_RECONNECT_DELAY
+                async for raw in ws:
+                    yield json.loads(raw)
+            if once:
+                return
+            reason = "서버가 연결 종료"
+        except (OSError, asyncio.TimeoutError, websockets.WebSocketException) as e:
+            reason = e
+        print(f"WebSocket 재접속 ({delay:.0f}초 후): {reason}")
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 30)
+
+# ============================================
+# 실시간 봉 생성
+# ============================================
+
+class LiveBarBuilder:
+    """체결로 마켓별 봉을 실시간 생성 (REST 캔들로 초기화 후 이어서 갱신)"""
+
+    def __init__(self, interval='minute5', capacity=50):
+        self.interval_ms = INTERVALS[interval][1]
+        self.capacity = capacity
+        self.rings = {}
+
+    def seed(self, market, ts, ohlcv):
+        """REST로 받은 과거 봉으로 초기화"""
+        ring = CandleRing(self.capacity)
+        ring.merge(ts[-self.capacity:], ohlcv[-self.capacity:])
+        self.rings[market] = ring
+
+    def add_trade(self, market, price, volume, timestamp):
+        """체결 1건 반영 - 봉이 바뀌었으면 True (이미 지난 봉의 체결은 무시)"""
+        ring = self.rings.get(market)
+        if ring is None:
+            ring = self.rings[market] = CandleRing(self.capacity)
+
+        bucket = timestamp // self.interval_ms * self.interval_ms
+        last = ring.last_ts()
+        if last is None or bucket > last:
+            ring.merge(np.array([bucket], dtype=np.int64),
+                       np.array([[price, price, price, price, volume, price * volume]]))
+        elif bucket == last:
+            bar = ring.ohlcv[ring.last_pos()]
+            bar[1] = max(bar[1], price)
+            bar[2] = min(bar[2], price)
+            bar[3] = price
+            bar[4] += volume
+            bar[5] += price * volume
+        else:
+            return False
+        return True
+
+    def tail(self, market, count=None):
+        """마켓 최근 봉 (ts, ohlcv)"""
+        ring = self.rings.get(market)
+        if ring is None:
+            return np.zeros(0, dtype=np.int64), np.zeros((0, 6))
+        return ring.tail(count or self.capacity)
+
+# ============================================
+# 녹화 / 재생 (로컬 검증용)
+# ============================================
+
+async def record_messages(path, markets, seconds):
+    """실제 업비트 메시지를 JSONL로 녹화"""
+    deadline = time.monotonic() + seconds
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        async for message in stream_messages(markets):
+            f.write(json.dumps(message, ensure_ascii=False) + '\n')
+            count += 1
+            if time.monotonic() >= deadline:
+                break
+    print(f"📼 {count}개 메시지 녹화: {path}")
+
+def load_recording(path):
+    """녹화 파일 → 메시지 목록"""
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+async def serve_replay(path, host='localhost', port=8765, speed=0.0):
+    """
+    녹화 메시지를 재생하는 로컬 WebSocket 서버 (업비트 서버 대역)
+    구독 요청을 받으면 요청한 마켓의 메시지를 바이너리 프레임으로 보내고 연결 종료
+    speed: 0이면 즉시, 1이면 녹화 시각 간격 그대로 재생
+    """
+    messages = load_recording(path)
+
+    async def handler(ws, *args):
+        request = json.loads(await ws.recv())
+        codes = set()
+        for item in request:
+            codes.update(item.get('codes', []))
+        previous = None
+        for message in messages:
+            if codes and message.get('code') not in codes:
+                continue
+            stamp = message.get('timestamp') or message.get('trade_timestamp')
+            if speed and previous and stamp:
+                await asyncio.sleep(max(stamp - previous, 0) / 1000 / speed)
+            previous = stamp or previous
+            await ws.send(json.dumps(message).encode('utf-8'))
+
+    import websockets
+    
+    async with websockets.serve(handler, host, port):
+        print(f"▶️ 재생 서버: ws://{host}:{port} ({len(messages)}개 메시지)")
+        await asyncio.Future()
+
+def main():
+    """녹화/재생 실행"""
+    if len(sys.argv) < 3 or sys.argv[1] not in ('record', 'replay'):
+        print(__doc__)
+        sys.exit(1)
+
+    if sys.argv[1] == 'record':
+        seconds = float(sys.argv[3]) if len(sys.argv) > 3 else 60
+        asyncio.run(record_messages(sys.argv[2], get_krw_markets(sharded=False), seconds))
+    else:
+        port = int(sys.argv[3]) if len(sys.argv) > 3 else 8765
+        asyncio.run(serve_replay(sys.argv[2], port=port))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+텔레그램 알림 발송 모듈
+스캔 루프는 큐에 넣기만 하고, 백그라운드 워커가 발송
+- keep-alive 세션 재사용
+- 채팅방별 / 전체 초당 발송 제한 준수
+- 한꺼번에 쌓인 알림은 메시지 하나로 합쳐서 발송
+- 429 / 네트워크 오류는 대기 후 재시도
+- 스캐너들이 프로세스 공용 발송 워커(TELEGRAM) 하나를 같이 씀
+"""
+
+import os
+import queue
+import sys
+import threading
+import time
+
+import requests
+
+from upbit_metrics import METRICS
+
+TELEGRAM_API_URL = "https://api.telegram.org"
+TELEGRAM_CHAT_INTERVAL = float(os.environ.get('TELEGRAM_CHAT_INTERVAL', '1.0'))  # 같은 채팅방 발송 간격 (초)
+TELEGRAM_GLOBAL_RATE = float(os.environ.get('TELEGRAM_GLOBAL_RATE', '30'))  # 봇 전체 초당 발송 수
+TELEGRAM_MERGE_WINDOW = float(os.environ.get('TELEGRAM_MERGE_WINDOW', '0.5'))  # 첫 알림 후 합칠 알림을 기다리는 시간 (초)
+TELEGRAM_MAX_RETRIES = int(os.environ.get('TELEGRAM_MAX_RETRIES', '5'))
+TELEGRAM_MAX_LENGTH = 4096  # 메시지 1개 최대 길이
+MESSAGE_SEPARATOR = "\n\n" + "─" * 20 + "\n\n"
+
+class TelegramDispatcher:
+    """텔레그램 발송 큐 + 워커 스레드"""
+
+    def __init__(self, bot_token, chat_id):
+        self.bot_token = bot_token
+        self.chat_id = chat_id
+        self.session = requests.Session()
+        self.queue = queue.Queue()
+        self.worker = None
+        self.lock = threading.Lock()
+        self.next_chat = {}  # 채팅방 → 다음 발송 가능 시각
+        self.next_global = 0.0
+
+    # ============================================
+    # 발송 제한 / 재시도
+    # ============================================
+
+    def wait_slot(self, chat_id):
+        """채팅방별 / 전체 발송 간격이 될 때까지 대기 후 슬롯 예약"""
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_chat.get(chat_id, 0.0), self.next_global)
+            self.next_chat[chat_id] = start + TELEGRAM_CHAT_INTERVAL
+            self.next_global = start + 1.0 / TELEGRAM_GLOBAL_RATE
+        if start > now:
+            time.sleep(start - now)
+
+    def post(self, text, chat_id=None, parse_mode=None):
+        """sendMessage 호출 (429 / 네트워크 오류 / 5xx는 대기 후 재시도) → 응답 JSON"""
+        chat_id = chat_id or self.chat_id
+        data = {"chat_id": chat_id, "text": text}
+        if parse_mode:
+            data["parse_mode"] = parse_mode
+
+        for attempt in range(TELEGRAM_MAX_RETRIES + 1):
+            self.wait_slot(chat_id)
+            retry_after = None
+            started = time.perf_counter()
+            try:
+                response = self.session.post(f"{TELEGRAM_API_URL}/bot{self.bot_token}/sendMessage", data=data, timeout=10)
+                result = response.json()
+                METRICS.observe('telegram_seconds', time.perf_counter() - started)
+                if result.get('ok'):
+                    METRICS.inc('telegram_messages_total')
+                    return result
+                METRICS.inc('telegram_errors_total', status=response.status_code)
+                if response.status_code != 429 and response.status_code < 500:
+                    print(f"텔레그램 전송 실패: {result.get('description')}")
+                    return result
+                retry_after = (result.get('parameters') or {}).get('retry_after')
+            except (requests.RequestException, ValueError) as e:
+                METRICS.inc('telegram_errors_total', status=type(e).__name__)
+                print(f"텔레그램 전송 오류 ({attempt + 1}회): {e}")
+
+            if attempt < TELEGRAM_MAX_RETRIES:
+                time.sleep(retry_after or min(2 ** attempt, 30))
+
+        print("텔레그램 전송 실패: 재시도 초과")
+        return None
+
+    # ============================================
+    # 큐 / 워커
+    # ============================================
+
+    def send(self, message, parse_mode=None):
+        """즉시 발송 (호출한 스레드에서 응답까지 대기)"""
+        try:
+            return self.post(message, parse_mode=parse_mode)
+        except Exception as e:
+            print(f"텔레그램 전송 실패: {e}")
+            return None
+
+    def enqueue(self, message, chat_id=None, parse_mode=None):
+        """발송 예약 (대기 없음)"""
+        with self.lock:
+            if self.worker is None or not self.worker.is_alive():
+                self.worker = threading.Thread(target=self.run, name="telegram-dispatcher", daemon=True)
+                self.worker.start()
+        self.queue.put((chat_id or self.chat_id, parse_mode, message, time.monotonic()))
+
+    def drain(self):
+        """큐에 쌓인 알림 모두 꺼내기 (종료 신호 None 포함)"""
+        items = []
+        while True:
+            try:
+                items.append(self.queue.get_nowait())
+            except queue.Empty:
+                return items
+
+    def merge(self, items):
+        """같은 채팅방/형식의 알림을 최대 길이 안에서 합침 → [(채팅방, 형식, 메시지, 가장 이른 예약 시각)]"""
+        merged = []
+        for chat_id, parse_mode, message, queued in items:
+            if merged:
+                last_chat, last_mode, last_text, last_queued = merged[-1]
+                if (last_chat, last_mode) == (chat_id, parse_mode) and \
+                        len(last_text) + len(MESSAGE_SEPARATOR) + len(message) <= TELEGRAM_MAX_LENGTH:
+                    merged[-1] = (chat_id, parse_mode, last_text + MESSAGE_SEPARATOR + message, last_queued)
+                    continue
+            merged.append((chat_id, parse_mode, message, queued))
+        return merged
+
+    def run(self):
+        """워커: 첫 알림 후 잠시 모아서 합친 뒤 발송"""
+        running = True
+        while running:
+            first = self.queue.get()
+            if first is not None:
+                time.sleep(TELEGRAM_MERGE_WINDOW)
+            items = [first] + self.drain()
+            running = None not in items
+            batch = [item for item in items if item is not None]
+
+            for chat_id, parse_mode, message, queued in self.merge(batch):
+                try:
+                    self.post(message, chat_id, parse_mode)
+                except Exception as e:
+                    print(f"텔레그램 전송 실패: {e}")
+                # 예약 → 발송 완료까지 (합치기 대기 + 발송 제한 + 재시도 포함)
+                METRICS.observe('telegram_queue_seconds', time.monotonic() - queued)
+            for _ in items:
+                self.queue.task_done()
+
+    def close(self, timeout=60):
+        """남은 알림 발송 후 워커 종료 (최대 timeout초 대기)"""
+        if self.worker is None or not self.worker.is_alive():
+            return
+        self.queue.put(None)
+        self.worker.join(timeout)
+
+# ============================================
+# 공용 발송 워커
+# ============================================
+
+def load_telegram_config():
+    """BOT_TOKEN/CHAT_ID: 환경변수, 없으면 config.py (둘 다 없으면 빈 문자열)"""
+    bot_token = os.environ.get('BOT_TOKEN', '')
+    chat_id = os.environ.get('CHAT_ID', '')
+    if not bot_token or not chat_id:
+        try:
+            from config import BOT_TOKEN as CONFIG_BOT_TOKEN
+            from config import CHAT_ID as CONFIG_CHAT_ID
+            bot_token, chat_id = CONFIG_BOT_TOKEN, CONFIG_CHAT_ID
+        except ImportError:
+            pass
+    return bot_token, chat_id
+
+# 프로세스 공용 발송 워커 (keep-alive 세션, 발송 제한, 알림 합치기)
+TELEGRAM = TelegramDispatcher(*load_telegram_config())
+
+def require_telegram():
+    """텔레그램 설정이 없으면 종료 (각 스크립트 main에서 호출, import만 할 때는 확인 안 함)"""
+    if not TELEGRAM.bot_token or not TELEGRAM.chat_id:
+        print("❌ 텔레그램 설정이 없습니다!")
+        sys.exit(1)
+
+def send_telegram(message, parse_mode=None):
+    """텔레그램 메시지 즉시 전송 (시작/종료 알림용)"""
+    return TELEGRAM.send(message, parse_mode)
+
+def queue_telegram(message):
+    """텔레그램 알림 발송 예약 (스캔 루프용, 대기 없음)"""
+    TELEGRAM.enqueue(message)
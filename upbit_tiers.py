@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+업비트 마켓 등급(hot/cold) 스케줄러
+거래량 관문을 통과한 코인은 매 회차, 조용한 코인은 N회차에 한 번만 스캔
+- 승격: 스캔 결과 관문 통과 시 즉시 hot
+- 강등: hot 코인이 연속 TIER_DEMOTE_AFTER회 관문 미통과 시 cold
+- cold 코인은 코인별 고정 순번(crc32)으로 회차마다 고르게 나눠 스캔
+- 회차 번호는 벽시계 기준이라 1회 실행(GitHub Actions)도 TIER_FILE로 이어서 사용 가능
+"""
+
+import json
+import os
+import time
+import zlib
+
+from upbit_shard import shard_path
+
+TIER_COLD_EVERY = int(os.environ.get('TIER_COLD_EVERY', '3'))  # cold 코인 스캔 간격 (회차)
+TIER_DEMOTE_AFTER = int(os.environ.get('TIER_DEMOTE_AFTER', '3'))  # 연속 미통과 몇 회면 cold로 강등
+TIER_FILE = shard_path(os.environ.get('TIER_FILE', ''))  # 등급 상태 저장 파일 (1회 실행 모드에서 회차 간 유지, 샤드별)
+
+class MarketTiers:
+    """마켓별 등급 / 연속 미통과 횟수 / 마지막 스캔 회차"""
+
+    def __init__(self, interval, cold_every=TIER_COLD_EVERY, demote_after=TIER_DEMOTE_AFTER, path=None):
+        self.interval = interval
+        self.cold_every = max(cold_every, 1)
+        self.demote_after = demote_after
+        self.path = path
+        self.state = {}  # 코인 → {'tier', 'quiet', 'last'}
+        if path:
+            self.load()
+
+    def slot(self, now=None):
+        """벽시계 기준 회차 번호"""
+        return int((now if now is not None else time.time()) // self.interval)
+
+    def is_due(self, market, slot):
+        """이번 회차 스캔 대상 여부"""
+        state = self.state.get(market)
+        if state is None or state['tier'] == 'hot' or self.cold_every == 1:
+            return True
+        if slot - state['last'] >= self.cold_every:
+            return True
+        return zlib.crc32(market.encode()) % self.cold_every == slot % self.cold_every
+
+    def select(self, markets, slot=None):
+        """이번 회차 스캔할 코인 (마켓 목록 순서 유지, 상장 폐지 코인 상태 정리)"""
+        slot = self.slot() if slot is None else slot
+        listed = set(markets)
+        for market in [m for m in self.state if m not in listed]:
+            del self.state[market]
+        return [market for market in markets if self.is_due(market, slot)]
+
+    def is_hot(self, market):
+        state = self.state.get(market)
+        return state is not None and state['tier'] == 'hot'
+
+    def update(self, scanned, hot, slot=None):
+        """
+        스캔 결과 반영
+        scanned: 이번에 데이터를 받아 판정한 코인 / hot: 그중 관문 통과 코인
+        """
+        slot = self.slot() if slot is None else slot
+        hot = set(hot)
+        for market in scanned:
+            state = self.state.setdefault(market, {'tier': 'cold', 'quiet': 0, 'last': slot})
+            state['last'] = slot
+            if market in hot:
+                state['tier'] = 'hot'
+                state['quiet'] = 0
+            elif state['tier'] == 'hot':
+                state['quiet'] += 1
+                if state['quiet'] >= self.demote_after:
+                    state['tier'] = 'cold'
+                    state['quiet'] = 0
+        if self.path:
+            self.save()
+
+    def counts(self):
+        """등급별 코인 수"""
+        hot = sum(1 for state in self.state.values() if state['tier'] == 'hot')
+        return hot, len(self.state) - hot
+
+    # ============================================
+    # 저장 / 불러오기
+    # ============================================
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                self.state = json.load(f)
+        except FileNotFoundError:
+            self.state = {}
+        except (OSError, ValueError) as e:
+            print(f"등급 상태 불러오기 오류: {e}")
+            self.state = {}
+
+    def save(self):
+        try:
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, 'w') as f:
+                json.dump(self.state, f)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            print(f"등급 상태 저장 오류: {e}")
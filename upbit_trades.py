@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+업비트 체결 틱 집계 (실제 체결강도)
+마켓별로 처음 보는 체결만 봉 단위 매수/매도 체결량에 더함
+- 체결 번호(sequential_id)는 유일하지만 순서 보장이 없음 → (시각, 번호)로 판정
+  최신 체결 시각 기준 TRADE_DEDUPE_SECONDS초 안의 체결 번호만 기억하고, 그보다 오래된 체결은 이미 본 것으로 간주
+- REST: 최신 체결부터 받다가 그 구간 시작 시각보다 오래된 체결에 닿으면 중단 (요청/계산 모두 새 체결 수에 비례)
+- WebSocket: 체결 메시지를 그대로 더함 (REST 요청 없음)
+- 체결강도 = 매수 체결량 / 매도 체결량 × 100 (최근 TRADE_PRESSURE_BARS개 봉)
+- 상태(최신 시각 + 최근 체결 번호 + 봉별 합계)는 작은 JSON이라 스냅샷(upbit_snapshot)으로 실행 간에 유지
+"""
+
+import os
+import threading
+import time
+
+from upbit_api import fetch_trades
+from upbit_metrics import METRICS
+
+TRADE_TICK_COUNT = int(os.environ.get('TRADE_TICK_COUNT', '200'))  # 체결 요청 1회당 개수
+TRADE_MAX_PAGES = int(os.environ.get('TRADE_MAX_PAGES', '5'))  # 이미 본 구간까지 거슬러 올라갈 최대 요청 수 (넘으면 봉 합계 초기화)
+TRADE_DEDUPE_SECONDS = int(os.environ.get('TRADE_DEDUPE_SECONDS', '10'))  # 체결 번호로 중복을 거르는 구간 (최신 체결 시각 기준, 초)
+TRADE_BAR_SECONDS = int(os.environ.get('TRADE_BAR_SECONDS', '60'))  # 집계 봉 길이 (초)
+TRADE_BARS = int(os.environ.get('TRADE_BARS', '30'))  # 마켓별 보관 봉 수
+TRADE_PRESSURE_BARS = int(os.environ.get('TRADE_PRESSURE_BARS', '5'))  # 체결강도 계산 봉 수
+TRADE_MIN_TICKS = int(os.environ.get('TRADE_MIN_TICKS', '20'))  # 이보다 체결이 적으면 체결강도 없음
+TRADE_INTENSITY_THRESHOLD = float(os.environ.get('TRADE_INTENSITY_THRESHOLD', '150'))  # 매수세 점수 기준 체결강도 (%)
+TRADE_INTENSITY_MAX = 999.0  # 매도 체결이 없을 때 체결강도
+
+class TradeTape:
+    """
+    마켓 → {'time': 본 체결 중 최신 시각(ms), 'seen': {체결 번호: 시각} (최신 시각 기준 dedupe 구간 안),
+             'bars': [[봉 시작(ms), 매수량, 매도량, 체결 수], ...]}
+    """
+
+    def __init__(self, fetch=fetch_trades, bar_seconds=TRADE_BAR_SECONDS, bars=TRADE_BARS,
+                 dedupe_seconds=TRADE_DEDUPE_SECONDS):
+        self.fetch = fetch
+        self.bar_ms = bar_seconds * 1000
+        self.bars = bars
+        self.dedupe_ms = dedupe_seconds * 1000
+        self.state = {}
+        self.lock = threading.Lock()
+        self.max_age = 0.0  # 갱신한 지 이 초 안이면 재조회 안 함 (공용 스캔 코어가 설정)
+        self.refreshed = {}  # 마켓 → 마지막 REST 갱신 시각 (monotonic)
+
+    def add(self, market, ticks):
+        """체결 [(체결 번호, 시각(ms), 수량, 매수 여부)] (오래된 순) → 처음 보는 체결만 봉 합계에 더함, 더한 수 반환"""
+        added = 0
+        with self.lock:
+            entry = self.state.setdefault(market, {'time': 0, 'seen': {}, 'bars': []})
+            bars, seen = entry['bars'], entry['seen']
+            for seq, ts, volume, is_buy in ticks:
+                if seq in seen or ts < entry['time'] - self.dedupe_ms:
+                    continue
+                seen[seq] = ts
+                entry['time'] = max(entry['time'], ts)
+                start = ts - ts % self.bar_ms
+                if not bars or start > bars[-1][0]:
+                    bars.append([start, 0.0, 0.0, 0])
+                    if len(bars) > self.bars:
+                        del bars[0]
+                    bar = bars[-1]
+                else:
+                    # 늦게 온 체결은 해당 봉을 뒤에서부터 찾음 (없으면 버림)
+                    bar = next((b for b in reversed(bars) if b[0] == start), None)
+                    if bar is None:
+                        continue
+                bar[1 if is_buy else 2] += volume
+                bar[3] += 1
+                added += 1
+            # 구간을 벗어난 체결 번호는 잊음 (그보다 오래된 체결은 시각으로 걸러짐)
+            oldest = entry['time'] - self.dedupe_ms
+            for seq in [seq for seq, ts in seen.items() if ts < oldest]:
+                del seen[seq]
+        return added
+
+    def add_trade(self, market, message):
+        """WebSocket 체결 메시지 1건 더하기"""
+        return self.add(market, [(message.get('sequential_id') or message['trade_timestamp'], message['trade_timestamp'],
+                                  message['trade_volume'], message.get('ask_bid') == 'BID')])
+
+    def refresh(self, market):
+        """이미 본 구간 이후 새 체결 REST 조회 → 더한 체결 수 (max_age 안이면 조회 안 함)"""
+        if self.max_age and time.monotonic() - self.refreshed.get(market, float('-inf')) < self.max_age:
+            return 0
+        with self.lock:
+            entry = self.state.get(market)
+            oldest = entry['time'] - self.dedupe_ms if entry else None
+
+        pages = []
+        before = None
+        reached = oldest is None
+        for _ in range(TRADE_MAX_PAGES):
+            page = self.fetch(market, TRADE_TICK_COUNT, before)
+            if not page:
+                reached = True
+                break
+            pages.append(page)
+            before = page[-1]['sequential_id']  # 다음 페이지 요청용 (API 페이지 커서)
+            # 페이지는 최신순 → 마지막 체결이 구간 시작보다 오래됐으면 그 뒤는 모두 이미 봄
+            if (oldest is not None and page[-1]['timestamp'] < oldest) or len(page) < TRADE_TICK_COUNT:
+                reached = True
+                break
+            if oldest is None:
+                break  # 처음 보는 마켓은 최근 1회분만
+
+        if not reached:
+            # 이미 본 구간까지 못 닿음 → 중간 체결이 빠졌으므로 봉 합계를 새로 시작
+            with self.lock:
+                self.state.pop(market, None)
+
+        self.refreshed[market] = time.monotonic()
+        ticks = [(t['sequential_id'], t['timestamp'], t['trade_volume'], t['ask_bid'] == 'BID')
+                 for page in reversed(pages) for t in reversed(page)]
+        return self.add(market, ticks)
+
+    def export_state(self):
+        """스냅샷용 JSON 상태 (체결 번호 dict는 [번호, 시각] 목록으로)"""
+        with self.lock:
+            return {market: {'time': entry['time'], 'seen': [[seq, ts] for seq, ts in entry['seen'].items()],
+                             'bars': [list(bar) for bar in entry['bars']]}
+                    for market, entry in self.state.items()}
+
+    def import_state(self, state):
+        """스냅샷 상태 채우기 (이미 받은 마켓은 그대로, 이전 형식(체결 번호 커서)은 버리고 새로 시작)"""
+        with self.lock:
+            for market, entry in state.items():
+                if 'seen' not in entry:
+                    continue
+                self.state.setdefault(market, {'time': entry['time'], 'seen': {seq: ts for seq, ts in entry['seen']},
+                                               'bars': [list(bar) for bar in entry['bars']]})
+
+    def pressure(self, market, bars=TRADE_PRESSURE_BARS, now_ms=None):
+        """최근 bars개 봉 체결강도 → dict (체결이 TRADE_MIN_TICKS개 미만이면 None)"""
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        oldest = now_ms - now_ms % self.bar_ms - (bars - 1) * self.bar_ms
+        buy = sell = count = 0
+        with self.lock:
+            for start, bar_buy, bar_sell, bar_count in self.state.get(market, {}).get('bars', []):
+                if start >= oldest:
+                    buy += bar_buy
+                    sell += bar_sell
+                    count += bar_count
+        if count < TRADE_MIN_TICKS:
+            return None
+        return {
+            'trade_intensity': min(buy / sell * 100, TRADE_INTENSITY_MAX) if sell > 0 else TRADE_INTENSITY_MAX,
+            'trade_buy_ratio': buy / (buy + sell) if buy + sell > 0 else 0,
+            'trade_buy_volume': buy,
+            'trade_sell_volume': sell,
+            'trade_ticks': count,
+        }
+
+# 프로세스 공용 체결 집계
+TRADE_TAPE = TradeTape()
+
+def with_trade_pressure(coin, data):
+    """지표 dict에 체결강도 추가 (새 체결만 조회, 실패/체결 부족 시 그대로)"""
+    if not data:
+        return data
+    try:
+        with METRICS.timer('trades'):
+            TRADE_TAPE.refresh(coin)
+        pressure = TRADE_TAPE.pressure(coin)
+    except Exception as e:
+        METRICS.error('trades', e)
+        return data
+    return {**data, **pressure} if pressure else data